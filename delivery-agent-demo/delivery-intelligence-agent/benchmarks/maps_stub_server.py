@@ -0,0 +1,132 @@
+"""
+Local stand-in for the Maps Distance Matrix and Directions endpoints.
+
+Answers deterministically from the coordinates: straight-line distance x 1.3 at
+40 km/h, a traffic delay derived from a hash of the destination, and a
+"Restricted usage road" step for about one destination in seven. Point the route
+analysis at it to run the route stage offline and count the requests it makes:
+
+    python benchmarks/maps_stub_server.py --port 8766
+    MAPS_API_BASE_URL=http://127.0.0.1:8766 FLOC_LOCATIONS='{"5928": "42.03,-88.28"}' python main.py
+
+GET /stats returns the number of requests and matrix elements served.
+"""
+import argparse
+import hashlib
+import json
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+stats = {"distancematrix": 0, "directions": 0, "elements": 0}
+
+
+def _coordinates(location: str):
+    try:
+        lat, lng = (float(part) for part in location.split(","))
+        return lat, lng
+    except ValueError:
+        return None
+
+
+def _fraction(text: str) -> float:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+def _leg(origin: str, destination: str):
+    """(distance m, duration s, duration in traffic s) or None when the location cannot be resolved."""
+    a, b = _coordinates(origin), _coordinates(destination)
+    if a is None or b is None:
+        return None
+    dlat, dlng = math.radians(b[0] - a[0]), math.radians(b[1] - a[1])
+    h = math.sin(dlat / 2) ** 2 + math.cos(math.radians(a[0])) * math.cos(math.radians(b[0])) * math.sin(dlng / 2) ** 2
+    distance = 2 * 6371000 * math.asin(math.sqrt(h)) * 1.3
+    duration = distance / (40 / 3.6)
+    return int(distance), int(duration), int(duration * (1 + _fraction(destination)))
+
+
+def distance_matrix(params):
+    origins = params["origins"][0].split("|")
+    destinations = params["destinations"][0].split("|")
+    stats["distancematrix"] += 1
+    stats["elements"] += len(origins) * len(destinations)
+    rows = []
+    for origin in origins:
+        elements = []
+        for destination in destinations:
+            leg = _leg(origin, destination)
+            if leg is None:
+                elements.append({"status": "NOT_FOUND"})
+            else:
+                distance, duration, in_traffic = leg
+                elements.append({
+                    "status": "OK",
+                    "distance": {"value": distance},
+                    "duration": {"value": duration},
+                    "duration_in_traffic": {"value": in_traffic},
+                })
+        rows.append({"elements": elements})
+    return {"status": "OK", "origin_addresses": origins, "destination_addresses": destinations, "rows": rows}
+
+
+def directions(params):
+    origin, destination = params["origin"][0], params["destination"][0]
+    stats["directions"] += 1
+    leg = _leg(origin, destination)
+    if leg is None:
+        return {"status": "ZERO_RESULTS", "routes": [], "geocoded_waypoints": [{"partial_match": True}]}
+    distance, duration, in_traffic = leg
+    steps = [{"html_instructions": "Head north"}]
+    if _fraction(destination + "restricted") < 1 / 7:
+        steps.append({"html_instructions": "Turn right onto <b>Service Rd</b> (Restricted usage road)"})
+    return {
+        "status": "OK",
+        "geocoded_waypoints": [{}, {}],
+        "routes": [{
+            "warnings": [],
+            "legs": [{
+                "distance": {"value": distance},
+                "duration": {"value": duration},
+                "duration_in_traffic": {"value": in_traffic},
+                "steps": steps,
+            }],
+        }],
+    }
+
+
+class MapsStubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path.endswith("/distancematrix/json"):
+            body = distance_matrix(params)
+        elif url.path.endswith("/directions/json"):
+            body = directions(params)
+        elif url.path == "/stats":
+            body = stats
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), MapsStubHandler)
+    print(f"Maps stub listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
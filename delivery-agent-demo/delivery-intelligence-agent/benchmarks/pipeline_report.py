@@ -0,0 +1,28 @@
+"""
+Summarize pipeline metrics recorded with PIPELINE_METRICS_PATH.
+
+Prints p50/p95 per stage (agent wall time), per model call (latency, time to
+first token, mean token counts) and per tool (duration, response size) across
+every order in the file.
+
+    PIPELINE_METRICS_PATH=.cache/metrics.jsonl python main.py --date tomorrow
+    python benchmarks/pipeline_report.py .cache/metrics.jsonl
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from workflow.utils.instrumentation import load_records, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default=os.getenv("PIPELINE_METRICS_PATH", ".cache/metrics.jsonl"))
+    args = parser.parse_args()
+    print(summarize(load_records(args.path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Record replay fixtures for a set of orders.
+
+Runs the real pipeline (live BigQuery, Open-Meteo, Street View, OpenAI and
+Gemini) and stores every model response, every MCP tool result and the
+in-process order context into a fixture directory for
+`benchmarks/replay_benchmark.py`. Case cards are written to action_update as in
+a normal run unless --no-writes is given. --scrub removes addresses and phone
+numbers from the order context before the run; --canned-models answers model
+requests with fixed text, so fixtures can be recorded without model credentials
+(this is how benchmarks/replay_fixtures was made, against the local DuckDB data).
+
+    python benchmarks/record_fixtures.py --orders 882 2204 --out fixtures --no-writes
+    QUERY_BACKEND=duckdb python benchmarks/record_fixtures.py --orders 1 2 --out benchmarks/replay_fixtures \
+        --no-writes --scrub --canned-models
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+AGENT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, AGENT_ROOT)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--orders", type=int, nargs="+", help="Order ids to record")
+    source.add_argument("--orders-file", help="File with one order id per line")
+    parser.add_argument("--out", default="fixtures", help="Fixture directory")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--no-writes", action="store_true", help="Do not write case cards to action_update or mark orders processed")
+    parser.add_argument("--scrub", action="store_true", help="Remove addresses and phone numbers from the recorded order context")
+    parser.add_argument("--canned-models", action="store_true", help="Answer model requests with fixed text instead of calling the models")
+    return parser.parse_args()
+
+
+async def record(args):
+    # The tool servers are spawned by the toolsets created on import, so configure them first
+    fixtures_dir = os.path.abspath(args.out)
+    server_args = ["workflow/mcp/tools_server.py", "--record-dir", fixtures_dir]
+    if args.no_writes:
+        server_args.append("--no-writes")
+    os.environ["MCP_SERVER_ARGS"] = json.dumps(server_args)
+    # The route stage calls Maps in-process, where no fixture records it, so replay runs without it
+    os.environ.setdefault("ROUTE_ANALYSIS_ENABLED", "false")
+    if args.canned_models:
+        # No model asks for a tool, so live prefetches would only add network calls
+        os.environ.setdefault("PREFETCH_ENABLED", "false")
+    os.chdir(AGENT_ROOT)
+
+    from workflow.agent_workflows.delivery_intelligence import delivery_intelligence_runner, delivery_pipeline_agent, pipeline_sessions
+    from workflow.replay.fixtures import models_dir, save_order_context, save_orders, scrub_order_context
+    from workflow.replay.replay_llm import use_canned_models
+    from workflow.services.batch_runner import BatchRunner, load_order_ids_from_file
+    from workflow.utils.llm_cache import LlmResponseCache
+
+    order_ids = args.orders or load_order_ids_from_file(args.orders_file)
+    if args.scrub:
+        for order_id in order_ids:
+            scrub_order_context(order_id)
+    if args.canned_models:
+        use_canned_models(delivery_pipeline_agent)
+    recorder = LlmResponseCache(models_dir(fixtures_dir), max_bytes=float("inf"), ttl_seconds=float("inf"))
+    recorder.install(delivery_pipeline_agent)
+
+    batch = BatchRunner(delivery_intelligence_runner, pipeline_sessions, concurrency=args.concurrency,
+                        checkpoint_path=os.path.join(fixtures_dir, "record_checkpoint.jsonl"))
+    results = await batch.run(order_ids)
+
+    recorded = [r.order_id for r in results if r.status == "ok"]
+    for order_id in recorded:
+        save_order_context(fixtures_dir, order_id)
+    save_orders(fixtures_dir, recorded)
+    print(f"Recorded {len(recorded)} orders into {fixtures_dir} ({recorder.stats()['misses']} model responses)")
+
+
+if __name__ == "__main__":
+    asyncio.run(record(parse_args()))
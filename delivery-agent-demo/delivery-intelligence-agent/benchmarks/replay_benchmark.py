@@ -0,0 +1,73 @@
+"""
+Offline benchmark of the delivery pipeline orchestration.
+
+Replays recorded fixtures through the real ADK runner, DAG and MCP toolsets:
+models are answered by `ReplayLlm`, tools by the stub MCP server, and the
+order context is primed from the fixtures, so no network is needed. With the
+default zero model latency the measured time is orchestration overhead.
+
+    python benchmarks/replay_benchmark.py --fixtures fixtures --orders 50 --concurrency 8
+    python benchmarks/replay_benchmark.py --fixtures fixtures --model-latency 1.5
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+AGENT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, AGENT_ROOT)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default="fixtures", help="Fixture directory written by record_fixtures.py")
+    parser.add_argument("--orders", type=int, default=20, help="Number of pipeline runs (recorded orders are reused)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Simulated seconds per model call")
+    return parser.parse_args()
+
+
+async def replay(args):
+    fixtures_dir = os.path.abspath(args.fixtures)
+    os.environ["MCP_SERVER_ARGS"] = json.dumps(["workflow/replay/stub_tools_server.py", "--fixtures", fixtures_dir])
+    os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+    # Tools answer from the fixtures; live Street View / weather prefetches would only add network calls
+    os.environ.setdefault("PREFETCH_ENABLED", "false")
+    # The route stage calls Maps in-process, outside the recorded tools; it is off when recording too
+    os.environ.setdefault("ROUTE_ANALYSIS_ENABLED", "false")
+    os.chdir(AGENT_ROOT)
+
+    from workflow.agent_workflows.delivery_intelligence import delivery_intelligence_runner, delivery_pipeline_agent, pipeline_sessions
+    from workflow.replay.fixtures import load_orders, prime_order_context
+    from workflow.replay.replay_llm import use_replay_models
+    from workflow.services.batch_runner import BatchRunner
+
+    recorded = load_orders(fixtures_dir)
+    for order_id in recorded:
+        prime_order_context(fixtures_dir, order_id)
+    models = use_replay_models(delivery_pipeline_agent, fixtures_dir, latency_seconds=args.model_latency)
+
+    # BatchRunner runs each order id once, so repeat rounds over the recorded orders
+    results = []
+    start = time.monotonic()
+    with tempfile.TemporaryDirectory() as tmp:
+        remaining = args.orders
+        for round_number in range(math.ceil(args.orders / len(recorded))):
+            order_ids = recorded[:remaining]
+            batch = BatchRunner(delivery_intelligence_runner, pipeline_sessions, concurrency=args.concurrency,
+                                checkpoint_path=os.path.join(tmp, f"round_{round_number}.jsonl"))
+            results += await batch.run(order_ids)
+            remaining -= len(order_ids)
+    elapsed = time.monotonic() - start
+
+    print()
+    BatchRunner.report(results, elapsed)
+    print(f"Replay misses: {sum(model.misses for model in models)} model responses")
+
+
+if __name__ == "__main__":
+    asyncio.run(replay(parse_args()))
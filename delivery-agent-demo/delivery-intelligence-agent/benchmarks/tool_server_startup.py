@@ -0,0 +1,73 @@
+"""
+Cold-start benchmark for the MCP tool server.
+
+Spawns `workflow/mcp/tools_server.py` over stdio the same way `MCPToolset` does
+and reports, per run, the time until the session is initialized, the tool list
+is returned and the first tool call responds.
+
+    python benchmarks/tool_server_startup.py --runs 5
+    python benchmarks/tool_server_startup.py --tool fetch_customer_info --args '{"order_id": 882}'
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+AGENT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+async def measure_once(tool: str, args: dict) -> dict:
+    server_params = StdioServerParameters(
+        command=sys.executable,
+        args=[os.path.join("workflow", "mcp", "tools_server.py")],
+        cwd=AGENT_ROOT,
+    )
+    start = time.perf_counter()
+    async with stdio_client(server_params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            initialized = time.perf_counter()
+            tools = await session.list_tools()
+            listed = time.perf_counter()
+            await session.call_tool(tool, args)
+            responded = time.perf_counter()
+
+    return {
+        "initialize_s": initialized - start,
+        "list_tools_s": listed - start,
+        "first_tool_response_s": responded - start,
+        "tools": len(tools.tools),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure MCP tool server time-to-first-tool-response")
+    parser.add_argument("--runs", type=int, default=3)
+    # An empty bulk weather request answers without any network or BigQuery call
+    parser.add_argument("--tool", default="get_weather_forecast_bulk")
+    parser.add_argument("--args", default='{"locations": []}', help="JSON arguments for the tool call")
+    options = parser.parse_args()
+
+    results = []
+    for run in range(options.runs):
+        result = await measure_once(options.tool, json.loads(options.args))
+        results.append(result)
+        print(
+            f"run {run + 1}: initialize {result['initialize_s']:.2f}s, "
+            f"list_tools {result['list_tools_s']:.2f}s, "
+            f"first tool response {result['first_tool_response_s']:.2f}s ({result['tools']} tools)"
+        )
+
+    for key in ("initialize_s", "list_tools_s", "first_tool_response_s"):
+        values = [r[key] for r in results]
+        print(f"{key}: median {statistics.median(values):.2f}s, min {min(values):.2f}s, max {max(values):.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
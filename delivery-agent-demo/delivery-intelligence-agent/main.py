@@ -24,50 +24,56 @@ import uuid
 from google.adk.tools import FunctionTool
 from datetime import datetime
 from workflow.services.check_actions import check_order_action
+from workflow.services.processed_orders import processed_orders
+from workflow.services.prefetch import start_prefetch
 from typing import Optional
 import vertexai
 
-from workflow.agent_workflows.delivery_intelligence import delivery_intelligence_runner,session_service
-from workflow.agent_workflows.query_action_agent import query_action_table,session_service_action_agent
+from workflow.agent_workflows.delivery_intelligence import delivery_intelligence_runner,pipeline_sessions
+from workflow.agent_workflows.query_action_agent import query_action_table,action_sessions
 
 
 
-from workflow.utils.config import APP_NAME
+from workflow.utils.config import APP_NAME, SESSION_USER_ID
 
 import uuid
-USER_ID = f"user_{ str(uuid.uuid4())}"
-SESSION_ID = f"session_{str(uuid.uuid4())}"
+USER_ID = SESSION_USER_ID
 
 
 print(f"Runner created for agent '{delivery_intelligence_runner.agent.name}'.")
 
 # Async function that creates session and runs the agent
 async def run_parallel_agent(query:str):
-    # Create session asynchronously
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-    )
+    # Create a fresh session per order so runs never share state
+    session_id = f"session_{str(uuid.uuid4())}"
+    session = await pipeline_sessions.create(USER_ID, session_id)
     
-    print(f"Session created: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}'")
+    print(f"Session created: App='{APP_NAME}', User='{USER_ID}', Session='{session_id}'")
     
     content = types.Content(role='user', parts=[types.Part(text=query)])
     
     # Use async for loop with run_async
-    async for event in delivery_intelligence_runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=content):
+    async for event in delivery_intelligence_runner.run_async(user_id=USER_ID, session_id=session_id, new_message=content):
         print()
         print('-'*15)
         if event.is_final_response():
             if event.content and event.content.parts:
                 
                 print(f" Response: {event.content.parts[0].text}")
+
+    # Keep only the final state keys of the finished run
+    await pipeline_sessions.compact(USER_ID, session_id)
                 
 
 async def run_action_table_agent(order_id: int):
     """
     Run the action table agent in a loop until user presses Enter or types 'quit'.
     """
+    # One session per order, so follow-ups continue the same conversation (across restarts with SESSION_BACKEND=sqlite)
+    session_id = f"action_{order_id}"
+    session = await action_sessions.get_or_create(USER_ID, session_id)
+    print(f"[Session ready] App='{APP_NAME}', User='{USER_ID}', Session='{session_id}'")
+
     while True:
         print("If you want to query or update a record, enter your query. Otherwise, press Enter to exit.")
         user_query = input(f"Enter query/update for order_id {order_id} (or press Enter to return): ").strip()
@@ -76,17 +82,10 @@ async def run_action_table_agent(order_id: int):
 
         full_query = f"{user_query} order_id: {order_id}"
 
-        session = await session_service_action_agent.create_session(
-            app_name=APP_NAME,
-            user_id=USER_ID,
-            session_id=SESSION_ID,
-        )
-        print(f"[Session created] App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}'")
-
         content = types.Content(role='user', parts=[types.Part(text=full_query)])
 
         async for event in query_action_table.run_async(
-            user_id=USER_ID, session_id=SESSION_ID, new_message=content
+            user_id=USER_ID, session_id=session_id, new_message=content
         ):
             print('-' * 15)
             if event.is_final_response() and event.content and event.content.parts:
@@ -97,6 +96,10 @@ async def main():
     """Main function to handle user interaction"""
     print(" Home Depot Delivery Intelligence System")
     print("Enter 'q' to quit the program\n")
+
+    # A failed load is logged and the index starts empty, so every order is routed to the pipeline
+    processed_orders.ensure_loaded()
+    await pipeline_sessions.purge_expired(USER_ID, prefix="session_")
     
     while True:
         # customer_id_choice = input("Customer ID: ").strip()
@@ -107,20 +110,66 @@ async def main():
             print("Exiting the system. Goodbye!")
             break
             
-        if order_id_choice:
-            results = check_order_action(order_id_choice)
-            if results == "No results found":
+        if order_id_choice.isdigit():
+            # Route from the local processed-order index; BigQuery is only queried to show an existing case card
+            if not processed_orders.contains(order_id_choice):
+                # Street View / weather lookups start now and overlap with the LLM stages
+                start_prefetch(order_id_choice)
                 await run_parallel_agent(f"order_id:{order_id_choice}")
             else:
+                check_order_action(order_id_choice)
                 await run_action_table_agent(order_id_choice)
         else:
             print("Invalid option. Please enter an Order ID or 'q' to quit.")
 
 
 
+async def run_batch(args):
+    """Generate case cards for a list of orders without user interaction"""
+    from datetime import date, timedelta
+    from workflow.services.batch_runner import BatchRunner, load_order_ids_for_date, load_order_ids_from_file
+
+    if args.orders_file:
+        order_ids = load_order_ids_from_file(args.orders_file)
+    else:
+        delivery_date = args.date
+        if delivery_date == "tomorrow":
+            delivery_date = (date.today() + timedelta(days=1)).isoformat()
+        order_ids = load_order_ids_for_date(delivery_date)
+
+    # Orders that already have a case card are not regenerated
+    processed_orders.ensure_loaded()
+    skip = [order_id for order_id in order_ids if processed_orders.contains(order_id)]
+
+    batch = BatchRunner(delivery_intelligence_runner, pipeline_sessions, concurrency=args.concurrency, checkpoint_path=args.checkpoint)
+    await batch.run(order_ids, skip=skip)
+
+
+def parse_args():
+    import argparse
+    from workflow.utils.config import BATCH_CONCURRENCY, BATCH_CHECKPOINT_PATH
+
+    parser = argparse.ArgumentParser(description="Home Depot Delivery Intelligence System")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--orders-file", help="Batch mode: file with one order id per line")
+    source.add_argument("--date", help="Batch mode: process every order scheduled on this date (YYYY-MM-DD or 'tomorrow')")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Orders processed at the same time in batch mode")
+    parser.add_argument("--checkpoint", default=BATCH_CHECKPOINT_PATH, help="JSONL file of finished orders, used to resume a batch")
+    source.add_argument("--refresh-history-summary", action="store_true",
+                        help="Create or incrementally refresh HISTORY_SUMMARY_TABLE, then exit")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        asyncio.run(main())
+        if args.refresh_history_summary:
+            from workflow.services.customer_history import refresh_history_summary_table
+            print(f"History summary refreshed for {refresh_history_summary_table()} customers")
+        elif args.orders_file or args.date:
+            asyncio.run(run_batch(args))
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\nProgram interrupted by user. Goodbye!")
     except Exception as e:
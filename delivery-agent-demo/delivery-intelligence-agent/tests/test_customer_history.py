@@ -0,0 +1,52 @@
+import pytest
+
+from workflow.services import customer_history
+from workflow.utils import query_backends
+from workflow.utils.query_engine import query_rows
+
+SUMMARY_TABLE = "history_summary"
+
+
+@pytest.fixture
+def duckdb_backend(tmp_path, monkeypatch):
+    backend = query_backends.DuckDBBackend(database=":memory:", write_dir=str(tmp_path))
+    monkeypatch.setattr(query_backends, "_backend", backend)
+    return backend
+
+
+def _normalized(rows):
+    return sorted((row["section"], str(row["label"]), row["n"], row["detail"]) for row in rows)
+
+
+def test_summary_table_matches_the_direct_history(duckdb_backend, monkeypatch):
+    # Materialize the summary over every delivery of each customer, as the initial refresh does
+    everything = f"history AS (SELECT * FROM {customer_history._table('deliveries')})"
+    duckdb_backend._connection().execute(query_backends.to_duckdb_sql(
+        f"CREATE TABLE {SUMMARY_TABLE} AS SELECT CUSTOMER_ID, section, CAST(label AS VARCHAR) AS label, n, detail "
+        f"FROM ({customer_history._aggregate_sql(everything)}) a"
+    ))
+    # Orders of customers with several deliveries, so later and same-day deliveries must be subtracted
+    order_ids = [row["DATA_ID"] for row in query_rows(f"""
+        SELECT DATA_ID FROM {customer_history._table('deliveries')}
+        WHERE CUSTOMER_ID IN (
+            SELECT CUSTOMER_ID FROM {customer_history._table('deliveries')} GROUP BY CUSTOMER_ID HAVING COUNT(*) >= 3
+        )
+        ORDER BY CUSTOMER_ID, DATA_ID
+        LIMIT 25
+    """)]
+    assert order_ids
+
+    for order_id in order_ids:
+        monkeypatch.setattr(customer_history, "HISTORY_SUMMARY_TABLE", "")
+        direct = customer_history.query_customer_history(order_id)
+        monkeypatch.setattr(customer_history, "HISTORY_SUMMARY_TABLE", SUMMARY_TABLE)
+        summarized = customer_history.query_customer_history(order_id)
+
+        assert _normalized(summarized) == _normalized(direct), order_id
+        assert customer_history.format_customer_history(summarized) == customer_history.format_customer_history(direct)
+
+
+def test_refresh_needs_the_bigquery_backend(duckdb_backend, monkeypatch):
+    monkeypatch.setattr(customer_history, "HISTORY_SUMMARY_TABLE", SUMMARY_TABLE)
+    with pytest.raises(ValueError, match="refreshed in BigQuery"):
+        customer_history.refresh_history_summary_table()
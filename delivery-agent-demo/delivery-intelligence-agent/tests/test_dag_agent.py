@@ -0,0 +1,111 @@
+import asyncio
+from typing import AsyncGenerator, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.sessions import InMemorySessionService
+
+from workflow.agent_workflows.dag_agent import DagAgent, DagStage
+
+
+class FakeAgent(BaseAgent):
+    """Writes `key` after `delay` seconds, optionally after an early event written at `early_after`."""
+
+    key: str
+    delay: float = 0.0
+    early_after: Optional[float] = None
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if self.early_after is not None:
+            await asyncio.sleep(self.early_after)
+            yield Event(author=self.name, actions=EventActions(state_delta={f"{self.key}_early": "queued"}))
+        await asyncio.sleep(self.delay)
+        yield Event(author=self.name, actions=EventActions(state_delta={self.key: f"{self.name} done"}))
+
+
+async def _run(dag: DagAgent, consume_delay: float = 0.0) -> List[Event]:
+    """Drive the DAG like the runner does, applying each state delta; `consume_delay` slows the consumer down."""
+    service = InMemorySessionService()
+    session = await service.create_session(app_name="test", user_id="u")
+    ctx = InvocationContext(session_service=service, invocation_id="inv", agent=dag, session=session)
+    events = []
+    async for event in dag.run_async(ctx):
+        events.append(event)
+        session.state.update(event.actions.state_delta or {})
+        await asyncio.sleep(consume_delay)
+    return events
+
+
+def _deltas(events: List[Event]) -> dict:
+    merged = {}
+    for event in events:
+        merged.update(event.actions.state_delta or {})
+    return merged
+
+
+def test_stage_over_budget_writes_its_fallback_delta():
+    dag = DagAgent("dag", [
+        DagStage(FakeAgent(name="fetch", key="a"), outputs=["a"]),
+        DagStage(FakeAgent(name="slow", key="b", delay=5), reads=["a"], outputs=["b"], budget=0.2,
+                 fallback=lambda state: {"b": f"fallback after {state['a']}"}),
+        DagStage(FakeAgent(name="final", key="c"), reads=["b"], outputs=["c"]),
+    ])
+
+    state = _deltas(asyncio.run(asyncio.wait_for(_run(dag), 3)))
+
+    assert state["b"] == "fallback after fetch done"
+    assert state["c"] == "final done"
+    assert state["pipeline_fallbacks"] == ["slow"]
+
+
+def test_events_queued_by_a_cut_off_stage_are_dropped():
+    # The slow consumer keeps the DAG busy with `fetch`'s events while `slow` queues an event and runs out of budget
+    dag = DagAgent("dag", [
+        DagStage(FakeAgent(name="fetch", key="a", early_after=0.0), outputs=["a"]),
+        DagStage(FakeAgent(name="slow", key="b", early_after=0.05, delay=5), outputs=["b"], budget=0.1,
+                 fallback=lambda state: {"b": "fallback"}),
+    ])
+
+    state = _deltas(asyncio.run(asyncio.wait_for(_run(dag, consume_delay=0.3), 3)))
+
+    assert "b_early" not in state
+    assert state["b"] == "fallback"
+    assert state["pipeline_fallbacks"] == ["slow"]
+
+
+def test_deadline_cuts_a_stage_off_early_enough_for_downstream_budgets():
+    dag = DagAgent("dag", [
+        DagStage(FakeAgent(name="slow", key="a", delay=5), outputs=["a"], budget=10, fallback=lambda state: {"a": "fallback"}),
+        DagStage(FakeAgent(name="final", key="b"), reads=["a"], outputs=["b"], budget=0.7),
+    ], deadline=1.0)
+
+    events = asyncio.run(asyncio.wait_for(_run(dag), 3))
+    timings = events[-1].actions.state_delta["pipeline_stage_timings"]
+
+    assert timings["slow"]["duration"] < 0.5
+    assert _deltas(events)["pipeline_fallbacks"] == ["slow"]
+
+
+def test_stage_timeout_writes_placeholders_for_budgeted_stages_without_fallback():
+    dag = DagAgent("dag", [
+        DagStage(FakeAgent(name="unbudgeted", key="a", delay=0.3), outputs=["a"]),
+        DagStage(FakeAgent(name="llm", key="b", delay=5), reads=["a"], outputs=["b"], budget=0.1),
+    ], stage_timeout=0.2)
+
+    state = _deltas(asyncio.run(asyncio.wait_for(_run(dag), 3)))
+
+    assert state["a"] == "unbudgeted done"
+    assert state["b"] == "llm unavailable: time budget exceeded"
+    assert state["pipeline_fallbacks"] == ["llm"]
+
+
+def test_stages_finishing_in_time_use_no_fallback():
+    dag = DagAgent("dag", [
+        DagStage(FakeAgent(name="fast", key="a"), outputs=["a"], budget=1, fallback=lambda state: {"a": "fallback"}),
+    ], deadline=5, stage_timeout=1)
+
+    state = _deltas(asyncio.run(_run(dag)))
+
+    assert state["a"] == "fast done"
+    assert state["pipeline_fallbacks"] == []
@@ -0,0 +1,37 @@
+import asyncio
+
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+
+from workflow.mcp import delivery_tools
+
+
+class FakeTool:
+    def __init__(self, name: str, seconds: float):
+        self.name = name
+        self.seconds = seconds
+
+    async def run_async(self, *, args, tool_context):
+        await asyncio.sleep(self.seconds)
+        return {"result": f"{self.name} done"}
+
+
+def test_each_call_is_bounded_by_its_own_tool_timeout(monkeypatch):
+    tools = [FakeTool("fetch_order_context", 0.2), FakeTool("street_view_", 0.2), FakeTool("get_weather_forecast", 0.0)]
+
+    async def get_tools(self, readonly_context=None):
+        return tools
+
+    monkeypatch.setattr(MCPToolset, "get_tools", get_tools)
+    monkeypatch.setattr(delivery_tools, "MCP_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(delivery_tools, "MCP_TOOL_TIMEOUTS", {"street_view_": 1})
+    toolset = delivery_tools.PerToolTimeoutToolset(connection_params=delivery_tools._connection_params(1))
+
+    async def run_all():
+        bound = await toolset.get_tools()
+        return await asyncio.gather(*(tool.run_async(args={}, tool_context=None) for tool in bound))
+
+    slow_lookup, street_view, weather = asyncio.run(run_all())
+
+    assert slow_lookup == {"error": "TIMEOUT: fetch_order_context did not respond within 0.05s"}
+    assert street_view == {"result": "street_view_ done"}
+    assert weather == {"result": "get_weather_forecast done"}
@@ -0,0 +1,40 @@
+import asyncio
+
+from workflow.services import prefetch
+from workflow.tools import weather_tool
+from workflow.utils.prefetch_store import PrefetchStore, weather_key
+from workflow.utils.ttl_cache import TTLCache
+
+
+def test_waiters_share_the_event_loop_until_the_prefetch_lands(tmp_path):
+    store = PrefetchStore(str(tmp_path), ttl_seconds=60)
+    store.begin("k")
+
+    async def run():
+        waiters = [asyncio.create_task(store.wait("k", timeout=5)) for _ in range(50)]
+        await asyncio.sleep(0.3)
+        store.put("k", {"value": 1})
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == [{"value": 1}] * 50
+
+
+def test_missing_forecast_is_not_stored(tmp_path, monkeypatch):
+    store = PrefetchStore(str(tmp_path), ttl_seconds=60)
+    requests = []
+
+    def fake_request_forecasts(cells, date):
+        requests.append(cells)
+        return [None] * len(cells)
+
+    monkeypatch.setattr(prefetch, "prefetch_store", store)
+    monkeypatch.setattr(weather_tool, "weather_cache", TTLCache(ttl_seconds=60))
+    monkeypatch.setattr(weather_tool, "_request_forecasts", fake_request_forecasts)
+
+    asyncio.run(prefetch._prefetch_weather("41.83", "-87.73", "2030-01-02"))
+    cache_key = weather_tool.weather_cache_key("41.83", "-87.73", "2030-01-02")
+    assert store.get(weather_key(cache_key)) is None
+    assert cache_key not in weather_tool.weather_cache
+
+    weather_tool.fetch_daily_forecasts([("41.83", "-87.73", "2030-01-02")])
+    assert len(requests) == 2
@@ -0,0 +1,26 @@
+from workflow.services import processed_orders as processed_orders_module
+from workflow.services.processed_orders import ProcessedOrderIndex
+
+
+def test_failed_load_leaves_an_empty_index_backed_by_the_journal(tmp_path, monkeypatch):
+    def failing_query(sql, params=None):
+        raise RuntimeError("Catalog Error: Table with name action_update does not exist")
+
+    monkeypatch.setattr(processed_orders_module, "query_rows", failing_query)
+    index = ProcessedOrderIndex(journal_path=str(tmp_path / "processed.journal"), refresh_seconds=0)
+
+    index.ensure_loaded()
+
+    assert not index.contains(1)
+    index.add(1)
+    assert index.contains(1) and not index.contains(2)
+
+
+def test_load_marks_the_returned_orders(tmp_path, monkeypatch):
+    rows = [{"DATA_ID": 3, "UPDATED_AT": "2025-06-27 10:00:00"}, {"DATA_ID": 9, "UPDATED_AT": "2025-06-27 11:00:00"}]
+    monkeypatch.setattr(processed_orders_module, "query_rows", lambda sql, params=None: rows)
+    index = ProcessedOrderIndex(journal_path=str(tmp_path / "processed.journal"), refresh_seconds=0)
+
+    index.ensure_loaded()
+
+    assert [order_id for order_id in range(12) if index.contains(order_id)] == [3, 9]
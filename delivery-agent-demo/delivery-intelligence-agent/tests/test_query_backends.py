@@ -0,0 +1,31 @@
+import pytest
+
+from workflow.services import prefetch
+from workflow.utils import query_backends
+from workflow.utils.query_engine import query_rows
+
+
+@pytest.fixture
+def duckdb_backend(tmp_path, monkeypatch):
+    """In-memory DuckDB backend over the normalized_tables CSVs, with the blank PROJECT_ID / DATASET_ID of the shipped .env."""
+    backend = query_backends.DuckDBBackend(database=":memory:", write_dir=str(tmp_path))
+    monkeypatch.setattr(query_backends, "_backend", backend)
+    for module in (query_backends, prefetch):
+        monkeypatch.setattr(module, "PROJECT_ID", "")
+        monkeypatch.setattr(module, "DATASET_ID", "")
+    return backend
+
+
+def test_table_refs_with_empty_project_and_dataset():
+    assert query_backends.to_duckdb_sql("SELECT * FROM `..deliveries` d JOIN `p.d.addresses` a ON TRUE") == (
+        "SELECT * FROM deliveries d JOIN addresses a ON TRUE"
+    )
+
+
+def test_query_rows_with_empty_project_and_dataset(duckdb_backend):
+    rows = query_rows("SELECT DATA_ID FROM `..deliveries` WHERE DATA_ID = @order_id", {"order_id": 1})
+    assert rows == [{"DATA_ID": 1}]
+
+    # A tool query rendered from the empty settings
+    location = prefetch.lookup_order_location(1)
+    assert location is not None and "SCHEDULED_DELIVERY_DATE" in location
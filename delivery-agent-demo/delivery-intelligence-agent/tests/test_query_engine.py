@@ -0,0 +1,35 @@
+from workflow.tools.order_information_tool import CUSTOMER_COLUMNS, DELIVERY_COLUMNS, format_order_context
+from workflow.tools import order_information_tool
+from workflow.tools.query_action_tool import result_columns
+from workflow.utils.query_engine import serialize_rows
+
+
+def test_single_record_is_key_value_lines_without_nulls():
+    row = {"DATA_ID": 7, "MARKET": "CHICAGO", "CUSTOMER_NOTES_LLM_SUMMARY": None, "EXTRA": "not requested"}
+    assert serialize_rows([row], columns=["DATA_ID", "MARKET", "CUSTOMER_NOTES_LLM_SUMMARY"]) == "DATA_ID: 7\nMARKET: CHICAGO"
+
+
+def test_tables_keep_rows_aligned_and_drop_all_null_columns():
+    rows = [{"A": 1, "B": None, "C": None}, {"A": 2, "B": "x", "C": None}]
+    assert serialize_rows(rows).splitlines() == ["A | B", "-----", "1 | ", "2 | x"]
+
+
+def test_order_context_only_sends_the_tool_columns(monkeypatch):
+    monkeypatch.setattr(order_information_tool, "get_customer_history", lambda order_id: "history")
+    bundle = {
+        "order_id": 1,
+        "customer": {"CUSTOMER_ID": 2, "CUSTOMER_NAME": "C", "INTERNAL": "x"},
+        "delivery": {"DATA_ID": 1, "MARKET": "CHICAGO", "STRT_VW_IMG_DSCRPTN": "long stored description", "CUSTOMER_NOTES": "raw notes"},
+        "items": [{"PRODUCT_ID": 3, "PRODUCT_DESCRIPTION": "Batt", "PRICE": 9}],
+    }
+
+    text = format_order_context(bundle)
+
+    assert "CUSTOMER_NAME: C" in text and "DATA_ID: 1" in text and "PRODUCT_DESCRIPTION: Batt" in text
+    for omitted in ("INTERNAL", "STRT_VW_IMG_DSCRPTN", "CUSTOMER_NOTES:", "PRICE"):
+        assert omitted not in text
+    assert "STRT_VW_IMG_DSCRPTN" not in DELIVERY_COLUMNS and "CUSTOMER_ID" in CUSTOMER_COLUMNS
+
+
+def test_action_query_results_leave_out_the_summary():
+    assert result_columns(["DATA_ID", "MESSAGE", "SUMMARY", "n"]) == ["DATA_ID", "MESSAGE", "n"]
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+AGENT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FIXTURES = os.path.join(AGENT_ROOT, "benchmarks", "replay_fixtures")
+
+
+def test_replay_benchmark_answers_every_request_from_fixtures():
+    env = dict(os.environ)
+    for name, value in {"PROJECT_ID": "replay", "DATASET_ID": "replay", "LOCATION": "US",
+                        "GOOGLE_API_KEY": "replay", "OPENAI_API_KEY": "replay"}.items():
+        env.setdefault(name, value)
+    # The stdio tool server is started as `python`, which must be this interpreter
+    env["PATH"] = os.path.dirname(sys.executable) + os.pathsep + env.get("PATH", "")
+
+    completed = subprocess.run(
+        [sys.executable, "benchmarks/replay_benchmark.py", "--fixtures", FIXTURES, "--orders", "2", "--concurrency", "2"],
+        cwd=AGENT_ROOT, env=env, capture_output=True, text=True, timeout=300,
+    )
+
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    assert "Batch finished: 2 ok, 0 failed" in completed.stdout
+    assert "Replay misses: 0 model responses" in completed.stdout
@@ -0,0 +1,140 @@
+import importlib.util
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from workflow.services import route_analysis
+from workflow.utils.ttl_cache import TTLCache
+
+ORIGIN = "41.800000,-87.700000"
+STUB_PATH = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "maps_stub_server.py")
+
+
+def _load_stub():
+    spec = importlib.util.spec_from_file_location("maps_stub_server", STUB_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def maps(monkeypatch):
+    """benchmarks/maps_stub_server.py on a free port, with MAPS_API_BASE_URL pointed at it; yields the requests it got."""
+    stub = _load_stub()
+    received = []
+
+    class RecordingHandler(stub.MapsStubHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {name: values[0] for name, values in parse_qs(url.query).items()}
+            received.append((url.path, params))
+            if params.get("key") == "denied":
+                data = json.dumps({"status": "REQUEST_DENIED", "error_message": "The provided API key is invalid."}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            super().do_GET()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(route_analysis, "MAPS_API_BASE_URL", f"http://127.0.0.1:{server.server_port}/maps/api")
+    monkeypatch.setattr(route_analysis, "GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(route_analysis, "leg_cache", TTLCache(ttl_seconds=3600))
+    monkeypatch.setattr(route_analysis, "restriction_cache", TTLCache(ttl_seconds=3600))
+    yield received
+    server.shutdown()
+    server.server_close()
+
+
+def _stop(i: int) -> str:
+    # Far enough apart to land in distinct grid cells
+    return f"{41.9 + i * 0.01:.6f},-87.600000"
+
+
+def test_fetch_legs_batches_by_hour_and_destination_limit(maps):
+    tomorrow = (datetime.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    morning, noon = tomorrow.replace(hour=8), tomorrow.replace(hour=12)
+    stops = [(_stop(i), morning.replace(minute=i % 60)) for i in range(30)] + [(_stop(i), noon) for i in range(3)]
+
+    legs = route_analysis.fetch_legs(ORIGIN, stops)
+
+    assert len(legs) == 33 and all(leg["status"] == "OK" for leg in legs)
+    assert {path for path, _ in maps} == {"/maps/api/distancematrix/json"}
+    assert all(params["key"] == "test-key" and params["origins"] == ORIGIN for _, params in maps)
+    sizes = sorted(len(params["destinations"].split("|")) for _, params in maps)
+    assert sizes == [3, 5, 25]
+    # Each hour group asks for its earliest planned departure
+    assert {params["departure_time"] for _, params in maps} == {str(int(morning.timestamp())), str(int(noon.timestamp()))}
+
+
+def test_fetch_legs_reuses_cached_and_same_cell_legs(maps):
+    departure = datetime.now() + timedelta(days=1)
+    route_analysis.fetch_legs(ORIGIN, [(_stop(0), departure), (_stop(1), departure)])
+    assert len(maps) == 1
+
+    nearby = "41.900100,-87.600100"  # same grid cell as _stop(0)
+    legs = route_analysis.fetch_legs(ORIGIN, [(_stop(0), departure), (nearby, departure), (_stop(1), departure)])
+    assert len(maps) == 1
+    assert legs[0] == legs[1]
+
+
+def test_past_departure_requests_now_and_reports_planned_time(maps, monkeypatch):
+    monkeypatch.setitem(route_analysis.FLOC_LOCATIONS, "5928", ORIGIN)
+    delivery = {
+        "FLOC": 5928, "SCHEDULED_DELIVERY_DATE": "2025-06-27", "WINDOW_START": "06:00:00",
+        "STREET_VIEW_URL": "https://maps?viewpoint=41.83,-87.73",
+    }
+
+    result = route_analysis.analyze_delivery_route(delivery)
+
+    assert [path for path, _ in maps] == ["/maps/api/distancematrix/json", "/maps/api/directions/json"]
+    assert [params["departure_time"] for _, params in maps] == ["now", "now"]
+    assert result["departure"] == "2025-06-27 06:00"
+    assert result["status"] == "OK" and result["route_found"]
+
+
+def test_unresolvable_destination_is_flagged_no_route(maps):
+    leg = route_analysis.fetch_legs(ORIGIN, [("nowhere in particular", None)])[0]
+    assert leg == {"status": "NOT_FOUND"}
+    assert route_analysis.route_flags(leg) == ["no_route (NOT_FOUND)"]
+    assert maps[0][1]["departure_time"] == "now"
+
+
+def test_maps_error_status_raises_and_is_not_cached(maps, monkeypatch):
+    monkeypatch.setattr(route_analysis, "GOOGLE_API_KEY", "denied")
+    with pytest.raises(RuntimeError, match="REQUEST_DENIED The provided API key is invalid."):
+        route_analysis.fetch_legs(ORIGIN, [(_stop(0), None)])
+    assert len(route_analysis.leg_cache) == 0
+
+
+def test_route_flags():
+    assert route_analysis.route_flags({"status": "ZERO_RESULTS"}) == ["no_route (ZERO_RESULTS)"]
+    assert route_analysis.route_flags({"status": "OK", "delay_min": route_analysis.ROUTE_DELAY_THRESHOLD_MINUTES}) == ["traffic_delay"]
+    assert route_analysis.route_flags({"status": "OK", "delay_min": 0.0}) == []
+
+
+def test_format_route_risk(maps):
+    departure = datetime(2030, 1, 2, 9, 30)
+    leg = route_analysis.fetch_legs(ORIGIN, [(_stop(0), departure)])[0]
+    restrictions = route_analysis.check_route_restrictions(ORIGIN, _stop(0), departure)
+    flags = route_analysis.route_flags(leg) + ["restricted_road"]
+
+    text = route_analysis.format_route_risk({"departure": "2030-01-02 09:30", **leg, **restrictions, "flags": flags})
+
+    assert text.splitlines() == [
+        "DEPARTURE: 2030-01-02 09:30",
+        f"DISTANCE_KM: {leg['distance_km']}",
+        f"DRIVE_MIN: {leg['duration_min']} (in traffic {leg['traffic_duration_min']})",
+        f"TRAFFIC_DELAY_MIN: {leg['delay_min']}",
+        f"RESTRICTED_ROAD: {restrictions['restricted_road_found']}",
+        "ADDRESS_MATCH_RISK: False",
+        f"ROUTE_FLAGS: {', '.join(flags)}",
+    ]
+    assert route_analysis.format_route_risk({"status": "NOT_FOUND", "flags": ["no_route (NOT_FOUND)"]}).splitlines()[0] == "ROUTE_STATUS: NOT_FOUND"
@@ -0,0 +1,48 @@
+import base64
+import os
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from workflow.services import street_image_analysis
+
+
+def _jpeg(size: int) -> bytes:
+    buffered = BytesIO()
+    Image.effect_noise((size, size), 64).convert("RGB").save(buffered, format="JPEG", quality=95)
+    return buffered.getvalue()
+
+
+def _decode(data_url: str) -> bytes:
+    prefix = "data:image/jpeg;base64,"
+    assert data_url.startswith(prefix)
+    return base64.b64decode(data_url[len(prefix):])
+
+
+def test_image_within_budget_is_sent_as_downloaded():
+    image = _jpeg(64)
+    assert _decode(street_image_analysis.image_data_url(image, max_bytes=len(image))) == image
+
+
+def test_image_over_budget_is_downscaled_once():
+    image = _jpeg(640)
+    budget = len(image) // 4
+    fitted = _decode(street_image_analysis.image_data_url(image, max_bytes=budget))
+    assert len(fitted) <= budget
+    assert Image.open(BytesIO(fitted)).width < 640
+
+
+def test_artifacts_are_stored_per_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(street_image_analysis, "STREETVIEW_ARTIFACT_DIR", str(tmp_path))
+    image = _jpeg(32)
+
+    first = street_image_analysis.save_image_artifact(image, "101")
+    second = street_image_analysis.save_image_artifact(image, "102")
+
+    assert os.path.dirname(first) == str(tmp_path / "101")
+    assert os.path.dirname(second) == str(tmp_path / "102")
+    with open(first, "rb") as f:
+        assert f.read() == image
+    with pytest.raises(ValueError):
+        street_image_analysis.save_image_artifact(image, "../102")
@@ -0,0 +1,294 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from loguru import logger
+from pydantic import Field
+
+
+@dataclass
+class DagStage:
+    """
+    A pipeline stage: the agent to run, the state keys it reads and the keys it writes.
+
+    `budget` is the stage's time allowance in seconds. A stage with a `fallback`
+    (session state -> state delta for its outputs) is cancelled when the budget
+    or the pipeline deadline runs out and the fallback's delta is written
+    instead. For other stages the budget reserves time in the deadline, and the
+    DagAgent's `stage_timeout` is their hard limit, after which each output key
+    gets a "<stage> unavailable" placeholder. Stages without a budget always run
+    to completion.
+    """
+    agent: BaseAgent
+    reads: List[str] = field(default_factory=list)
+    outputs: Optional[List[str]] = None
+    budget: Optional[float] = None
+    fallback: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+
+    @property
+    def name(self) -> str:
+        return self.agent.name
+
+    @property
+    def output_keys(self) -> List[str]:
+        if self.outputs is not None:
+            return self.outputs
+        output_key = getattr(self.agent, "output_key", None)
+        return [output_key] if output_key else []
+
+
+@dataclass
+class StageTiming:
+    stage: str
+    start: float
+    end: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+_STAGE_DONE = object()
+
+
+class DagAgent(BaseAgent):
+    """
+    Runs stages as a dependency graph instead of a fixed sequence.
+
+    Each stage starts as soon as every state key it reads has been written by
+    the stage producing it, so independent branches run concurrently. Keys that
+    no stage produces are treated as already available.
+
+    With a `deadline` (seconds from the start of the run), a stage that has a
+    fallback must also finish early enough for the budgets of the stages
+    downstream of it to fit before the deadline; whichever limit comes first
+    cuts it off. A budgeted stage without a fallback is cut off after
+    `stage_timeout` seconds. Cancelling a stage mid tool call leaves the shared
+    MCP session usable: the server finishes the abandoned call and its late
+    response is dropped. At the end of the run the stage timings, the critical path and
+    the stages that fell back are written to session state
+    (`pipeline_stage_timings`, `pipeline_critical_path`, `pipeline_fallbacks`).
+    """
+
+    stages: List[DagStage] = Field(default_factory=list)
+    deadline: Optional[float] = None
+    stage_timeout: Optional[float] = None
+
+    def __init__(self, name: str, stages: List[DagStage], description: str = "", deadline: Optional[float] = None,
+                 stage_timeout: Optional[float] = None):
+        super().__init__(
+            name=name,
+            description=description,
+            sub_agents=[stage.agent for stage in stages],
+            stages=stages,
+            deadline=deadline,
+            stage_timeout=stage_timeout,
+        )
+        self._validate_stages()
+
+    def _validate_stages(self) -> None:
+        producers = self._producers()
+        visiting, done = set(), set()
+
+        def visit(stage: DagStage) -> None:
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Cycle detected in DAG at stage '{stage.name}'")
+            visiting.add(stage.name)
+            for key in stage.reads:
+                if key in producers:
+                    visit(producers[key])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+
+        for stage in self.stages:
+            visit(stage)
+
+    def _producers(self) -> Dict[str, DagStage]:
+        producers = {}
+        for stage in self.stages:
+            for key in stage.output_keys:
+                if key in producers:
+                    raise ValueError(f"State key '{key}' is written by both '{producers[key].name}' and '{stage.name}'")
+                producers[key] = stage
+        return producers
+
+    def _downstream_reserve(self) -> Dict[str, float]:
+        """Seconds each stage must leave before the deadline: the largest sum of budgets along a path of its consumers."""
+        consumers: Dict[str, List[DagStage]] = {stage.name: [] for stage in self.stages}
+        producers = self._producers()
+        for stage in self.stages:
+            for key in stage.reads:
+                if key in producers and stage not in consumers[producers[key].name]:
+                    consumers[producers[key].name].append(stage)
+
+        reserve: Dict[str, float] = {}
+
+        def visit(stage: DagStage) -> float:
+            if stage.name not in reserve:
+                reserve[stage.name] = max(
+                    ((consumer.budget or 0.0) + visit(consumer) for consumer in consumers[stage.name]), default=0.0
+                )
+            return reserve[stage.name]
+
+        for stage in self.stages:
+            visit(stage)
+        return reserve
+
+    def _cutoff(self, stage: DagStage, start: float, reserve: Dict[str, float]) -> Optional[float]:
+        """Run time at which a stage is cut off (None: it runs to completion)."""
+        if stage.fallback is None:
+            if stage.budget is None or self.stage_timeout is None:
+                return None
+            return start + self.stage_timeout
+        limits = []
+        if stage.budget is not None:
+            limits.append(start + stage.budget)
+        if self.deadline is not None:
+            limits.append(self.deadline - reserve[stage.name])
+        return min(limits) if limits else None
+
+    @staticmethod
+    def _fallback_delta(stage: DagStage, state: Dict[str, Any]) -> Dict[str, Any]:
+        """State delta written for a stage that was cut off."""
+        if stage.fallback is not None:
+            return stage.fallback(state)
+        return {key: f"{stage.name} unavailable: time budget exceeded" for key in stage.output_keys}
+
+    def _branch_ctx(self, ctx: InvocationContext, stage: DagStage) -> InvocationContext:
+        branch_ctx = ctx.model_copy()
+        suffix = f"{self.name}.{stage.name}"
+        branch_ctx.branch = f"{ctx.branch}.{suffix}" if ctx.branch else suffix
+        return branch_ctx
+
+    async def _run_stage(self, ctx: InvocationContext, stage: DagStage, queue: asyncio.Queue) -> None:
+        try:
+            async for event in stage.agent.run_async(self._branch_ctx(ctx, stage)):
+                processed = asyncio.Event()
+                await queue.put((stage, event, processed))
+                # Wait until the runner has appended the event before the stage continues,
+                # so its next model call sees its own function calls and responses.
+                await processed.wait()
+        except Exception as e:
+            await queue.put((stage, e, None))
+            return
+        await queue.put((stage, _STAGE_DONE, None))
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        producers = self._producers()
+        pending = list(self.stages)
+        running: Dict[str, asyncio.Task] = {}
+        finished: set = set()
+        timings: Dict[str, StageTiming] = {}
+        cutoffs: Dict[str, float] = {}
+        fallbacks: List[str] = []
+        queue: asyncio.Queue = asyncio.Queue()
+        reserve = self._downstream_reserve()
+        run_start = time.monotonic()
+
+        def is_ready(stage: DagStage) -> bool:
+            return all(key not in producers or producers[key].name in finished for key in stage.reads)
+
+        try:
+            while pending or running:
+                for stage in [s for s in pending if is_ready(s)]:
+                    pending.remove(stage)
+                    timings[stage.name] = StageTiming(stage.name, time.monotonic() - run_start)
+                    cutoff = self._cutoff(stage, timings[stage.name].start, reserve)
+                    if cutoff is not None:
+                        cutoffs[stage.name] = cutoff
+                    running[stage.name] = asyncio.create_task(self._run_stage(ctx, stage, queue))
+
+                if not running:
+                    raise RuntimeError(f"DAG stages can never start: {[s.name for s in pending]}")
+
+                now = time.monotonic() - run_start
+                expired = [name for name in running if name in cutoffs and cutoffs[name] <= now]
+                for name in expired:
+                    running.pop(name).cancel()
+                    timings[name].end = now
+                    finished.add(name)
+                    fallbacks.append(name)
+                    stage = next(s for s in self.stages if s.name == name)
+                    logger.warning(f"{name} ran out of its time budget after {timings[name].duration:.1f}s, using its fallback")
+                    state_delta = await asyncio.to_thread(self._fallback_delta, stage, dict(ctx.session.state))
+                    yield Event(
+                        author=name,
+                        invocation_id=ctx.invocation_id,
+                        branch=self._branch_ctx(ctx, stage).branch,
+                        content=types.Content(role="model", parts=[types.Part(text=f"{name} exceeded its time budget; fallback used")]),
+                        actions=EventActions(state_delta=state_delta),
+                    )
+                if expired:
+                    continue
+
+                timeout = min((cutoffs[name] for name in running if name in cutoffs), default=None)
+                try:
+                    stage, item, processed = await asyncio.wait_for(
+                        queue.get(), None if timeout is None else max(timeout - now, 0.001)
+                    )
+                except asyncio.TimeoutError:
+                    continue
+                if stage.name in fallbacks:
+                    # Left in the queue by a stage that was cut off
+                    if processed is not None:
+                        processed.set()
+                    continue
+                if item is _STAGE_DONE:
+                    timings[stage.name].end = time.monotonic() - run_start
+                    running.pop(stage.name)
+                    finished.add(stage.name)
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+
+                yield item
+                processed.set()
+        finally:
+            for task in running.values():
+                task.cancel()
+
+        critical_path = self._critical_path(timings, producers)
+        total = max((t.end for t in timings.values()), default=0.0)
+        report = " -> ".join(f"{t.stage} ({t.duration:.2f}s)" for t in critical_path)
+        if fallbacks:
+            report += f". Fallbacks used: {', '.join(fallbacks)}"
+        logger.info(f"{self.name} finished in {total:.2f}s, critical path: {report}")
+        if self.deadline is not None and total > self.deadline:
+            logger.warning(f"{self.name} missed its {self.deadline:.0f}s deadline ({total:.2f}s)")
+
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=f"Pipeline finished in {total:.2f}s. Critical path: {report}")]),
+            actions=EventActions(state_delta={
+                "pipeline_stage_timings": {
+                    t.stage: {"start": round(t.start, 3), "end": round(t.end, 3), "duration": round(t.duration, 3)}
+                    for t in timings.values()
+                },
+                "pipeline_critical_path": [t.stage for t in critical_path],
+                "pipeline_fallbacks": fallbacks,
+            }),
+        )
+
+    def _critical_path(self, timings: Dict[str, StageTiming], producers: Dict[str, DagStage]) -> List[StageTiming]:
+        """Walk back from the last stage to finish through the latest-finishing dependency of each stage."""
+        if not timings:
+            return []
+        stages = {stage.name: stage for stage in self.stages}
+        current = max(timings.values(), key=lambda t: t.end)
+        path = [current]
+        while True:
+            deps = {producers[key].name for key in stages[current.stage].reads if key in producers}
+            if not deps:
+                break
+            current = max((timings[name] for name in deps), key=lambda t: t.end)
+            path.append(current)
+        return list(reversed(path))
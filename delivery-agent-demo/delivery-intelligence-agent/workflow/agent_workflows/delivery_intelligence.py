@@ -1,8 +1,8 @@
-#parallel agents
-from workflow.agents.customer_information import customer_info_agent
-from workflow.agents.customer_history import customer_history_agent
-from workflow.agents.order_information import order_info_agent
-#sequential agents
+#data fetch stage (deterministic, replaces the parallel research LLM agents)
+from workflow.agents.order_data_fetch import order_data_fetch_agent
+from workflow.agents.context_digest import context_digest_agent
+from workflow.agents.route_risk import route_risk_agent
+#analysis agents
 from workflow.agents.weather import weather_agent
 from workflow.agents.street_view import streetview_agent
 from workflow.agents.risk import risk_analyzer_agent
@@ -12,35 +12,60 @@ from workflow.agents.action import action_agent
 
 
 
-from google.adk.agents.parallel_agent import ParallelAgent
-from google.adk.agents.sequential_agent import SequentialAgent
-# Parallel Research Agent
-parallel_research_agent = ParallelAgent(
-    name="CustomerDeliveryResearchAgent",
-    sub_agents=[customer_info_agent, customer_history_agent,order_info_agent],
-    description="Fetches customer data and past delivery history in parallel."
+from workflow.agent_workflows.dag_agent import DagAgent, DagStage
+from workflow.services.stage_fallbacks import route_risk_fallback, streetview_fallback, weather_fallback
+from workflow.utils.config import (
+    PIPELINE_METRICS_PATH, LLM_CACHE_ENABLED, PIPELINE_DEADLINE_SECONDS, PIPELINE_STAGE_BUDGETS,
+    PIPELINE_STAGE_TIMEOUT_SECONDS,
 )
+from workflow.utils.llm_cache import LlmResponseCache
+from workflow.utils.instrumentation import PipelineInstrumentation
 
-# Sequential Pipeline Agent
-sequential_pipeline_agent = SequentialAgent(
+# Dependency-aware pipeline: each stage starts as soon as the state keys it reads are written.
+# Street view, weather and route stages fall back to stored data when their time budget runs out;
+# the other budgeted stages are cut off after PIPELINE_STAGE_TIMEOUT_SECONDS.
+delivery_pipeline_agent = DagAgent(
     name="DeliveryIntelligencePipeline",
-    sub_agents=[parallel_research_agent,
-                weather_agent,
-                streetview_agent,
-                risk_analyzer_agent,
-                email_agent,
-                case_card_agent,
-                action_agent],
-    
-    description="Fetches all customer delivery context and synthesizes a risk-focused case card and performs actions."
+    stages=[
+        DagStage(order_data_fetch_agent, reads=[], outputs=["order_id", "raw_context_tokens"]),
+        DagStage(context_digest_agent, reads=["order_id", "raw_context_tokens"],
+                 outputs=["order_context_digest", "order_context_digest_tokens"]),
+        DagStage(route_risk_agent, reads=["order_id"], outputs=["route_risk_result"],
+                 budget=PIPELINE_STAGE_BUDGETS.get(route_risk_agent.name), fallback=route_risk_fallback),
+        DagStage(weather_agent, reads=["order_context_digest"],
+                 budget=PIPELINE_STAGE_BUDGETS.get(weather_agent.name), fallback=weather_fallback),
+        DagStage(streetview_agent, reads=["order_context_digest"],
+                 budget=PIPELINE_STAGE_BUDGETS.get(streetview_agent.name), fallback=streetview_fallback),
+        DagStage(risk_analyzer_agent, reads=["weather_info_result", "order_context_digest", "streetview_info_result", "route_risk_result"],
+                 budget=PIPELINE_STAGE_BUDGETS.get(risk_analyzer_agent.name)),
+        DagStage(email_agent, reads=["risk_analysis", "order_context_digest"],
+                 budget=PIPELINE_STAGE_BUDGETS.get(email_agent.name)),
+        DagStage(case_card_agent, reads=["order_context_digest", "weather_info_result", "risk_analysis", "email_for_customer"],
+                 budget=PIPELINE_STAGE_BUDGETS.get(case_card_agent.name)),
+        DagStage(action_agent, reads=["case_card_summary"],
+                 budget=PIPELINE_STAGE_BUDGETS.get(action_agent.name)),
+    ],
+    description="Fetches all customer delivery context and synthesizes a risk-focused case card and performs actions.",
+    deadline=PIPELINE_DEADLINE_SECONDS or None,
+    stage_timeout=PIPELINE_STAGE_TIMEOUT_SECONDS or None,
 )
 
-delivery_intelligence_agent = sequential_pipeline_agent
+if LLM_CACHE_ENABLED:
+    llm_response_cache = LlmResponseCache()
+    llm_response_cache.install(delivery_pipeline_agent)
+
+# Installed last with first=True, so metrics see every callback before the cache can short-circuit
+if PIPELINE_METRICS_PATH:
+    pipeline_instrumentation = PipelineInstrumentation(PIPELINE_METRICS_PATH)
+    pipeline_instrumentation.instrument(delivery_pipeline_agent)
+
+delivery_intelligence_agent = delivery_pipeline_agent
 
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from workflow.services.session_manager import SessionManager, create_session_service
 from workflow.utils.config import APP_NAME
-session_service = InMemorySessionService()
+session_service = create_session_service()
+pipeline_sessions = SessionManager(session_service)
 
 delivery_intelligence_runner = Runner(
     agent=delivery_intelligence_agent,
@@ -1,10 +1,12 @@
 from workflow.agents.query_action_table import action_table_sql_agent
 
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from workflow.services.session_manager import SessionManager, create_session_service
 from workflow.utils.config import APP_NAME
 
-session_service_action_agent = InMemorySessionService()
+session_service_action_agent = create_session_service()
+# Follow-up chats keep their history, so action sessions are reused but not compacted
+action_sessions = SessionManager(session_service_action_agent, keep_state_keys=[])
 
 query_action_table = Runner(
     agent=action_table_sql_agent,
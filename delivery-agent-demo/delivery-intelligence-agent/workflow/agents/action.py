@@ -19,6 +19,9 @@ Use the function `action_update_database(order_id, customer_id, customer_name, m
 
 Make sure the function is called after generating the message.
 
+The row is written in the background, so report the status the function returns as is
+(QUEUED, ALREADY_WRITTEN or ERROR); do not say the record was saved.
+
 """,
     tools=[delivery_tools],
     description="Update action database",
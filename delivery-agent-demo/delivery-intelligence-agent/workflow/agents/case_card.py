@@ -10,14 +10,8 @@ case_card_agent = LlmAgent(
   instruction = """
 You are a Delivery Intelligence Agent synthesizing customer context to generate a case card. Use only the following summaries:
 
-* Customer Metadata:
-{customer_info_result}
-
-* Order Details:
-{order_information_result}
-
-* Delivery History:
-{customer_history_result}
+* Order Context Digest (customer metadata, order details, site, notes and delivery history):
+{order_context_digest}
 
 * Weather Conditions on location:
 {weather_info_result}
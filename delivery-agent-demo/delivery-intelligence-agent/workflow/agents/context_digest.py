@@ -0,0 +1,140 @@
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from loguru import logger
+
+from workflow.services.vehicle_capacity import evaluate_deliveries, format_capacity
+from workflow.tools.order_information_tool import get_customer_history, get_order_context
+from workflow.utils.instrumentation import timed_tool_call
+from workflow.utils.query_engine import estimate_tokens
+
+MAX_ITEMS = 15
+MAX_TEXT_CHARS = 300
+
+
+def _value(row: Optional[Dict[str, Any]], key: str) -> Any:
+    value = (row or {}).get(key)
+    if value is None or value == "":
+        return None
+    text = " ".join(str(value).split())
+    return text[:MAX_TEXT_CHARS] + "..." if len(text) > MAX_TEXT_CHARS else text
+
+
+def _number(row: Optional[Dict[str, Any]], key: str) -> float:
+    try:
+        return float((row or {}).get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _flag(row: Optional[Dict[str, Any]], key: str) -> bool:
+    return str((row or {}).get(key)).strip().lower() in ("true", "1", "y", "yes")
+
+
+def build_order_digest(bundle: Dict[str, Any], history: str) -> str:
+    """Compact, structured per-order context: key fields, flags, load numbers and the capacity check."""
+    customer, delivery, items = bundle["customer"], bundle["delivery"], bundle["items"]
+    if not delivery:
+        return f"DATA_ID: {bundle['order_id']}\nNo delivery record found"
+
+    lines: List[str] = [f"DATA_ID: {bundle['order_id']}"]
+
+    def add(label: str, value: Any) -> None:
+        if value is not None and value != "":
+            lines.append(f"{label}: {value}")
+
+    lines.append("[Customer]")
+    add("CUSTOMER_ID", _value(customer, "CUSTOMER_ID"))
+    add("CUSTOMER_NAME", _value(customer, "CUSTOMER_NAME"))
+    add("PRO_XTRA_MEMBER", _flag(customer, "PRO_XTRA_MEMBER"))
+    add("MANAGED_ACCOUNT", _flag(customer, "MANAGED_ACCOUNT"))
+
+    lines.append("[Delivery]")
+    add("MARKET", _value(delivery, "MARKET"))
+    add("SCHEDULED_DELIVERY_DATE", _value(delivery, "SCHEDULED_DELIVERY_DATE"))
+    add("WINDOW", f"{_value(delivery, 'WINDOW_START')}-{_value(delivery, 'WINDOW_END')}")
+    add("VEHICLE_TYPE", _value(delivery, "VEHICLE_TYPE"))
+    add("SPECIAL_ORDER", _flag(delivery, "SPECIAL_ORDER"))
+    add("CUSTOMER_ORDER_NUMBER", _value(delivery, "CUSTOMER_ORDER_NUMBER"))
+    add("FLOC", _value(delivery, "FLOC"))
+
+    lines.append("[Load]")
+    add("QUANTITY", _number(delivery, "QUANTITY"))
+    add("WEIGHT_LBS", _number(delivery, "WEIGHT"))
+    add("VOLUME_CUBEFT", _number(delivery, "VOLUME_CUBEFT"))
+    add("PALLETS", _number(delivery, "PALLET"))
+
+    lines.append("[Site]")
+    add("DESTINATION_ADDRESS", _value(delivery, "DESTINATION_ADDRESS"))
+    add("COMMERCIAL_ADDRESS", _flag(delivery, "COMMERCIAL_ADDRESS_FLAG"))
+    add("BUSINESS_HOURS", _value(delivery, "BUSINESS_HOURS"))
+    add("STREET_VIEW_URL", (delivery or {}).get("STREET_VIEW_URL"))
+    add("STREET_VIEW_IMAGE_DESCRIPTION", _value(delivery, "STRT_VW_IMG_DSCRPTN"))
+
+    lines.append("[Notes]")
+    add("CUSTOMER_NOTES", _value(delivery, "CUSTOMER_NOTES_LLM_SUMMARY") or _value(delivery, "CUSTOMER_NOTES"))
+    add("HISTORIC_NOTES", _value(delivery, "HISTORIC_NOTES_LLM_SUMMARY"))
+
+    lines.append("[Capacity]")
+    lines.extend(format_capacity(evaluate_deliveries([delivery])[0]))
+
+    lines.append(f"[Items] {len(items)} lines")
+    for item in items[:MAX_ITEMS]:
+        lines.append(f"- {_value(item, 'PRODUCT_DESCRIPTION') or _value(item, 'PRODUCT_ID')}")
+    if len(items) > MAX_ITEMS:
+        lines.append(f"- ... {len(items) - MAX_ITEMS} more")
+
+    lines.append("[History]")
+    lines.append(history)
+    return "\n".join(lines)
+
+
+class ContextDigestAgent(BaseAgent):
+    """
+    Builds `order_context_digest` once per order from the cached order context,
+    so the analysis prompts reference one compact digest instead of
+    re-interpolating the raw fetch outputs.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        order_id = ctx.session.state.get("order_id")
+        if order_id is None:
+            yield Event(
+                author=self.name,
+                invocation_id=ctx.invocation_id,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text="No order_id in state, digest skipped")]),
+                actions=EventActions(state_delta={"order_context_digest": "No order context available"}),
+            )
+            return
+
+        bundle, history = await asyncio.gather(
+            timed_tool_call(ctx, get_order_context, order_id),
+            timed_tool_call(ctx, get_customer_history, order_id),
+        )
+        digest = build_order_digest(bundle, history)
+
+        raw_tokens = ctx.session.state.get("raw_context_tokens", 0)
+        digest_tokens = estimate_tokens(digest)
+        logger.info(f"Order {order_id} context digest: ~{digest_tokens} tokens (raw fetch outputs ~{raw_tokens} tokens)")
+
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=f"Built context digest for order_id: {order_id}")]),
+            actions=EventActions(state_delta={
+                "order_context_digest": digest,
+                "order_context_digest_tokens": {"digest": digest_tokens, "raw": raw_tokens},
+            }),
+        )
+
+
+context_digest_agent = ContextDigestAgent(
+    name="ContextDigestAgent",
+    description="Builds a compact structured digest of the order context for the analysis prompts.",
+)
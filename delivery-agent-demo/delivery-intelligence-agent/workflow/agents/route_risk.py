@@ -0,0 +1,52 @@
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from loguru import logger
+
+from workflow.services.route_analysis import analyze_delivery_route, format_route_risk
+from workflow.tools.order_information_tool import get_order_context
+from workflow.utils.config import ROUTE_ANALYSIS_ENABLED
+
+
+class RouteRiskAgent(BaseAgent):
+    """
+    Writes `route_risk_result`: the FLOC -> stop leg at the delivery window
+    (traffic delay, distance) and restricted-road / address-match flags, computed
+    without a model call so the risk stage only interprets them.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        order_id = ctx.session.state.get("order_id")
+        if not ROUTE_ANALYSIS_ENABLED:
+            result = "Route analysis disabled (ROUTE_ANALYSIS_ENABLED=false)"
+        else:
+            result = await self._analyze(order_id)
+
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=f"Route analysis for order_id: {order_id}")]),
+            actions=EventActions(state_delta={"route_risk_result": result}),
+        )
+
+    @staticmethod
+    async def _analyze(order_id) -> str:
+        try:
+            bundle = await asyncio.to_thread(get_order_context, order_id)
+            if not bundle["delivery"]:
+                raise ValueError(f"no delivery record for order_id {order_id}")
+            return format_route_risk(await asyncio.to_thread(analyze_delivery_route, bundle["delivery"]))
+        except Exception as e:
+            logger.warning(f"Route analysis for order {order_id} unavailable: {e}")
+            return f"Route analysis unavailable: {e}"
+
+
+route_risk_agent = RouteRiskAgent(
+    name="RouteRiskAgent",
+    description="Computes traffic delay and restricted-road flags for the FLOC to delivery leg.",
+)
@@ -1,6 +1,6 @@
 
 from google.adk.agents.llm_agent import LlmAgent
-from workflow.mcp.delivery_tools import delivery_tools
+from workflow.mcp.delivery_tools import delivery_tools_for
 from workflow.utils.config import GEMINI_MODEL 
 
 #Street view analysis
@@ -10,8 +10,11 @@ streetview_agent = LlmAgent(
     instruction="""
     You are a Street View Analysis Agent.
 
-    - Extract the URL from **STREET_VIEW_URL** in `order_information_result`.
-    - Use it with `street_view_(url)` to get the live description.
+    Order context:
+    {order_context_digest}
+
+    - Extract the URL from **STREET_VIEW_URL** in the order context.
+    - Use it with `street_view_(url, order_id)` to get the live description, passing the order's **DATA_ID** as `order_id`.
     - Compare it with **STREET_VIEW_IMAGE_DESCRIPTION**.
     
     **IMPORTANT**: If the street view analysis fails (STATUS: FAILED/TIMEOUT/ERROR), proceed with the existing **STREET_VIEW_IMAGE_DESCRIPTION** from the order data and note:
@@ -26,7 +29,7 @@ streetview_agent = LlmAgent(
     Always start with 'Result for StreetViewAgent Agent'
     """,
     description="Provides StreetView information for delivery locations with fallback handling.",
-    tools=[delivery_tools],
+    tools=delivery_tools_for("street_view_"),
     output_key="streetview_info_result"
 )
 
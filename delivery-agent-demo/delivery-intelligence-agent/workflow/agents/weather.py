@@ -11,7 +11,10 @@ weather_agent = LlmAgent(
 You are a Weather Information Agent responsible for retrieving delivery-relevant weather data.
 
 Your tasks:
-- Extract the **latitude** and **longitude** from the `STREET_VIEW_URL` field in the `order_information_result`.
+Order context:
+{order_context_digest}
+
+- Extract the **latitude** and **longitude** from the `STREET_VIEW_URL` field in the order context.
 - Extract the **delivery date** from the `SCHEDULED_DELIVERY_DATE` field.
 - Use this information to call the `get_weather_forecast(lat, lon, date)` function.
 - Focus on identifying weather conditions that may impact delivery (e.g., heavy rain, strong winds, extreme temperatures).
@@ -1,12 +1,115 @@
+import asyncio
+
+from loguru import logger
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters, StdioConnectionParams
+from google.adk.tools.mcp_tool.mcp_session_manager import StreamableHTTPConnectionParams
+from workflow.utils.config import (
+    MCP_TRANSPORT,
+    MCP_SERVER_URL,
+    MCP_SERVER_ARGS,
+    MCP_TIMEOUT_SECONDS,
+    MCP_TOOL_TIMEOUTS,
+    HTTP_POOL_SIZE,
+)
 
-delivery_tools = MCPToolset(
-    connection_params=StdioConnectionParams(
+
+def _pooled_http_client(headers=None, timeout=None, auth=None):
+    """httpx client for the shared tool server, keeping up to HTTP_POOL_SIZE keep-alive connections."""
+    import httpx
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout or httpx.Timeout(MCP_TIMEOUT_SECONDS),
+        auth=auth,
+        limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+    )
+
+
+def _connection_params(timeout: float):
+    if MCP_TRANSPORT == "http":
+        # One long-lived shared server; `timeout` bounds connecting, `sse_read_timeout` each tool call
+        return StreamableHTTPConnectionParams(
+            url=MCP_SERVER_URL,
+            timeout=MCP_TIMEOUT_SECONDS,
+            sse_read_timeout=timeout,
+            httpx_client_factory=_pooled_http_client,
+        )
+    return StdioConnectionParams(
         server_params=StdioServerParameters(
             command='python',
-            args=["workflow/mcp/tools_server.py"]  # Adjust relative path if needed
+            args=MCP_SERVER_ARGS  # Adjust relative path if needed
         ),
-        timeout=15,
+        timeout=timeout,
     )
-)
 
+
+def tool_timeout(name: str) -> float:
+    """Per-call timeout of a tool: its MCP_TOOL_TIMEOUTS entry, else MCP_TIMEOUT_SECONDS."""
+    return MCP_TOOL_TIMEOUTS.get(name, MCP_TIMEOUT_SECONDS)
+
+
+def _bound_call(tool, timeout: float) -> None:
+    """Give up on a call of `tool` after `timeout` seconds; the session stays usable and the late response is dropped."""
+    run_async = tool.run_async
+
+    async def run_with_timeout(*, args, tool_context):
+        try:
+            return await asyncio.wait_for(run_async(args=args, tool_context=tool_context), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool {tool.name} timed out after {timeout:g}s")
+            return {"error": f"TIMEOUT: {tool.name} did not respond within {timeout:g}s"}
+
+    tool.run_async = run_with_timeout
+
+
+class PerToolTimeoutToolset(MCPToolset):
+    """
+    MCPToolset that bounds each tool call by that tool's own timeout.
+
+    Over stdio one toolset (one server process) serves every tool, and its
+    session timeout has to fit the slowest tool; this keeps cheap lookups at
+    their own, shorter limit.
+    """
+
+    async def get_tools(self, readonly_context=None):
+        tools = await super().get_tools(readonly_context)
+        for tool in tools:
+            _bound_call(tool, tool_timeout(tool.name))
+        return tools
+
+
+def build_delivery_toolset(timeout: float = MCP_TIMEOUT_SECONDS, tool_filter=None) -> MCPToolset:
+    """MCPToolset for the delivery tool server with the given per-call timeout."""
+    return MCPToolset(connection_params=_connection_params(timeout), tool_filter=tool_filter)
+
+
+if MCP_TRANSPORT == "http":
+    # One toolset per tool with its own timeout (see MCP_TOOL_TIMEOUTS); over HTTP these are
+    # only extra connections to the same shared server
+    long_running_tools = {
+        name: build_delivery_toolset(timeout=timeout, tool_filter=[name])
+        for name, timeout in MCP_TOOL_TIMEOUTS.items()
+    }
+    _default_timeout = MCP_TIMEOUT_SECONDS
+else:
+    # Over stdio every toolset spawns its own server process with its own caches, so a single
+    # toolset serves all tools: its session allows the longest configured timeout and each call
+    # is cut off at its own tool's timeout
+    long_running_tools = {}
+    _default_timeout = max([MCP_TIMEOUT_SECONDS, *MCP_TOOL_TIMEOUTS.values()])
+
+
+def _uses_default_timeout(tool, readonly_context=None) -> bool:
+    return tool.name not in long_running_tools
+
+
+# Every tool without its own toolset. main.py and query_action_agent.py reach the server through
+# these module-level toolsets, so both runners share one pool of MCP sessions.
+if MCP_TRANSPORT == "http":
+    delivery_tools = build_delivery_toolset(timeout=_default_timeout, tool_filter=_uses_default_timeout)
+else:
+    delivery_tools = PerToolTimeoutToolset(connection_params=_connection_params(_default_timeout), tool_filter=_uses_default_timeout)
+
+
+def delivery_tools_for(*tool_names: str) -> list:
+    """Toolsets for an agent: the default toolset plus the overridden-timeout toolsets it calls."""
+    return [delivery_tools] + [long_running_tools[name] for name in tool_names if name in long_running_tools]
@@ -27,15 +27,12 @@ os.environ['GRPC_VERBOSITY'] = 'ERROR'
 os.environ['GLOG_minloglevel'] = '3'
 
 
-from mcp.server.fastmcp import FastMCP
 from loguru import logger
-from typing import Any, Dict, List
-from google.cloud import bigquery
-import requests
 
 
 from workflow.tools.order_information_tool import (
     query_data_tool,
+    fetch_order_context,
     fetch_customer_info,
     fetch_delivery_info,
     delivery_item_info,
@@ -43,19 +40,52 @@ from workflow.tools.order_information_tool import (
     
 )
 from workflow.tools.action_update_tool import action_update_database
-from workflow.tools.weather_tool import get_weather_forecast
+from workflow.tools.weather_tool import get_weather_forecast, get_weather_forecast_bulk
 from workflow.tools.streetview_tool import street_view_
 
 from workflow.tools.query_action_tool import query_action_tool
+from workflow.tools.vehicle_capacity_tool import evaluate_vehicle_capacity, evaluate_fleet_capacity
+from workflow.tools.route_tool import analyze_delivery_route_tool, analyze_floc_routes
 
 from workflow.mcp.mcp_server import mcp
 
 
 
 if __name__ == "__main__":
-    print("Starting BigQuery Delivery MCP server...")
+    import argparse
+    import signal
+
+    # Exit through SystemExit on SIGTERM so atexit hooks (e.g. the action_update writer flush) run
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    parser = argparse.ArgumentParser(description="Delivery MCP tool server")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http"], default="stdio",
+                        help="stdio: one server per client process; streamable-http: one long-lived shared server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--record-dir", help="Store every tool result as a replay fixture in this directory")
+    parser.add_argument("--no-writes", action="store_true",
+                        help="With --record-dir: do not write action_update rows (or mark orders processed)")
+    options = parser.parse_args()
+
+    if options.record_dir:
+        from workflow.replay.tool_fixtures import install_tool_fixtures
+        install_tool_fixtures(mcp, options.record_dir, mode="record",
+                              skip_tools=["action_update_database"] if options.no_writes else [])
+
+    # Load the dimension tables while the client connects; the first lookup waits for them
+    import threading
+    from workflow.services.dimension_cache import dimensions
+    threading.Thread(target=dimensions.preload, name="dimension-preload", daemon=True).start()
+
+    if options.transport == "streamable-http":
+        mcp.settings.host = options.host
+        mcp.settings.port = options.port
+        logger.info(f"BigQuery Delivery MCP server listening on http://{options.host}:{options.port}{mcp.settings.streamable_http_path}")
+    else:
+        print("Starting BigQuery Delivery MCP server...")
     logger.info("BigQuery Delivery MCP server ready for queries...")
-    mcp.run(transport="stdio")
+    mcp.run(transport=options.transport)
 
     
 
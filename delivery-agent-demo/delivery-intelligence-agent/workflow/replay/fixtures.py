@@ -0,0 +1,106 @@
+"""
+Fixture files for offline record/replay of the delivery pipeline.
+
+Layout of a fixture directory:
+
+- ``models/``: model responses keyed on the rendered request (see `llm_cache.request_cache_key`)
+- ``tools/``: MCP tool results keyed on tool name and arguments
+- ``context/order_<id>.json``: order context bundle and customer history fetched in-process
+- ``orders.txt``: the recorded order ids
+"""
+import json
+import os
+import re
+from typing import Any, Dict, List
+
+from workflow.utils.disk_cache import DiskCache, content_hash
+
+# Fixtures never expire and are never evicted
+_NO_LIMIT = float("inf")
+
+# Phone numbers in free-text notes, and Street View coordinates (kept to 2 decimals, about 1 km)
+_PHONE = re.compile(r"\b\d{10}\b|\(?\b\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}\b")
+_COORDINATE = re.compile(r"(-?\d+\.\d{2})\d+")
+_NOTE_COLUMNS = ("CUSTOMER_NOTES", "CUSTOMER_NOTES_LLM_SUMMARY", "HISTORIC_NOTES_LLM_SUMMARY", "HISTORIC_NOTES_W_LABELS")
+
+
+def models_dir(directory: str) -> str:
+    return os.path.join(directory, "models")
+
+
+def model_fixtures(directory: str) -> DiskCache:
+    return DiskCache(models_dir(directory), max_bytes=_NO_LIMIT, ttl_seconds=_NO_LIMIT)
+
+
+def tool_fixtures(directory: str) -> DiskCache:
+    return DiskCache(os.path.join(directory, "tools"), max_bytes=_NO_LIMIT, ttl_seconds=_NO_LIMIT)
+
+
+def tool_fixture_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    return content_hash(f"{tool_name}\n{json.dumps(arguments, sort_keys=True, default=str)}")
+
+
+def _context_path(directory: str, order_id: int) -> str:
+    return os.path.join(directory, "context", f"order_{int(order_id)}.json")
+
+
+def save_order_context(directory: str, order_id: int) -> None:
+    """Store the in-process BigQuery results (order bundle, customer history) of an order."""
+    from workflow.tools.order_information_tool import get_customer_history, get_order_context
+
+    path = _context_path(directory, order_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {"bundle": get_order_context(order_id), "history": get_customer_history(order_id)},
+            f,
+            default=str,
+        )
+
+
+def prime_order_context(directory: str, order_id: int) -> None:
+    """Load a recorded order context into the in-process caches, so no BigQuery query is made."""
+    from workflow.tools.order_information_tool import customer_history_cache, order_context_cache
+
+    with open(_context_path(directory, order_id)) as f:
+        context = json.load(f)
+    order_context_cache.set(int(order_id), context["bundle"], ttl_seconds=_NO_LIMIT)
+    customer_history_cache.set(int(order_id), context["history"], ttl_seconds=_NO_LIMIT)
+
+
+def _scrub_text(value: Any) -> Any:
+    return _PHONE.sub("[PHONE]", value) if isinstance(value, str) else value
+
+
+def scrub_order_context(order_id: int) -> None:
+    """
+    Replace the in-process order context of `order_id` with a scrubbed copy:
+    no street address or phone numbers, coarse Street View coordinates. Run it
+    before the pipeline, so prompts, recorded responses and the saved context
+    all see the same scrubbed data.
+    """
+    from workflow.tools.order_information_tool import (
+        customer_history_cache, get_customer_history, get_order_context, order_context_cache,
+    )
+
+    bundle = json.loads(json.dumps(get_order_context(order_id), default=str))
+    delivery = bundle["delivery"]
+    if delivery:
+        delivery["DESTINATION_ADDRESS"] = f"Address {delivery.get('ADDRESS_ID')}"
+        if delivery.get("STREET_VIEW_URL"):
+            delivery["STREET_VIEW_URL"] = _COORDINATE.sub(r"\1", delivery["STREET_VIEW_URL"])
+        for column in _NOTE_COLUMNS:
+            delivery[column] = _scrub_text(delivery.get(column))
+    order_context_cache.set(int(order_id), bundle, ttl_seconds=_NO_LIMIT)
+    customer_history_cache.set(int(order_id), _scrub_text(get_customer_history(order_id)), ttl_seconds=_NO_LIMIT)
+
+
+def save_orders(directory: str, order_ids: List[int]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "orders.txt"), "w") as f:
+        f.write("\n".join(str(order_id) for order_id in order_ids) + "\n")
+
+
+def load_orders(directory: str) -> List[int]:
+    from workflow.services.batch_runner import load_order_ids_from_file
+    return load_order_ids_from_file(os.path.join(directory, "orders.txt"))
@@ -0,0 +1,82 @@
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from loguru import logger
+from pydantic import PrivateAttr
+
+from workflow.replay.fixtures import model_fixtures
+from workflow.utils.callbacks import walk_agents
+from workflow.utils.llm_cache import request_cache_key
+
+
+class ReplayLlm(BaseLlm):
+    """Stub model that answers each request with the response recorded for it."""
+
+    fixtures_dir: str
+    latency_seconds: float = 0.0
+    _store = PrivateAttr(default=None)
+    _misses: int = PrivateAttr(default=0)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r".*"]
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        if self._store is None:
+            self._store = model_fixtures(self.fixtures_dir)
+        key = request_cache_key(llm_request)
+        data = await asyncio.to_thread(self._store.get, key)
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+        if data is None:
+            self._misses += 1
+            logger.warning(f"No recorded model response for request {key[:12]}")
+            yield LlmResponse(error_code="REPLAY_MISS", error_message=f"No recorded response for request {key}")
+            return
+        yield LlmResponse.model_validate_json(data)
+
+
+class CannedLlm(BaseLlm):
+    """
+    Offline stand-in that answers every request with a fixed text derived from
+    the request key, for recording fixtures without model credentials (the
+    replay then exercises orchestration and prompts, not model output).
+    """
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r".*"]
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        text = f"Canned response {request_cache_key(llm_request)[:12]}"
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def _swap_models(root_agent, make_model) -> list:
+    models = {}
+    for agent in walk_agents(root_agent):
+        if isinstance(agent, LlmAgent):
+            name = agent.model if isinstance(agent.model, str) else agent.model.model
+            if name not in models:
+                models[name] = make_model(name)
+            agent.model = models[name]
+    return list(models.values())
+
+
+def use_replay_models(root_agent, fixtures_dir: str, latency_seconds: float = 0.0) -> list:
+    """Point every LlmAgent under `root_agent` at one ReplayLlm per model name."""
+    return _swap_models(root_agent, lambda name: ReplayLlm(model=name, fixtures_dir=fixtures_dir, latency_seconds=latency_seconds))
+
+
+def use_canned_models(root_agent) -> list:
+    """Point every LlmAgent under `root_agent` at one CannedLlm per model name."""
+    return _swap_models(root_agent, lambda name: CannedLlm(model=name))
@@ -0,0 +1,24 @@
+"""
+Stub MCP tool server: exposes the same tools (names and schemas) as
+`workflow/mcp/tools_server.py` but answers every call from recorded fixtures,
+so the pipeline runs without BigQuery, Open-Meteo, Street View or OpenAI.
+
+    MCP_SERVER_ARGS='["workflow/replay/stub_tools_server.py", "--fixtures", "fixtures"]'
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from workflow.mcp.tools_server import mcp
+from workflow.replay.tool_fixtures import install_tool_fixtures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay MCP tool server")
+    parser.add_argument("--fixtures", required=True, help="Fixture directory written by benchmarks/record_fixtures.py")
+    options = parser.parse_args()
+
+    install_tool_fixtures(mcp, options.fixtures, mode="replay")
+    mcp.run(transport="stdio")
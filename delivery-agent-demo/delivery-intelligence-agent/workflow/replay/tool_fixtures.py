@@ -0,0 +1,54 @@
+import functools
+import inspect
+import json
+from typing import Iterable
+
+from loguru import logger
+
+from workflow.replay.fixtures import tool_fixture_key, tool_fixtures
+
+
+def install_tool_fixtures(mcp, directory: str, mode: str, skip_tools: Iterable[str] = ()) -> None:
+    """
+    Wrap every tool registered on the FastMCP server `mcp`.
+
+    mode="record" calls the real tool and stores its result; mode="replay"
+    returns the stored result without calling the tool. Keys are computed from
+    the validated arguments, so both modes see the same values. While
+    recording, tools in `skip_tools` (e.g. the action_update write) are not
+    called and a fixed SKIPPED result is stored instead.
+    """
+    store = tool_fixtures(directory)
+    skip_tools = set(skip_tools)
+
+    def lookup(name, kwargs):
+        data = store.get(tool_fixture_key(name, kwargs))
+        if data is None:
+            logger.warning(f"No recorded result for tool {name} {kwargs}")
+            return f"ERROR: no recorded result for {name}"
+        return json.loads(data)
+
+    def skipped(name):
+        return f"SKIPPED: {name} is not called while recording fixtures"
+
+    def save(name, kwargs, result):
+        store.set(tool_fixture_key(name, kwargs), json.dumps(result, default=str).encode("utf-8"))
+        return result
+
+    for tool in mcp._tool_manager.list_tools():
+        fn, name = tool.fn, tool.name
+        if inspect.iscoroutinefunction(fn):
+            async def wrapper(*, _fn=fn, _name=name, **kwargs):
+                if mode == "replay":
+                    return lookup(_name, kwargs)
+                if _name in skip_tools:
+                    return save(_name, kwargs, skipped(_name))
+                return save(_name, kwargs, await _fn(**kwargs))
+        else:
+            def wrapper(*, _fn=fn, _name=name, **kwargs):
+                if mode == "replay":
+                    return lookup(_name, kwargs)
+                if _name in skip_tools:
+                    return save(_name, kwargs, skipped(_name))
+                return save(_name, kwargs, _fn(**kwargs))
+        tool.fn = functools.wraps(fn)(wrapper)
@@ -0,0 +1,163 @@
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from loguru import logger
+
+from workflow.services.processed_orders import processed_orders
+from workflow.utils.query_backends import get_query_backend
+from workflow.utils.config import (
+    ACTION_WRITE_BATCH_SIZE,
+    ACTION_WRITE_FLUSH_SECONDS,
+    ACTION_WRITE_MAX_ATTEMPTS,
+    ACTION_DEAD_LETTER_PATH,
+)
+
+
+class ActionUpdateWriter:
+    """
+    Write-behind writer for `action_update` rows.
+
+    Rows are queued and flushed from a background thread in batches through the
+    streaming `insert_rows_json` API (plain INSERTs on the local backend), instead of one blocking DML job per order.
+    Writes are idempotent per DATA_ID: a queued row is replaced by a newer one
+    for the same order, DATA_ID is sent as the insert id so BigQuery drops
+    retried duplicates, and an order already in the processed-order index
+    (loaded from `action_update` and its journal, so it survives restarts) is
+    not written again. Failed rows are retried with exponential backoff up to
+    `max_attempts` times and then appended to the dead-letter file, as are rows
+    still failing at shutdown.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        batch_size: int = ACTION_WRITE_BATCH_SIZE,
+        flush_interval: float = ACTION_WRITE_FLUSH_SECONDS,
+        max_attempts: int = ACTION_WRITE_MAX_ATTEMPTS,
+        dead_letter_path: str = ACTION_DEAD_LETTER_PATH,
+    ):
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._attempts: Dict[int, int] = {}
+        self._retry_at: Dict[int, float] = {}
+        self._written: set = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """Queue a row; returns False if this order was already written."""
+        data_id = int(row["DATA_ID"])
+        processed_orders.ensure_loaded()
+        with self._lock:
+            if data_id in self._written or processed_orders.contains(data_id):
+                return False
+            self._pending[data_id] = row
+            # A new row for the order starts with a clean retry budget
+            self._attempts.pop(data_id, None)
+            self._retry_at.pop(data_id, None)
+            pending = len(self._pending)
+            self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="action-update-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _dead_letter(self, failures: List[Tuple[Dict[str, Any], str, int]]) -> None:
+        os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+        with open(self.dead_letter_path, "a") as f:
+            for row, error, attempts in failures:
+                f.write(json.dumps({
+                    "row": row, "error": error, "attempts": attempts, "failed_at": datetime.now().isoformat(),
+                }, default=str) + "\n")
+        logger.error(f"{len(failures)} action_update rows moved to {self.dead_letter_path}")
+
+    def flush(self, final: bool = False) -> int:
+        """
+        Write the pending rows that are due. Failed rows are re-queued with
+        backoff unless a newer row replaced them; rows out of attempts (or any
+        failure when `final`) go to the dead-letter file.
+        """
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                due = [data_id for data_id in self._pending if final or self._retry_at.get(data_id, 0.0) <= now]
+                batch: List[Dict[str, Any]] = [self._pending.pop(data_id) for data_id in due]
+            if not batch:
+                return 0
+
+            written = 0
+            for start in range(0, len(batch), self.batch_size):
+                chunk = batch[start:start + self.batch_size]
+                try:
+                    errors = get_query_backend().insert_rows(
+                        self.table, chunk, row_ids=[str(row["DATA_ID"]) for row in chunk]
+                    )
+                except Exception as e:
+                    logger.error(f"action_update batch insert failed: {e}")
+                    errors = [{"index": i, "errors": [str(e)]} for i in range(len(chunk))]
+
+                failed = {error["index"]: str(error.get("errors")) for error in errors}
+                confirmed, dead = [], []
+                with self._lock:
+                    for index, row in enumerate(chunk):
+                        data_id = int(row["DATA_ID"])
+                        if index not in failed:
+                            self._written.add(data_id)
+                            self._attempts.pop(data_id, None)
+                            self._retry_at.pop(data_id, None)
+                            confirmed.append(data_id)
+                            written += 1
+                            continue
+                        attempts = self._attempts.get(data_id, 0) + 1
+                        if final or attempts >= self.max_attempts:
+                            self._attempts.pop(data_id, None)
+                            self._retry_at.pop(data_id, None)
+                            dead.append((row, failed[index], attempts))
+                        elif data_id not in self._pending:
+                            self._attempts[data_id] = attempts
+                            self._retry_at[data_id] = now + self.flush_interval * 2 ** attempts
+                            self._pending[data_id] = row
+                # Only confirmed inserts mark an order processed, so a crash or failed flush never hides an order
+                for data_id in confirmed:
+                    processed_orders.add(data_id)
+                if failed:
+                    logger.error(f"action_update rows failed: {list(failed.values())}")
+                if dead:
+                    self._dead_letter(dead)
+
+            logger.info(f"Flushed {written} action_update rows")
+            return written
+
+    def close(self) -> None:
+        """Stop the background thread and flush whatever is still queued."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush(final=True)
+
+
+action_writer = ActionUpdateWriter("action_update")
+atexit.register(action_writer.close)
@@ -0,0 +1,131 @@
+"""
+Batch case-card generation: runs the delivery pipeline for many orders with
+bounded concurrency, one session per order, and a JSONL checkpoint so an
+interrupted run resumes where it stopped.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+
+from google.genai import types
+from loguru import logger
+
+from workflow.services.prefetch import start_prefetch
+from workflow.utils.instrumentation import percentile
+from workflow.utils.config import PROJECT_ID, DATASET_ID, BATCH_CONCURRENCY, BATCH_CHECKPOINT_PATH
+
+
+@dataclass
+class OrderResult:
+    order_id: int
+    status: str
+    latency: float
+    finished_at: str
+    error: Optional[str] = None
+
+
+def load_order_ids_from_file(path: str) -> List[int]:
+    """Read order ids from a text file (one per line or comma separated, '#' starts a comment)."""
+    order_ids = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            order_ids.extend(int(token) for token in line.replace(",", " ").split())
+    return order_ids
+
+
+def load_order_ids_for_date(date: str) -> List[int]:
+    """Order ids scheduled for delivery on `date` (YYYY-MM-DD)."""
+    from workflow.utils.query_engine import query_rows
+
+    query = f"""
+    SELECT DATA_ID
+    FROM `{PROJECT_ID}.{DATASET_ID}.deliveries`
+    WHERE CAST(SCHEDULED_DELIVERY_DATE AS STRING) = @date
+    ORDER BY DATA_ID
+    """
+    return [int(row["DATA_ID"]) for row in query_rows(query, {"date": date})]
+
+
+def load_checkpoint(path: str) -> Set[int]:
+    """Order ids that finished successfully in an earlier run."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written last line of an interrupted run
+            if record.get("status") == "ok":
+                done.add(int(record["order_id"]))
+    return done
+
+
+class BatchRunner:
+    """Run the delivery intelligence pipeline for a list of orders."""
+
+    def __init__(self, runner, sessions, concurrency: int = BATCH_CONCURRENCY, checkpoint_path: str = BATCH_CHECKPOINT_PATH):
+        self.runner = runner
+        self.sessions = sessions
+        self.concurrency = concurrency
+        self.checkpoint_path = checkpoint_path
+        self.user_id = f"batch_{uuid.uuid4().hex[:8]}"
+        self._checkpoint_lock = asyncio.Lock()
+
+    async def _run_order(self, order_id: int, semaphore: asyncio.Semaphore) -> OrderResult:
+        async with semaphore:
+            session_id = f"session_{order_id}_{uuid.uuid4().hex[:8]}"
+            start = time.monotonic()
+            start_prefetch(order_id)
+            try:
+                await self.sessions.create(self.user_id, session_id)
+                content = types.Content(role="user", parts=[types.Part(text=f"order_id:{order_id}")])
+                async for _ in self.runner.run_async(user_id=self.user_id, session_id=session_id, new_message=content):
+                    pass
+                await self.sessions.compact(self.user_id, session_id)
+                result = OrderResult(order_id, "ok", time.monotonic() - start, datetime.now().isoformat())
+            except Exception as e:
+                logger.error(f"Order {order_id} failed: {e}")
+                result = OrderResult(order_id, "error", time.monotonic() - start, datetime.now().isoformat(), str(e))
+
+        await self._write_checkpoint(result)
+        logger.info(f"Order {order_id}: {result.status} in {result.latency:.1f}s")
+        return result
+
+    async def _write_checkpoint(self, result: OrderResult) -> None:
+        async with self._checkpoint_lock:
+            os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+            with open(self.checkpoint_path, "a") as f:
+                f.write(json.dumps(asdict(result)) + "\n")
+
+    async def run(self, order_ids: Iterable[int], skip: Iterable[int] = ()) -> List[OrderResult]:
+        """Process every order not already in the checkpoint or in `skip`, then log a throughput report."""
+        done = load_checkpoint(self.checkpoint_path) | set(skip)
+        todo = list(dict.fromkeys(order_id for order_id in order_ids if order_id not in done))
+        logger.info(f"Batch: {len(todo)} orders to process, concurrency {self.concurrency}")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.monotonic()
+        results = await asyncio.gather(*(self._run_order(order_id, semaphore) for order_id in todo))
+        self.report(results, time.monotonic() - start)
+        return results
+
+    @staticmethod
+    def report(results: List[OrderResult], elapsed: float) -> str:
+        latencies = [r.latency for r in results if r.status == "ok"]
+        failed = len(results) - len(latencies)
+        throughput = len(latencies) / (elapsed / 60) if elapsed > 0 else 0.0
+        summary = (
+            f"Batch finished: {len(latencies)} ok, {failed} failed in {elapsed:.1f}s | "
+            f"{throughput:.2f} orders/min | p50 {percentile(latencies, 50):.1f}s, p95 {percentile(latencies, 95):.1f}s"
+        )
+        logger.info(summary)
+        print(summary)
+        return summary
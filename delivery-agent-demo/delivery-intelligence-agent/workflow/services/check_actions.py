@@ -1,9 +1,6 @@
-from mcp.server.fastmcp import FastMCP
-from google.cloud import bigquery
 import os
 from workflow.utils.config import PROJECT_ID,DATASET_ID
-
-bq_client = bigquery.Client(project=PROJECT_ID)
+from workflow.utils.query_engine import query_rows
 
 import json
 from rich.console import Console
@@ -17,9 +14,7 @@ console = Console()
 
 def query_data(sql: str) -> str:
     try:
-        query_job = bq_client.query(sql)
-        results = query_job.result()
-        rows = [dict(row) for row in results]
+        rows = query_rows(sql)
 
         if not rows:
           
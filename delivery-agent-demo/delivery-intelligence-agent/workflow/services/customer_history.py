@@ -0,0 +1,223 @@
+"""
+Customer delivery history aggregated in SQL.
+
+Instead of returning every past delivery, one query reduces the customer's
+history to a few labelled rows (section, label, n, detail): risk bucket counts,
+issue flags and note keywords (failure reasons), reschedules, delivery window
+and date patterns, and the last N attempts. Only deliveries scheduled up to the
+order count as history. The counts can optionally be materialized per customer
+in `HISTORY_SUMMARY_TABLE` and refreshed incrementally.
+"""
+import calendar
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Any, Dict, List
+
+from loguru import logger
+
+from workflow.utils.clients import get_bigquery_client
+from workflow.utils.query_backends import get_query_backend
+from workflow.utils.query_engine import query_rows
+from workflow.utils.config import PROJECT_ID, DATASET_ID, HISTORY_RECENT_ATTEMPTS, HISTORY_SUMMARY_TABLE
+
+# Risk features that describe why past deliveries were hard
+ISSUE_FEATURES = ("NUM_RSCHDL", "IS_DRIVEWAY_ISSUE", "IS_ADDRESS_ISSUE", "IS_CALL_REQUESTED", "IS_SPECIFIC_DLVRY_WINDOW")
+TOP_KEYWORDS = 5
+
+
+def _table(name: str) -> str:
+    return f"`{PROJECT_ID}.{DATASET_ID}.{name}`"
+
+
+def _history_cte(order_filter: str) -> str:
+    """`history` CTE: deliveries `h` of the customer of @order_id (`d`) matching `order_filter`."""
+    return f"""history AS (
+        SELECT h.*
+        FROM {_table('deliveries')} h
+        JOIN {_table('deliveries')} d ON h.CUSTOMER_ID = d.CUSTOMER_ID
+        WHERE d.DATA_ID = @order_id AND ({order_filter})
+    )"""
+
+
+# Not history for an order: the order itself and deliveries scheduled after it
+_EXCLUDED = "h.DATA_ID = d.DATA_ID OR COALESCE(h.SCHEDULED_DELIVERY_DATE > d.SCHEDULED_DELIVERY_DATE, FALSE)"
+_PRIOR = f"NOT ({_EXCLUDED})"
+
+
+def _counts_sql() -> str:
+    """Count rows (CUSTOMER_ID, section, label, n, detail) over the `history` CTE."""
+    features = ", ".join(f"'{name}'" for name in ISSUE_FEATURES)
+    return f"""
+    SELECT CUSTOMER_ID, 'risk_bucket' AS section, DLVRY_RISK_BUCKET AS label, COUNT(*) AS n, CAST(NULL AS STRING) AS detail
+    FROM history GROUP BY CUSTOMER_ID, DLVRY_RISK_BUCKET
+    UNION ALL
+    SELECT h.CUSTOMER_ID, 'issue', f.FEATURE_NAME, COUNT(DISTINCT h.DATA_ID), CAST(NULL AS STRING)
+    FROM history h
+    JOIN {_table('delivery_risk_features')} df ON df.DATA_ID = h.DATA_ID
+    JOIN {_table('risk_features')} f ON f.FEATURE_ID = df.FEATURE_ID
+    WHERE f.FEATURE_NAME IN ({features})
+    GROUP BY h.CUSTOMER_ID, f.FEATURE_NAME
+    UNION ALL
+    SELECT h.CUSTOMER_ID, 'keyword', k.KEYWORD, COUNT(DISTINCT h.DATA_ID), CAST(NULL AS STRING)
+    FROM history h
+    JOIN {_table('delivery_keywords')} dk ON dk.DATA_ID = h.DATA_ID
+    JOIN {_table('keywords')} k ON k.KEYWORD_ID = dk.KEYWORD_ID
+    GROUP BY h.CUSTOMER_ID, k.KEYWORD
+    UNION ALL
+    SELECT CUSTOMER_ID, 'window', CONCAT(CAST(WINDOW_START AS STRING), '-', CAST(WINDOW_END AS STRING)), COUNT(*), CAST(NULL AS STRING)
+    FROM history GROUP BY CUSTOMER_ID, WINDOW_START, WINDOW_END
+    UNION ALL
+    SELECT CUSTOMER_ID, 'date', CAST(SCHEDULED_DELIVERY_DATE AS STRING), COUNT(*), CAST(NULL AS STRING)
+    FROM history GROUP BY CUSTOMER_ID, SCHEDULED_DELIVERY_DATE
+    """
+
+
+def _recent_sql(recent: int = HISTORY_RECENT_ATTEMPTS) -> str:
+    """The last `recent` attempts per customer in the `history` CTE, as 'recent' rows ranked by n."""
+    return f"""
+    SELECT CUSTOMER_ID, 'recent' AS section, CAST(DATA_ID AS STRING) AS label, rn AS n,
+           CONCAT(
+               CAST(SCHEDULED_DELIVERY_DATE AS STRING), ' | ',
+               CAST(WINDOW_START AS STRING), '-', CAST(WINDOW_END AS STRING), ' | ',
+               COALESCE(VEHICLE_TYPE, ''), ' | ', COALESCE(DLVRY_RISK_BUCKET, ''), ' | ',
+               COALESCE(CUSTOMER_NOTES_LLM_SUMMARY, CUSTOMER_NOTES, '')
+           ) AS detail
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY CUSTOMER_ID ORDER BY SCHEDULED_DELIVERY_DATE DESC, DATA_ID DESC) AS rn
+        FROM history
+    ) ranked
+    WHERE rn <= {int(recent)}
+    """
+
+
+def _aggregate_sql(history_cte: str, recent: int = HISTORY_RECENT_ATTEMPTS) -> str:
+    """Aggregate rows (CUSTOMER_ID, section, label, n, detail) over the `history` CTE."""
+    return f"""
+    WITH {history_cte}
+    {_counts_sql()}
+    UNION ALL
+    {_recent_sql(recent)}
+    """
+
+
+def query_customer_history(order_id: int) -> List[Dict[str, Any]]:
+    """
+    Aggregated history rows for the customer of `order_id`: deliveries scheduled
+    up to the order, excluding the order itself.
+
+    With `HISTORY_SUMMARY_TABLE` the materialized counts cover every delivery of
+    the customer, so the counts of the excluded deliveries are subtracted and
+    the recent attempts are read from the deliveries directly.
+    """
+    if not HISTORY_SUMMARY_TABLE:
+        return query_rows(_aggregate_sql(_history_cte(_PRIOR)), {"order_id": int(order_id)})
+
+    query = f"""
+    SELECT s.section, s.label, s.n, s.detail
+    FROM {_table(HISTORY_SUMMARY_TABLE)} s
+    JOIN {_table('deliveries')} d ON d.CUSTOMER_ID = s.CUSTOMER_ID
+    WHERE d.DATA_ID = @order_id AND s.section != 'recent'
+    UNION ALL
+    SELECT section, label, -n, detail FROM (WITH {_history_cte(_EXCLUDED)} {_counts_sql()}) excluded
+    UNION ALL
+    SELECT section, label, n, detail FROM (WITH {_history_cte(_PRIOR)} {_recent_sql()}) recent
+    """
+    totals: Dict[tuple, int] = defaultdict(int)
+    rows = []
+    for row in query_rows(query, {"order_id": int(order_id)}):
+        if row["section"] == "recent":
+            rows.append(row)
+        else:
+            totals[(row["section"], str(row["label"]))] += row["n"]
+    rows.extend(
+        {"section": section, "label": label, "n": n, "detail": None}
+        for (section, label), n in totals.items() if n > 0
+    )
+    return rows
+
+
+def format_customer_history(rows: List[Dict[str, Any]]) -> str:
+    """Render aggregated history rows as a short summary."""
+    sections: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        sections[row["section"]].append(row)
+
+    total = sum(row["n"] for row in sections["risk_bucket"])
+    if total == 0:
+        return "No previous deliveries found"
+
+    def counts(section: str, limit: int = None) -> str:
+        ranked = sorted(sections[section], key=lambda row: (-row["n"], str(row["label"])))[:limit]
+        return ", ".join(f"{row['label']} {row['n']}" for row in ranked) or "none"
+
+    # Keyed by weekday number, so ties are listed Monday first whatever order the rows came in
+    weekdays = Counter()
+    for row in sections["date"]:
+        try:
+            weekdays[date.fromisoformat(str(row["label"])[:10]).weekday()] += row["n"]
+        except ValueError:
+            continue
+    weekday_counts = sorted(weekdays.items(), key=lambda item: (-item[1], item[0]))
+
+    reschedules = next((row["n"] for row in sections["issue"] if row["label"] == "NUM_RSCHDL"), 0)
+    lines = [
+        f"Previous deliveries: {total}",
+        f"Risk buckets: {counts('risk_bucket')}",
+        f"Rescheduled deliveries: {reschedules}",
+        f"Issue flags: {counts('issue')}",
+        f"Top note keywords: {counts('keyword', TOP_KEYWORDS)}",
+        f"Delivery windows: {counts('window')}",
+        f"Weekdays: {', '.join(f'{calendar.day_abbr[day]} {n}' for day, n in weekday_counts) or 'none'}",
+        "Recent deliveries (DATA_ID | date | window | vehicle | risk | notes):",
+    ]
+    for row in sorted(sections["recent"], key=lambda row: row["n"]):
+        lines.append(f"  {row['label']} | {row['detail']}")
+    return "\n".join(lines)
+
+
+def refresh_history_summary_table() -> int:
+    """
+    Create or incrementally refresh the materialized per-customer summary.
+
+    Only customers with deliveries newer than the table's watermark
+    (RI_GENERATE_DATETIME) are recomputed. Returns the number of customers refreshed.
+    Run by `python main.py --refresh-history-summary` (BigQuery backend only).
+    """
+    if not HISTORY_SUMMARY_TABLE:
+        raise ValueError("HISTORY_SUMMARY_TABLE is not set")
+    if get_query_backend().is_local:
+        raise ValueError("The history summary table is refreshed in BigQuery; unset HISTORY_SUMMARY_TABLE for local runs")
+
+    summary = _table(HISTORY_SUMMARY_TABLE)
+    client = get_bigquery_client()
+    client.query(f"""
+    CREATE TABLE IF NOT EXISTS {summary} (
+        CUSTOMER_ID INT64, section STRING, label STRING, n INT64, detail STRING, SOURCE_UPDATED_AT STRING
+    )
+    """).result()
+
+    history_cte = f"""changed AS (
+        SELECT DISTINCT CUSTOMER_ID
+        FROM {_table('deliveries')}
+        WHERE CAST(RI_GENERATE_DATETIME AS STRING) > COALESCE((SELECT MAX(SOURCE_UPDATED_AT) FROM {summary}), '')
+    ),
+    history AS (
+        SELECT h.* FROM {_table('deliveries')} h JOIN changed c ON c.CUSTOMER_ID = h.CUSTOMER_ID
+    )"""
+    script = f"""
+    CREATE TEMP TABLE refreshed AS
+    SELECT a.CUSTOMER_ID, a.section, CAST(a.label AS STRING) AS label, a.n, a.detail, w.SOURCE_UPDATED_AT
+    FROM ({_aggregate_sql(history_cte)}) a
+    JOIN (
+        SELECT CUSTOMER_ID, MAX(CAST(RI_GENERATE_DATETIME AS STRING)) AS SOURCE_UPDATED_AT
+        FROM {_table('deliveries')} GROUP BY CUSTOMER_ID
+    ) w ON w.CUSTOMER_ID = a.CUSTOMER_ID;
+
+    DELETE FROM {summary} WHERE CUSTOMER_ID IN (SELECT DISTINCT CUSTOMER_ID FROM refreshed);
+    INSERT INTO {summary} SELECT * FROM refreshed;
+    SELECT COUNT(DISTINCT CUSTOMER_ID) AS customers FROM refreshed;
+    """
+    rows = list(client.query(script).result())
+    customers = rows[0]["customers"] if rows else 0
+    logger.info(f"Refreshed history summary for {customers} customers")
+    return customers
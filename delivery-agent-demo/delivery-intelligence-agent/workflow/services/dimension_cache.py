@@ -0,0 +1,122 @@
+"""
+In-process copies of the slowly changing dimension tables.
+
+`products`, `addresses` and `customers` change about once a day, so the tool
+server keeps each of them as an Arrow table plus a key -> row index and joins
+the per-order fact rows against it locally. After the TTL a cheap change check
+(BigQuery `__TABLES__.last_modified_time`) decides whether the table is
+reloaded or its snapshot is kept for another TTL.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from loguru import logger
+
+from workflow.utils.config import PROJECT_ID, DATASET_ID, DIMENSION_CACHE_TTL_SECONDS
+from workflow.utils.query_backends import get_query_backend
+from workflow.utils.query_engine import query_arrow, query_rows
+
+# Minimum seconds between reloads triggered by keys missing from the snapshot
+MISS_RELOAD_SECONDS = 60
+
+
+class Snapshot(NamedTuple):
+    """A loaded dimension table with its key -> row index and source version."""
+    table: Any
+    index: Dict[Any, int]
+    version: Optional[str]
+
+
+class DimensionTable:
+    """
+    One dimension table held as an Arrow table indexed by `key_column`.
+
+    A reload builds a new immutable `Snapshot` and publishes it with a single
+    assignment; readers take one reference to it, so a table is never paired
+    with the index of another load.
+    """
+
+    def __init__(self, name: str, key_column: str, ttl_seconds: float = DIMENSION_CACHE_TTL_SECONDS):
+        self.name = name
+        self.key_column = key_column
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[Snapshot] = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _last_modified(self) -> Optional[str]:
+        """Change marker of the source table (None when the backend cannot tell)."""
+        if get_query_backend().is_local:
+            return None
+        rows = query_rows(
+            f"SELECT CAST(last_modified_time AS STRING) AS version FROM `{PROJECT_ID}.{DATASET_ID}.__TABLES__` WHERE table_id = @table",
+            {"table": self.name},
+        )
+        return rows[0]["version"] if rows else None
+
+    def _load(self, version: Optional[str]) -> None:
+        start = time.monotonic()
+        table = query_arrow(f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.{self.name}`")
+        index = {key: position for position, key in enumerate(table.column(self.key_column).to_pylist())}
+        self._snapshot = Snapshot(table, index, version)
+        self._loaded_at = time.monotonic()
+        logger.info(
+            f"Loaded dimension {self.name}: {table.num_rows} rows, {table.nbytes / 1e6:.1f} MB "
+            f"in {self._loaded_at - start:.2f}s"
+        )
+
+    def refresh(self, force: bool = False) -> None:
+        """Load on first use; after the TTL reload only if the source table changed."""
+        with self._lock:
+            now = time.monotonic()
+            snapshot = self._snapshot
+            if snapshot is not None and not force and now - self._checked_at < self.ttl_seconds:
+                return
+            version = self._last_modified()
+            if snapshot is None or force or version is None or version != snapshot.version:
+                self._load(version)
+            self._checked_at = time.monotonic()
+
+    def rows(self, keys: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Rows for `keys`, in order; unknown keys are skipped."""
+        keys = [key for key in keys if key is not None]
+        self.refresh()
+        snapshot = self._snapshot
+        missing = [key for key in keys if key not in snapshot.index]
+        if missing and time.monotonic() - self._loaded_at > MISS_RELOAD_SECONDS:
+            logger.info(f"{len(missing)} keys missing from dimension {self.name}, reloading")
+            self.refresh(force=True)
+            snapshot = self._snapshot
+
+        positions = [snapshot.index[key] for key in keys if key in snapshot.index]
+        return snapshot.table.take(positions).to_pylist() if positions else []
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        rows = self.rows([key])
+        return rows[0] if rows else None
+
+    def __len__(self) -> int:
+        snapshot = self._snapshot
+        return 0 if snapshot is None else snapshot.table.num_rows
+
+
+class DimensionCache:
+    """The dimension tables joined into every order context bundle."""
+
+    def __init__(self, ttl_seconds: float = DIMENSION_CACHE_TTL_SECONDS):
+        self.products = DimensionTable("products", "PRODUCT_ID", ttl_seconds)
+        self.addresses = DimensionTable("addresses", "ADDRESS_ID", ttl_seconds)
+        self.customers = DimensionTable("customers", "CUSTOMER_ID", ttl_seconds)
+
+    def preload(self) -> None:
+        """Load every table up front (the tool server calls this at startup)."""
+        for table in (self.products, self.addresses, self.customers):
+            try:
+                table.refresh()
+            except Exception as e:
+                logger.error(f"Preloading dimension {table.name} failed: {e}")
+
+
+dimensions = DimensionCache()
@@ -0,0 +1,104 @@
+"""
+Speculative prefetch of the slow external lookups for an order.
+
+As soon as the CLI or the batch runner knows the order id, one small deliveries
+lookup gives the Street View URL (with its coordinates) and the delivery date.
+The Street View download + vision analysis and the weather forecast are then
+run in the background and stored in the shared prefetch store, where
+`street_view_` and `get_weather_forecast` pick them up, so this I/O overlaps
+with the LLM stages instead of starting when an agent gets to its tool call.
+"""
+import asyncio
+import re
+import time
+from typing import Any, Dict, Optional, Set
+
+from loguru import logger
+
+from workflow.services.street_image_analysis import ROAD_ANALYSIS_PROMPT
+from workflow.services.street_image_analysis_async import analyze_streetview_from_url
+from workflow.tools.weather_tool import fetch_daily_forecasts, weather_cache_key
+from workflow.utils.config import PROJECT_ID, DATASET_ID, PREFETCH_ENABLED
+from workflow.utils.prefetch_store import prefetch_store, streetview_key, weather_key
+from workflow.utils.query_engine import query_rows
+
+_VIEWPOINT = re.compile(r"viewpoint=(-?[\d.]+),(-?[\d.]+)")
+
+# Running prefetch tasks (referenced so they are not garbage collected mid-flight)
+_tasks: Set[asyncio.Task] = set()
+
+
+def lookup_order_location(order_id) -> Optional[Dict[str, Any]]:
+    """Street View URL and delivery date of an order."""
+    rows = query_rows(f"""
+    SELECT d.SCHEDULED_DELIVERY_DATE, a.STREET_VIEW_URL
+    FROM `{PROJECT_ID}.{DATASET_ID}.deliveries` d
+    LEFT JOIN `{PROJECT_ID}.{DATASET_ID}.addresses` a ON a.ADDRESS_ID = d.ADDRESS_ID
+    WHERE d.DATA_ID = @order_id
+    LIMIT 1
+    """, {"order_id": int(order_id)})
+    return rows[0] if rows else None
+
+
+async def _prefetch_streetview(order_id, url: str) -> None:
+    key = streetview_key(url)
+    if prefetch_store.get(key) is not None:
+        return
+    prefetch_store.begin(key)
+    try:
+        result = await analyze_streetview_from_url(url, ROAD_ANALYSIS_PROMPT, str(order_id))
+        if result.get("success"):
+            await asyncio.to_thread(prefetch_store.put, key, result)
+        else:
+            logger.warning(f"Street View prefetch for order {order_id} failed: {result.get('error')}")
+    finally:
+        prefetch_store.end(key)
+
+
+async def _prefetch_weather(lat: str, lon: str, date: str) -> None:
+    cache_key = weather_cache_key(lat, lon, date)
+    key = weather_key(cache_key)
+    if prefetch_store.get(key) is not None:
+        return
+    prefetch_store.begin(key)
+    try:
+        forecasts = await asyncio.to_thread(fetch_daily_forecasts, [(lat, lon, date)])
+        # No forecast is not stored: the tool then makes its own request instead of reusing an empty answer
+        if forecasts[cache_key] is not None:
+            await asyncio.to_thread(prefetch_store.put, key, {"forecast": forecasts[cache_key]})
+    finally:
+        prefetch_store.end(key)
+
+
+async def prefetch_order(order_id) -> None:
+    """Look up the order's location and fetch its Street View analysis and weather forecast concurrently."""
+    start = time.monotonic()
+    try:
+        row = await asyncio.to_thread(lookup_order_location, order_id)
+    except Exception as e:
+        logger.warning(f"Prefetch lookup for order {order_id} failed: {e}")
+        return
+    url = (row or {}).get("STREET_VIEW_URL")
+    if not url:
+        return
+
+    jobs = {"street view": _prefetch_streetview(order_id, url)}
+    match = _VIEWPOINT.search(url)
+    if match and row.get("SCHEDULED_DELIVERY_DATE"):
+        jobs["weather"] = _prefetch_weather(match.group(1), match.group(2), str(row["SCHEDULED_DELIVERY_DATE"])[:10])
+
+    results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+    for name, result in zip(jobs, results):
+        if isinstance(result, Exception):
+            logger.warning(f"{name.capitalize()} prefetch for order {order_id} failed: {result}")
+    logger.info(f"Prefetch for order {order_id} finished in {time.monotonic() - start:.1f}s")
+
+
+def start_prefetch(order_id) -> Optional[asyncio.Task]:
+    """Run `prefetch_order` in the background on the running event loop (None when PREFETCH_ENABLED is off)."""
+    if not PREFETCH_ENABLED:
+        return None
+    task = asyncio.get_running_loop().create_task(prefetch_order(order_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
@@ -0,0 +1,193 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from loguru import logger
+
+from workflow.utils.query_engine import query_rows
+from workflow.utils.config import (
+    PROJECT_ID,
+    DATASET_ID,
+    PROCESSED_INDEX_PATH,
+    PROCESSED_INDEX_REFRESH_SECONDS,
+    PROCESSED_INDEX_OVERLAP_SECONDS,
+)
+
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ProcessedOrderIndex:
+    """
+    Local index of DATA_IDs that already have an `action_update` row.
+
+    Ids are kept in a bitmap (one bit per id, ~1 KB for 6000+ orders). The
+    index is loaded from BigQuery once, then refreshed in the background from
+    the UPDATED_AT watermark. Each refresh re-reads an overlap window before the
+    watermark, so rows with the same timestamp or late streaming-buffer rows
+    are not missed.
+
+    The action_update writer records each confirmed insert in an append-only
+    journal. This makes orders processed by the tool server visible to the CLI
+    without a BigQuery query. Each refresh compacts the journal down to the ids
+    that BigQuery has not returned yet.
+    """
+
+    def __init__(self, journal_path: str = PROCESSED_INDEX_PATH, refresh_seconds: float = PROCESSED_INDEX_REFRESH_SECONDS):
+        self.journal_path = journal_path
+        self.refresh_seconds = refresh_seconds
+        self._bits = bytearray()
+        # Ids returned by BigQuery; journal entries for these are dropped on compaction
+        self._remote_bits = bytearray()
+        self._watermark: Optional[str] = None
+        self._journal_offset = 0
+        self._journal_inode: Optional[int] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._refresh_thread = None
+
+    @staticmethod
+    def _set_bit(bits: bytearray, order_id: int) -> None:
+        byte, bit = divmod(order_id, 8)
+        if byte >= len(bits):
+            bits.extend(bytes(byte - len(bits) + 1))
+        bits[byte] |= 1 << bit
+
+    @staticmethod
+    def _has_bit(bits: bytearray, order_id: int) -> bool:
+        byte, bit = divmod(order_id, 8)
+        return byte < len(bits) and bool(bits[byte] & (1 << bit))
+
+    def _set(self, order_id: int) -> None:
+        self._set_bit(self._bits, order_id)
+
+    def _has(self, order_id: int) -> bool:
+        return self._has_bit(self._bits, order_id)
+
+    def load(self) -> None:
+        """Load every processed DATA_ID from BigQuery and start the background refresh."""
+        self._refresh_from_bigquery()
+        self._loaded = True
+        if self._refresh_thread is None and self.refresh_seconds > 0:
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, name="processed-orders-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def ensure_loaded(self) -> None:
+        """`load` on first use (e.g. in the tool server); on failure only the journal is used until the next call."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Processed order index load failed, continuing with the journal only: {e}")
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self._refresh_from_bigquery()
+            except Exception as e:
+                logger.error(f"Processed order index refresh failed: {e}")
+
+    def _since(self) -> Optional[str]:
+        """Lower bound of the next refresh: the watermark minus the overlap window."""
+        if self._watermark is None:
+            return None
+        try:
+            watermark = datetime.strptime(self._watermark[:19], _TIMESTAMP_FORMAT)
+        except ValueError:
+            return self._watermark
+        return (watermark - timedelta(seconds=PROCESSED_INDEX_OVERLAP_SECONDS)).strftime(_TIMESTAMP_FORMAT)
+
+    def _refresh_from_bigquery(self) -> None:
+        """Fetch DATA_IDs updated since the watermark (all of them on the first call), then compact the journal."""
+        query = f"""
+        SELECT DATA_ID, CAST(UPDATED_AT AS STRING) AS UPDATED_AT
+        FROM `{PROJECT_ID}.{DATASET_ID}.action_update`
+        WHERE DATA_ID IS NOT NULL
+        """
+        params = {}
+        since = self._since()
+        if since is not None:
+            query += " AND CAST(UPDATED_AT AS STRING) >= @watermark"
+            params["watermark"] = since
+
+        rows = query_rows(query, params)
+        with self._lock:
+            for row in rows:
+                self._set(int(row["DATA_ID"]))
+                self._set_bit(self._remote_bits, int(row["DATA_ID"]))
+                if row["UPDATED_AT"] and (self._watermark is None or row["UPDATED_AT"] > self._watermark):
+                    self._watermark = row["UPDATED_AT"]
+            self._compact_journal()
+
+    def _compact_journal(self) -> None:
+        """Rewrite the journal without the ids BigQuery already returned (atomic replace)."""
+        self._sync_journal()
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        complete = data.rfind(b"\n") + 1
+        ids = [int(line) for line in data[:complete].split()]
+        keep = [order_id for order_id in dict.fromkeys(ids) if not self._has_bit(self._remote_bits, order_id)]
+        if len(keep) == len(ids):
+            return
+
+        directory = os.path.dirname(self.journal_path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write("".join(f"{order_id}\n" for order_id in keep).encode())
+            f.write(data[complete:])
+        os.replace(tmp_path, self.journal_path)
+        self._journal_inode = os.stat(self.journal_path).st_ino
+        self._journal_offset = os.path.getsize(self.journal_path)
+
+    def _sync_journal(self) -> None:
+        """Apply ids appended to the journal since the last read (from the start after a compaction)."""
+        try:
+            stat = os.stat(self.journal_path)
+        except OSError:
+            return
+        if stat.st_ino != self._journal_inode or stat.st_size < self._journal_offset:
+            # Replaced by another process's compaction; setting bits again is harmless
+            self._journal_inode = stat.st_ino
+            self._journal_offset = 0
+        size = stat.st_size
+        if size <= self._journal_offset:
+            return
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            data = f.read(size - self._journal_offset)
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].split():
+            self._set(int(line))
+        self._journal_offset += complete
+
+    def contains(self, order_id) -> bool:
+        with self._lock:
+            self._sync_journal()
+            return self._has(int(order_id))
+
+    def add(self, order_id) -> None:
+        """Mark an order as processed and record it in the shared journal (called once its row is written)."""
+        order_id = int(order_id)
+        with self._lock:
+            self._set(order_id)
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            with open(self.journal_path, "ab") as f:
+                f.write(f"{order_id}\n".encode())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(bin(byte).count("1") for byte in self._bits)
+
+
+processed_orders = ProcessedOrderIndex()
@@ -0,0 +1,262 @@
+"""
+Route-level traffic and access analysis from the facility (FLOC) to its stops.
+
+Legs from a FLOC to every stop of a date are fetched with batched Distance
+Matrix requests (one origin, up to 25 destinations per request, grouped by the
+departure hour) and cached by (origin cell, destination cell, hour bucket), so
+stops in the same neighbourhood and hour share one leg. The hour bucket is only
+a cache key: requests ask for traffic at the planned departure, or now when
+that is already past (Maps rejects departure times in the past). For a single
+order the leg is complemented by a Directions call that looks for restricted
+roads and partial address matches.
+"""
+import re
+from collections import defaultdict
+from datetime import datetime, time as dt_time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from workflow.utils.clients import get_http_session
+from workflow.utils.config import (
+    GOOGLE_API_KEY,
+    MAPS_API_BASE_URL,
+    MAPS_TIMEOUT,
+    FLOC_LOCATIONS,
+    ROUTE_CACHE_TTL_SECONDS,
+    ROUTE_GRID_DEGREES,
+    ROUTE_DELAY_THRESHOLD_MINUTES,
+)
+from workflow.utils.ttl_cache import TTLCache
+
+# Distance Matrix limit on destinations per request
+MATRIX_MAX_DESTINATIONS = 25
+RESTRICTED_ROAD_MARKERS = ("Restricted usage", "restricted usage", "Private road", "private road")
+
+# Legs and restriction checks keyed by (origin cell, destination cell, hour bucket)
+leg_cache = TTLCache(ttl_seconds=ROUTE_CACHE_TTL_SECONDS, max_entries=100000)
+restriction_cache = TTLCache(ttl_seconds=ROUTE_CACHE_TTL_SECONDS, max_entries=20000)
+
+_VIEWPOINT = re.compile(r"viewpoint=(-?[\d.]+),(-?[\d.]+)")
+
+
+def floc_location(floc) -> Optional[str]:
+    """Configured location ("lat,lng" or address) of a facility."""
+    if floc is None:
+        return None
+    try:
+        floc = int(float(floc))
+    except (TypeError, ValueError):
+        pass
+    return FLOC_LOCATIONS.get(str(floc))
+
+
+def stop_location(delivery: Dict[str, Any]) -> Optional[str]:
+    """Stop coordinates from the street view URL, else the destination address."""
+    match = _VIEWPOINT.search(str(delivery.get("STREET_VIEW_URL") or ""))
+    if match:
+        return f"{float(match.group(1)):.6f},{float(match.group(2)):.6f}"
+    return delivery.get("DESTINATION_ADDRESS") or None
+
+
+def location_cell(location: str):
+    """Grid cell of a "lat,lng" location; addresses are keyed by their normalized text."""
+    try:
+        lat, lng = (float(part) for part in location.split(","))
+        return round(lat / ROUTE_GRID_DEGREES), round(lng / ROUTE_GRID_DEGREES)
+    except ValueError:
+        return " ".join(location.upper().split())
+
+
+def planned_departure(date, window_start=None) -> Optional[datetime]:
+    """When the truck leaves for a stop: the start of its delivery window (None without a valid date)."""
+    try:
+        day = datetime.fromisoformat(str(date)[:10]).date()
+        start = dt_time.fromisoformat(str(window_start).zfill(8)) if window_start else dt_time(8)
+    except ValueError:
+        return None
+    return datetime.combine(day, start)
+
+
+def departure_time(departure: Optional[datetime]):
+    """`departure_time` request parameter: the planned departure, or "now" when it is unknown or past."""
+    if departure is None or departure <= datetime.now():
+        return "now"
+    return int(departure.timestamp())
+
+
+def leg_key(origin: str, destination: str, departure: Optional[datetime]) -> Tuple[Any, Any, str]:
+    hour = departure.strftime("%Y-%m-%dT%H") if departure else "now"
+    return location_cell(origin), location_cell(destination), hour
+
+
+def _parse_element(element: Dict[str, Any]) -> Dict[str, Any]:
+    if element.get("status") != "OK":
+        return {"status": element.get("status", "UNKNOWN")}
+    duration = element["duration"]["value"]
+    in_traffic = element.get("duration_in_traffic", {}).get("value", duration)
+    return {
+        "status": "OK",
+        "distance_km": round(element["distance"]["value"] / 1000, 1),
+        "duration_min": round(duration / 60, 1),
+        "traffic_duration_min": round(in_traffic / 60, 1),
+        "delay_min": round(max(in_traffic - duration, 0) / 60, 1),
+    }
+
+
+def _maps_get(endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    response = get_http_session().get(
+        f"{MAPS_API_BASE_URL}/{endpoint}/json", params={**params, "key": GOOGLE_API_KEY}, timeout=MAPS_TIMEOUT
+    )
+    response.raise_for_status()
+    data = response.json()
+    if data.get("status") not in ("OK", "ZERO_RESULTS"):
+        raise RuntimeError(f"Maps {endpoint} error: {data.get('status')} {data.get('error_message', '')}".strip())
+    return data
+
+
+def _request_matrix(origin: str, destinations: List[str], departure: Optional[datetime]) -> List[Dict[str, Any]]:
+    """One Distance Matrix request: a single origin to up to 25 destinations."""
+    data = _maps_get("distancematrix", {
+        "origins": origin,
+        "destinations": "|".join(destinations),
+        "mode": "driving",
+        "departure_time": departure_time(departure),
+    })
+    return [_parse_element(element) for element in data["rows"][0]["elements"]]
+
+
+def fetch_legs(origin: str, stops: List[Tuple[str, Optional[datetime]]]) -> List[Dict[str, Any]]:
+    """
+    Legs from `origin` to each (destination, planned departure) stop.
+
+    Cached legs are reused; the rest are fetched grouped by departure hour (the
+    earliest departure of the group is requested), one request per
+    MATRIX_MAX_DESTINATIONS distinct destination cells.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(stops)
+    missing: Dict[str, Dict[tuple, List[int]]] = defaultdict(lambda: defaultdict(list))
+    destinations: Dict[tuple, str] = {}
+    group_departure: Dict[str, datetime] = {}
+    for i, (destination, departure) in enumerate(stops):
+        key = leg_key(origin, destination, departure)
+        cached = leg_cache.get(key)
+        if cached is not None:
+            results[i] = cached
+            continue
+        hour = key[2]
+        missing[hour][key].append(i)
+        destinations.setdefault(key, destination)
+        if departure is not None:
+            group_departure[hour] = min(group_departure.get(hour, departure), departure)
+
+    for hour, by_key in missing.items():
+        keys = list(by_key)
+        departure = group_departure.get(hour)
+        for start in range(0, len(keys), MATRIX_MAX_DESTINATIONS):
+            chunk = keys[start:start + MATRIX_MAX_DESTINATIONS]
+            logger.info(f"Fetching {len(chunk)} route legs departing {hour}")
+            for key, leg in zip(chunk, _request_matrix(origin, [destinations[k] for k in chunk], departure)):
+                leg_cache.set(key, leg)
+                for i in by_key[key]:
+                    results[i] = leg
+    return results
+
+
+def check_route_restrictions(origin: str, destination: str, departure: Optional[datetime]) -> Dict[str, Any]:
+    """Directions-based check for restricted roads and partial address matches (cached like legs)."""
+    key = leg_key(origin, destination, departure)
+    cached = restriction_cache.get(key)
+    if cached is not None:
+        return cached
+
+    data = _maps_get("directions", {
+        "origin": origin,
+        "destination": destination,
+        "mode": "driving",
+        "departure_time": departure_time(departure),
+    })
+    routes = data.get("routes") or []
+    steps = routes[0]["legs"][0].get("steps", []) if routes else []
+    result = {
+        "route_found": bool(routes),
+        "restricted_road_found": any(
+            marker in step.get("html_instructions", "") for step in steps for marker in RESTRICTED_ROAD_MARKERS
+        ),
+        "address_match_risk": any(wp.get("partial_match", False) for wp in data.get("geocoded_waypoints", [])),
+        "warnings": routes[0].get("warnings", []) if routes else [],
+    }
+    restriction_cache.set(key, result)
+    return result
+
+
+def route_flags(leg: Dict[str, Any]) -> List[str]:
+    flags = []
+    if leg.get("status") != "OK":
+        flags.append(f"no_route ({leg.get('status')})")
+    elif leg["delay_min"] >= ROUTE_DELAY_THRESHOLD_MINUTES:
+        flags.append("traffic_delay")
+    return flags
+
+
+def _format_departure(departure: Optional[datetime]) -> str:
+    """The planned departure as reported (never the wall clock, so the result only depends on the order)."""
+    return f"{departure:%Y-%m-%d %H:%M}" if departure else "unknown"
+
+
+def analyze_delivery_route(delivery: Dict[str, Any]) -> Dict[str, Any]:
+    """FLOC -> stop leg at the delivery window plus the restricted-road check for one delivery."""
+    origin = floc_location(delivery.get("FLOC"))
+    if not origin:
+        raise ValueError(f"No location configured for FLOC {delivery.get('FLOC')} (set FLOC_LOCATIONS)")
+    destination = stop_location(delivery)
+    if not destination:
+        raise ValueError("Delivery has no coordinates or destination address")
+
+    departure = planned_departure(delivery.get("SCHEDULED_DELIVERY_DATE"), delivery.get("WINDOW_START"))
+    leg = fetch_legs(origin, [(destination, departure)])[0]
+    restrictions = check_route_restrictions(origin, destination, departure)
+    flags = route_flags(leg)
+    if restrictions["restricted_road_found"]:
+        flags.append("restricted_road")
+    if restrictions["address_match_risk"]:
+        flags.append("address_match_risk")
+    return {"departure": _format_departure(departure), **leg, **restrictions, "flags": flags}
+
+
+def analyze_floc_day(floc, deliveries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Legs from the FLOC to every delivery of its day (Distance Matrix only, no Directions calls)."""
+    origin = floc_location(floc)
+    if not origin:
+        raise ValueError(f"No location configured for FLOC {floc} (set FLOC_LOCATIONS)")
+
+    routable = [(d, stop_location(d)) for d in deliveries]
+    routable = [(d, destination) for d, destination in routable if destination]
+    stops = [
+        (destination, planned_departure(d.get("SCHEDULED_DELIVERY_DATE"), d.get("WINDOW_START")))
+        for d, destination in routable
+    ]
+    legs = fetch_legs(origin, stops)
+    return [
+        {"DATA_ID": d.get("DATA_ID"), "departure": _format_departure(departure), **leg, "flags": route_flags(leg)}
+        for (d, _), (_, departure), leg in zip(routable, stops, legs)
+    ]
+
+
+def format_route_risk(result: Dict[str, Any]) -> str:
+    """Route analysis of one delivery as `LABEL: value` lines."""
+    if result.get("status") != "OK":
+        lines = [f"ROUTE_STATUS: {result.get('status')}"]
+    else:
+        lines = [
+            f"DEPARTURE: {result['departure']}",
+            f"DISTANCE_KM: {result['distance_km']}",
+            f"DRIVE_MIN: {result['duration_min']} (in traffic {result['traffic_duration_min']})",
+            f"TRAFFIC_DELAY_MIN: {result['delay_min']}",
+        ]
+    lines.append(f"RESTRICTED_ROAD: {result.get('restricted_road_found', False)}")
+    lines.append(f"ADDRESS_MATCH_RISK: {result.get('address_match_risk', False)}")
+    if result.get("warnings"):
+        lines.append(f"WARNINGS: {'; '.join(result['warnings'])}")
+    lines.append(f"ROUTE_FLAGS: {', '.join(result['flags']) or 'none'}")
+    return "\n".join(lines)
@@ -0,0 +1,124 @@
+"""
+Session storage and lifecycle for the runners.
+
+`create_session_service` picks the in-memory or SQLite-backed ADK session
+service. `SessionManager` bounds what a long-running or batch process keeps:
+finished pipeline sessions are compacted to their final state keys, and
+sessions are evicted after a TTL or once there are too many. It only uses the
+public `BaseSessionService` API, so it works the same on both backends.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from workflow.utils.config import (
+    APP_NAME,
+    SESSION_BACKEND,
+    SESSION_DB_URL,
+    SESSION_TTL_SECONDS,
+    SESSION_MAX_SESSIONS,
+    SESSION_KEEP_STATE_KEYS,
+)
+
+
+def create_session_service(backend: str = SESSION_BACKEND, db_url: str = SESSION_DB_URL):
+    """Return an ADK session service for `backend` ("memory" or "sqlite")."""
+    if backend == "sqlite":
+        from google.adk.sessions import DatabaseSessionService
+
+        db_path = db_url.split(":///", 1)[-1]
+        if db_path and db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        return DatabaseSessionService(db_url=db_url)
+
+    if backend != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND '{backend}' (expected 'memory' or 'sqlite')")
+    from google.adk.sessions import InMemorySessionService
+    return InMemorySessionService()
+
+
+class SessionManager:
+    """TTL/size-bounded registry of sessions with compaction of finished runs."""
+
+    def __init__(
+        self,
+        session_service,
+        app_name: str = APP_NAME,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+        keep_state_keys: Optional[List[str]] = None,
+    ):
+        self.session_service = session_service
+        self.app_name = app_name
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.keep_state_keys = keep_state_keys if keep_state_keys is not None else SESSION_KEEP_STATE_KEYS
+        # (user_id, session_id) -> last used (monotonic), oldest first
+        self._sessions: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def _touch(self, user_id: str, session_id: str) -> None:
+        self._sessions[(user_id, session_id)] = time.monotonic()
+        self._sessions.move_to_end((user_id, session_id))
+
+    async def create(self, user_id: str, session_id: str, state: Optional[Dict[str, Any]] = None):
+        """Create a session and evict expired or surplus ones."""
+        session = await self.session_service.create_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id, state=state
+        )
+        self._touch(user_id, session_id)
+        await self.evict()
+        return session
+
+    async def get_or_create(self, user_id: str, session_id: str, state: Optional[Dict[str, Any]] = None):
+        """Reuse a session with a deterministic id (e.g. one per order), creating it on first use."""
+        session = await self.session_service.get_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            return await self.create(user_id, session_id, state)
+        self._touch(user_id, session_id)
+        return session
+
+    async def compact(self, user_id: str, session_id: str) -> None:
+        """Replace a finished session by one holding only its final state keys (events are dropped)."""
+        session = await self.session_service.get_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            return
+        state = {key: session.state[key] for key in self.keep_state_keys if key in session.state}
+        await self.session_service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+        await self.session_service.create_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id, state=state
+        )
+        logger.info(f"Compacted session {session_id}: {len(session.events)} events dropped, {len(state)} state keys kept")
+        self._touch(user_id, session_id)
+
+    async def evict(self) -> None:
+        """Delete sessions idle for longer than the TTL, then the least recently used over the limit."""
+        async with self._lock:
+            expiry = time.monotonic() - self.ttl_seconds
+            victims = [key for key, last_used in self._sessions.items() if last_used < expiry]
+            surplus = len(self._sessions) - len(victims) - self.max_sessions
+            if surplus > 0:
+                victims += [key for key in self._sessions if key not in victims][:surplus]
+
+            for user_id, session_id in victims:
+                self._sessions.pop((user_id, session_id), None)
+                await self.session_service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+            if victims:
+                logger.info(f"Evicted {len(victims)} sessions, {len(self._sessions)} remaining")
+
+    async def purge_expired(self, user_id: str, prefix: str = "") -> int:
+        """Delete stored sessions of `user_id` whose id starts with `prefix` and that expired (e.g. left over in SQLite)."""
+        response = await self.session_service.list_sessions(app_name=self.app_name, user_id=user_id)
+        expiry = time.time() - self.ttl_seconds
+        expired = [
+            session for session in response.sessions
+            if session.id.startswith(prefix) and session.last_update_time < expiry
+        ]
+        for session in expired:
+            self._sessions.pop((user_id, session.id), None)
+            await self.session_service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session.id)
+        return len(expired)
@@ -0,0 +1,47 @@
+"""
+Deterministic stand-ins for pipeline stages that run out of their time budget.
+
+Each fallback takes the session state and returns the state delta the stage
+would have written, built from data already fetched for the order (the order
+context bundle is memoized, so no new query is issued): the stored street view
+description, or the precomputed weather columns.
+"""
+from typing import Any, Dict
+
+from workflow.tools.order_information_tool import get_order_context
+
+
+def _delivery(state: Dict[str, Any]) -> Dict[str, Any]:
+    order_id = state.get("order_id")
+    if order_id is None:
+        return {}
+    return get_order_context(order_id)["delivery"] or {}
+
+
+def streetview_fallback(state: Dict[str, Any]) -> Dict[str, str]:
+    """`streetview_info_result` from the stored STRT_VW_IMG_DSCRPTN."""
+    description = _delivery(state).get("STRT_VW_IMG_DSCRPTN") or "not available"
+    return {"streetview_info_result": (
+        "Result for StreetViewAgent Agent\n"
+        "Using existing street view description due to analysis unavailability (time budget exceeded).\n"
+        f"STREET_VIEW_IMAGE_DESCRIPTION: {description}"
+    )}
+
+
+def weather_fallback(state: Dict[str, Any]) -> Dict[str, str]:
+    """`weather_info_result` from the precomputed WTHR_CATEGORY / PRECIPITATION of the order."""
+    delivery = _delivery(state)
+    category, precipitation = delivery.get("WTHR_CATEGORY"), delivery.get("PRECIPITATION")
+    if category is None and precipitation is None:
+        stored = "No stored weather for this order."
+    else:
+        stored = f"WTHR_CATEGORY: {category or 'unknown'}\nPRECIPITATION: {precipitation if precipitation is not None else 'unknown'}"
+    return {"weather_info_result": (
+        "**Result for WeatherAgent Agent:**\n"
+        "Live forecast unavailable (time budget exceeded); using the stored weather for the order.\n"
+        f"{stored}"
+    )}
+
+
+def route_risk_fallback(state: Dict[str, Any]) -> Dict[str, str]:
+    return {"route_risk_result": "Route analysis unavailable: time budget exceeded"}
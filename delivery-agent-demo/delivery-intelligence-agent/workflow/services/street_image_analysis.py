@@ -1,20 +1,57 @@
-import requests
+"""
+Shared pieces of the Street View analysis: prompts, the image and analysis
+caches, URL parsing, the image size budget and per-order image artifacts. The
+download + vision pipeline that uses them is `street_image_analysis_async`.
+"""
 import base64
 from io import BytesIO
-from PIL import Image
-from openai import OpenAI
 import re
 import os
+import tempfile
 import time
-from workflow.utils.config import OPENAI_API_KEY, GOOGLE_API_KEY 
+from loguru import logger
+from workflow.utils.config import (
+    STREETVIEW_ARTIFACT_DIR,
+    STREETVIEW_ARTIFACT_TTL_HOURS,
+    STREETVIEW_MAX_IMAGE_BYTES,
+    STREETVIEW_CACHE_DIR,
+    STREETVIEW_CACHE_MAX_MB,
+    STREETVIEW_CACHE_TTL_HOURS,
+)
+from workflow.utils.disk_cache import DiskCache, content_hash
 
 
+VISION_MODEL = "gpt-4o"
 
-# Set OpenAI API key as environment variable
-os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+DEFAULT_ANALYSIS_PROMPT = """
+        Analyze this street view image and tell me about:
+        1. Is the road narrow, medium, or wide?
+        2. How many lanes are there?
+        3. Can two cars pass comfortably?
+        4. What's the road surface condition?
+        5. Is this urban, suburban, or rural?
+        6. Any safety concerns or obstacles?
+        
+        Be specific and descriptive.
+        """
+
+# Road-width prompt of the street_view_ tool; the prefetch uses the same text so both share a cache entry
+ROAD_ANALYSIS_PROMPT = """
+        Look at this street and tell me:
+        1. How wide is this road? (narrow/medium/wide)
+        2. How many lanes?
+        3. Can delivery trucks navigate easily?
+        4. Any width restrictions or obstacles?
+        5. Parking availability on sides?
+        
+        Give me practical details for delivery planning.
+        """
 
-# Initialize OpenAI client
-client = OpenAI()
+# Two-level cache: raw images keyed by the rounded view parameters, analyses keyed by image + prompt
+_cache_max_bytes = int(STREETVIEW_CACHE_MAX_MB * 1024 * 1024)
+_cache_ttl_seconds = STREETVIEW_CACHE_TTL_HOURS * 3600
+image_cache = DiskCache(os.path.join(STREETVIEW_CACHE_DIR, "images"), _cache_max_bytes, _cache_ttl_seconds)
+analysis_cache = DiskCache(os.path.join(STREETVIEW_CACHE_DIR, "analyses"), _cache_max_bytes, _cache_ttl_seconds)
 
 def parse_streetview_url(url):
     """Extract coordinates and view parameters from Google Street View URL"""
@@ -37,154 +74,87 @@ def parse_streetview_url(url):
             'fov': float(fov_match.group(1)) if fov_match else 90
         }
     except Exception as e:
-        print(f"URL parsing error: {e}")
+        logger.warning(f"Street View URL parsing error: {e}")
         raise
 
-def download_streetview_image(lat, lng, heading=0, pitch=0, fov=90, size="640x640"):
-    """Download Street View image from Google API"""
-    try:
-        url = "https://maps.googleapis.com/maps/api/streetview"
-        
-        params = {
-            'size': size,
-            'location': f"{lat},{lng}",
-            'heading': heading,
-            'pitch': pitch,
-            'fov': fov,
-            'key': GOOGLE_API_KEY
-        }
-        
-        print(f" Requesting image from Google API...")
-        response = requests.get(url, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            print(" Image downloaded successfully!")
-        else:
-            print(f"Google API error: {response.status_code}")
-            print(f"Response: {response.text}")
-            
-        response.raise_for_status()
-        
-        image = Image.open(BytesIO(response.content))
-        return image
-        
-    except requests.exceptions.RequestException as e:
-        print(f" Network error downloading image: {e}")
-        raise
-    except Exception as e:
-        print(f" Error processing image: {e}")
-        raise
+def image_cache_key(lat, lng, heading=0, pitch=0, fov=90, size="640x640"):
+    """Cache key for a Street View image: coordinates rounded to ~1 m, view angles to 0.1 degree"""
+    return content_hash(f"{lat:.5f},{lng:.5f},{heading:.1f},{pitch:.1f},{fov:.1f},{size}")
 
-def image_to_base64(image):
-    """Convert PIL Image to base64 string for OpenAI"""
-    try:
+def analysis_cache_key(image_bytes, prompt):
+    """Cache key for a vision analysis: hash of the image plus hash of the prompt and model"""
+    return content_hash(f"{content_hash(image_bytes)}:{content_hash(prompt or '')}:{VISION_MODEL}")
+
+def fit_image_to_budget(image_bytes, max_bytes=STREETVIEW_MAX_IMAGE_BYTES):
+    """
+    Return JPEG bytes within `max_bytes`. Images already within budget are passed
+    through untouched; larger ones are down-scaled and re-encoded once.
+    """
+    if len(image_bytes) <= max_bytes:
+        return image_bytes
+
+    from PIL import Image
+
+    image = Image.open(BytesIO(image_bytes)).convert("RGB")
+    scale = (max_bytes / len(image_bytes)) ** 0.5
+    while True:
+        resized = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
         buffered = BytesIO()
-        image.save(buffered, format="JPEG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        return img_str
-    except Exception as e:
-        print(f" Error converting image to base64: {e}")
-        raise
+        resized.save(buffered, format="JPEG", quality=85)
+        if buffered.tell() <= max_bytes or scale < 0.1:
+            return buffered.getvalue()
+        scale *= 0.8
 
-def analyze_image_with_openai(image, prompt=None):
-    """Analyze image using OpenAI GPT-4 Vision"""
-    
-    if not prompt:
-        prompt = """
-        Analyze this street view image and tell me about:
-        1. Is the road narrow, medium, or wide?
-        2. How many lanes are there?
-        3. Can two cars pass comfortably?
-        4. What's the road surface condition?
-        5. Is this urban, suburban, or rural?
-        6. Any safety concerns or obstacles?
-        
-        Be specific and descriptive.
-        """
-    
-    try:
-        print(" Converting image for OpenAI...")
-        base64_image = image_to_base64(image)
-        
-        print(" Sending to OpenAI GPT-4 Vision...")
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=500,
-            timeout=60  # 60 second timeout
-        )
-        
-        print(" OpenAI analysis complete!")
-        return response.choices[0].message.content
-        
-    except Exception as e:
-        print(f" OpenAI analysis error: {e}")
-        raise
+def image_data_url(image_bytes, max_bytes=STREETVIEW_MAX_IMAGE_BYTES):
+    """`data:` URL of JPEG bytes for the vision request; the bytes are sent as downloaded unless over `max_bytes`"""
+    return f"data:image/jpeg;base64,{base64.b64encode(fit_image_to_budget(image_bytes, max_bytes)).decode()}"
+
+_ORDER_ID = re.compile(r"^\d+$")
+# Seconds between sweeps for expired artifacts
+_ARTIFACT_PRUNE_INTERVAL = 3600
+_last_artifact_prune = 0.0
+
+def artifact_directory(order_id=None):
+    """Per-order artifact directory; `order_id` comes from the model, so only plain digits are accepted."""
+    if not order_id:
+        return os.path.join(STREETVIEW_ARTIFACT_DIR, "unassigned")
+    order_id = str(order_id).strip()
+    if not _ORDER_ID.match(order_id):
+        raise ValueError(f"Invalid order_id for image artifact: {order_id!r}")
+    return os.path.join(STREETVIEW_ARTIFACT_DIR, order_id)
+
+def prune_image_artifacts(max_age_seconds=STREETVIEW_ARTIFACT_TTL_HOURS * 3600):
+    """Delete artifacts older than `max_age_seconds` and the order directories left empty."""
+    expiry = time.time() - max_age_seconds
+    for root, dirs, files in os.walk(STREETVIEW_ARTIFACT_DIR, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime < expiry:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+        if root != STREETVIEW_ARTIFACT_DIR:
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass  # not empty
 
-def analyze_streetview_from_url(streetview_url, custom_prompt=None):
+def save_image_artifact(image_bytes, order_id=None):
     """
-    Main function: Takes Google Street View URL and returns LLM analysis
-    
-    Args:
-        streetview_url: The Google Street View URL
-        custom_prompt: Optional custom prompt for analysis
-    
-    Returns:
-        dict: Contains coordinates, analysis, and image
+    Store the image under a per-order directory so concurrent orders never share a file.
+    Returns the artifact path. Expired artifacts are swept at most once an hour.
     """
-    print(" Starting Street View Analysis...")
-    print("=" * 50)
-    
-    try:
-        # Extract coordinates from URL
-        print(" Parsing URL...")
-        params = parse_streetview_url(streetview_url)
-        print(f" Location: {params['lat']}, {params['lng']}")
-        print(f" View: heading={params['heading']}°, pitch={params['pitch']}°")
-        
-        # Download image
-        print("\n Downloading image...")
-        image = download_streetview_image(
-            params['lat'], 
-            params['lng'], 
-            params['heading'], 
-            params['pitch'], 
-            params['fov']
-        )
-        
-        # Analyze with OpenAI
-        print("\n AI Analysis...")
-        analysis = analyze_image_with_openai(image, custom_prompt)
-        
-        # Save image
-        print("\n Saving results...")
-        image.save('streetview_analysis.jpg')
-        print(" Image saved as 'streetview_analysis.jpg'")
-        
-        print("\n ANALYSIS COMPLETE!")
-        print("=" * 50)
-        
-        return {
-            'success': True,
-            'coordinates': f"{params['lat']}, {params['lng']}",
-            'analysis': analysis,
-            'image_saved': 'streetview_analysis.jpg'
-        }
-        
-    except Exception as e:
-        print(f"\n ERROR: {str(e)}")
-        return {'success': False, 'error': {str(e)}}
-    
+    global _last_artifact_prune
+    directory = artifact_directory(order_id)
+    if time.time() - _last_artifact_prune > _ARTIFACT_PRUNE_INTERVAL:
+        _last_artifact_prune = time.time()
+        prune_image_artifacts()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"streetview_{content_hash(image_bytes)[:16]}.jpg")
+    if not os.path.exists(path):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, path)
+    return path
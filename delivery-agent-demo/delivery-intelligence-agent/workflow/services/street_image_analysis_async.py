@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+
+from workflow.services.street_image_analysis import (
+    DEFAULT_ANALYSIS_PROMPT,
+    VISION_MODEL,
+    analysis_cache,
+    analysis_cache_key,
+    image_cache,
+    image_cache_key,
+    image_data_url,
+    parse_streetview_url,
+    save_image_artifact,
+)
+from workflow.utils.config import GOOGLE_API_KEY
+from workflow.utils.clients import get_async_http_client, get_async_openai_client
+
+STREETVIEW_API_URL = "https://maps.googleapis.com/maps/api/streetview"
+
+
+async def download_streetview_image_bytes(lat, lng, heading=0, pitch=0, fov=90, size="640x640") -> bytes:
+    """Return Street View JPEG bytes, from the image cache when available"""
+    key = image_cache_key(lat, lng, heading, pitch, fov, size)
+    cached = await asyncio.to_thread(image_cache.get, key)
+    if cached is not None:
+        return cached
+
+    params = {
+        'size': size,
+        'location': f"{lat},{lng}",
+        'heading': heading,
+        'pitch': pitch,
+        'fov': fov,
+        'key': GOOGLE_API_KEY
+    }
+    response = await get_async_http_client().get(STREETVIEW_API_URL, params=params)
+    response.raise_for_status()
+
+    await asyncio.to_thread(image_cache.set, key, response.content)
+    return response.content
+
+
+async def analyze_image_with_openai(image_bytes: bytes, prompt=None) -> str:
+    """Analyze JPEG bytes with the vision model (down-scaled only when over the size budget)"""
+    image_url = await asyncio.to_thread(image_data_url, image_bytes)
+    response = await get_async_openai_client().chat.completions.create(
+        model=VISION_MODEL,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt or DEFAULT_ANALYSIS_PROMPT},
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": image_url}
+                    }
+                ]
+            }
+        ],
+        max_tokens=500,
+    )
+    return response.choices[0].message.content
+
+
+async def analyze_streetview_from_url(streetview_url, custom_prompt=None, order_id=None):
+    """
+    Analyze the Street View image of a URL with the vision model.
+
+    Uses the shared pooled clients and the image/analysis caches, so it never
+    blocks the event loop while a download or vision call is in flight. The
+    image is stored under `order_id`. Returns a dict with `success` and either
+    `coordinates`, `analysis`, `cached`, `image_saved` or `error`.
+    """
+    try:
+        params = parse_streetview_url(streetview_url)
+        image_bytes = await download_streetview_image_bytes(
+            params['lat'],
+            params['lng'],
+            params['heading'],
+            params['pitch'],
+            params['fov']
+        )
+
+        key = analysis_cache_key(image_bytes, custom_prompt)
+        cached_analysis = await asyncio.to_thread(analysis_cache.get, key)
+        if cached_analysis is not None:
+            analysis = cached_analysis.decode("utf-8")
+        else:
+            analysis = await analyze_image_with_openai(image_bytes, custom_prompt)
+            await asyncio.to_thread(analysis_cache.set, key, analysis.encode("utf-8"))
+
+        image_path = await asyncio.to_thread(save_image_artifact, image_bytes, order_id)
+
+        return {
+            'success': True,
+            'coordinates': f"{params['lat']}, {params['lng']}",
+            'analysis': analysis,
+            'cached': cached_analysis is not None,
+            'image_saved': image_path
+        }
+
+    except Exception as e:
+        if _is_timeout(e):
+            return {'success': False, 'error': f"TIMEOUT: {type(e).__name__}"}
+        return {'success': False, 'error': str(e)}
+
+
+def _is_timeout(error: Exception) -> bool:
+    from openai import APITimeoutError
+    return isinstance(error, (httpx.TimeoutException, APITimeoutError))
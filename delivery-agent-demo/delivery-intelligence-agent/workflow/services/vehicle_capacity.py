@@ -0,0 +1,214 @@
+"""
+Deterministic vehicle capacity checks.
+
+Loads are compared against the fleet capacity table with NumPy, one row per
+order, so a whole day of orders is checked in a single vectorized pass and the
+risk agent only narrates the precomputed ratios. Access flags come from the
+site description and notes and rule out vehicles that do not fit the site.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Fleet ordered from smallest to largest: max weight (lbs), volume (cubic ft), pallets
+VEHICLE_TYPES = ["VAN", "BOX", "FLATBED"]
+VEHICLE_CAPACITIES = np.array([
+    [1500.0, 200.0, 2.0],
+    [10000.0, 1000.0, 10.0],
+    [40000.0, 2500.0, 20.0],
+])
+CAPACITY_DIMENSIONS = ["weight", "volume", "pallets"]
+SPECIALIZED_VEHICLE = "CRANE/SPECIALIZED"
+
+# Vehicle names used in the deliveries table and prompts
+VEHICLE_ALIASES = {"FLAT": "FLATBED", "SMALL VAN": "VAN", "BOX TRUCK": "BOX"}
+
+# Site conditions detected in the street view description and notes
+ACCESS_PATTERNS = {
+    "narrow_access": re.compile(r"narrow|tight|single[- ]lane", re.IGNORECASE),
+    "dead_end": re.compile(r"dead[- ]end|cul[- ]de[- ]sac", re.IGNORECASE),
+    "alley_access": re.compile(r"alley", re.IGNORECASE),
+    "overhead_obstruction": re.compile(r"low[- ]hanging|power lines?|wires|overhang", re.IGNORECASE),
+    "trees": re.compile(r"\btrees?\b", re.IGNORECASE),
+    "gated": re.compile(r"\bgated?\b", re.IGNORECASE),
+    "limited_parking": re.compile(r"limited parking|street parking|no driveway", re.IGNORECASE),
+}
+ACCESS_FLAGS = list(ACCESS_PATTERNS) + ["residential"]
+# "no visible dead end", "no obstructions like trees"
+_NEGATION = re.compile(r"\b(?:no|without)\b")
+_CLAUSE_BREAK = re.compile(r"[.;*\n]")
+
+# Flags that rule a vehicle out for the site
+ACCESS_RESTRICTIONS = {
+    "VAN": set(),
+    "BOX": {"overhead_obstruction"},
+    "FLATBED": {"narrow_access", "dead_end", "alley_access", "overhead_obstruction", "trees", "gated"},
+}
+
+
+def normalize_vehicle(vehicle: Optional[str]) -> Optional[str]:
+    """Canonical fleet name for a vehicle type, None if unknown."""
+    name = str(vehicle or "").strip().upper()
+    name = VEHICLE_ALIASES.get(name, name)
+    return name if name in VEHICLE_TYPES else None
+
+
+def _mentions(pattern: "re.Pattern", text: str) -> bool:
+    """True if `pattern` occurs in a clause that does not negate it."""
+    for match in pattern.finditer(text):
+        clause = _CLAUSE_BREAK.split(text[max(0, match.start() - 40):match.start()])[-1]
+        if not _NEGATION.search(clause):
+            return True
+    return False
+
+
+def detect_access_flags(site_text: str, commercial: Optional[bool] = None) -> Dict[str, bool]:
+    """Access flags for one site from its description / notes text."""
+    flags = {name: _mentions(pattern, site_text or "") for name, pattern in ACCESS_PATTERNS.items()}
+    flags["residential"] = commercial is False
+    # Trees only restrict long vehicles on residential streets
+    flags["trees"] = flags["trees"] and flags["residential"]
+    return flags
+
+
+def evaluate_fleet(
+    weights: Sequence[float],
+    volumes: Sequence[float],
+    pallets: Sequence[float],
+    current_vehicles: Sequence[Optional[str]],
+    access_flags: Optional[Dict[str, Sequence[bool]]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Capacity check for a batch of orders.
+
+    Returns arrays indexed by order: `utilization` (orders x vehicles x
+    weight/volume/pallets), `current_utilization` (NaN for unknown vehicles),
+    `fits_current`, `smallest_fit` and `recommended` (indexes into
+    VEHICLE_TYPES, -1 when only a specialized vehicle fits), `access_ok`
+    (orders x vehicles) and `access_conflict` (no fitting vehicle suits the site).
+
+    The assigned vehicle stays `recommended` whenever it carries the load and
+    suits the site; only otherwise is the smallest suitable vehicle proposed.
+    `smallest_fit` is informational.
+    """
+    loads = np.column_stack([
+        np.nan_to_num(np.asarray(weights, dtype=float)),
+        np.nan_to_num(np.asarray(volumes, dtype=float)),
+        np.nan_to_num(np.asarray(pallets, dtype=float)),
+    ])
+    n_orders = loads.shape[0]
+
+    utilization = loads[:, None, :] / VEHICLE_CAPACITIES[None, :, :]
+    fits = (utilization <= 1.0).all(axis=2)
+
+    access_ok = np.ones((n_orders, len(VEHICLE_TYPES)), dtype=bool)
+    for flag, values in (access_flags or {}).items():
+        values = np.asarray(values, dtype=bool)
+        for v, vehicle in enumerate(VEHICLE_TYPES):
+            if flag in ACCESS_RESTRICTIONS[vehicle]:
+                access_ok[:, v] &= ~values
+
+    any_fit = fits.any(axis=1)
+    smallest_fit = np.where(any_fit, fits.argmax(axis=1), -1)
+    suitable = fits & access_ok
+    any_suitable = suitable.any(axis=1)
+
+    current = np.array([
+        VEHICLE_TYPES.index(name) if name else -1
+        for name in (normalize_vehicle(vehicle) for vehicle in current_vehicles)
+    ], dtype=int)
+    known = current >= 0
+    rows = np.arange(n_orders)
+    current_utilization = np.full((n_orders, len(CAPACITY_DIMENSIONS)), np.nan)
+    current_utilization[known] = utilization[rows[known], current[known]]
+    fits_current = np.zeros(n_orders, dtype=bool)
+    fits_current[known] = fits[rows[known], current[known]]
+    current_suitable = np.zeros(n_orders, dtype=bool)
+    current_suitable[known] = suitable[rows[known], current[known]]
+
+    recommended = np.where(any_suitable, suitable.argmax(axis=1), smallest_fit)
+    recommended = np.where(current_suitable, current, recommended)
+
+    return {
+        "utilization": utilization,
+        "current": current,
+        "current_utilization": current_utilization,
+        "fits_current": fits_current,
+        "smallest_fit": smallest_fit,
+        "recommended": recommended,
+        "access_ok": access_ok,
+        "access_conflict": any_fit & ~any_suitable,
+    }
+
+
+def _vehicle_name(index: int) -> str:
+    return VEHICLE_TYPES[index] if index >= 0 else SPECIALIZED_VEHICLE
+
+
+def summarize_order(result: Dict[str, np.ndarray], i: int, flags: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+    """Plain-Python view of order `i` of an `evaluate_fleet` result."""
+    current = int(result["current"][i])
+    summary = {
+        "current_vehicle": _vehicle_name(current) if current >= 0 else None,
+        "current_utilization": {
+            dim: round(float(value), 4)
+            for dim, value in zip(CAPACITY_DIMENSIONS, result["current_utilization"][i])
+            if not np.isnan(value)
+        },
+        "fits_current_vehicle": bool(result["fits_current"][i]),
+        "smallest_fitting_vehicle": _vehicle_name(int(result["smallest_fit"][i])),
+        "recommended_vehicle": _vehicle_name(int(result["recommended"][i])),
+        "access_compatible": {
+            vehicle: bool(result["access_ok"][i, v]) for v, vehicle in enumerate(VEHICLE_TYPES)
+        },
+        "access_conflict": bool(result["access_conflict"][i]),
+    }
+    if flags is not None:
+        summary["access_flags"] = sorted(name for name, value in flags.items() if value)
+    return summary
+
+
+def _site_text(delivery: Dict[str, Any]) -> str:
+    fields = ("STRT_VW_IMG_DSCRPTN", "CUSTOMER_NOTES_LLM_SUMMARY", "CUSTOMER_NOTES", "HISTORIC_NOTES_LLM_SUMMARY")
+    return " ".join(str(delivery.get(name) or "") for name in fields)
+
+
+def _is_commercial(delivery: Dict[str, Any]) -> Optional[bool]:
+    value = delivery.get("COMMERCIAL_ADDRESS_FLAG")
+    if value is None or value == "":
+        return None
+    return str(value).strip().lower() in ("true", "1", "y", "yes")
+
+
+def evaluate_deliveries(deliveries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Capacity summary for delivery rows (deliveries joined with addresses)."""
+    deliveries = list(deliveries)
+    if not deliveries:
+        return []
+    flags = [detect_access_flags(_site_text(d), _is_commercial(d)) for d in deliveries]
+    result = evaluate_fleet(
+        [d.get("WEIGHT") or 0 for d in deliveries],
+        [d.get("VOLUME_CUBEFT") or 0 for d in deliveries],
+        [d.get("PALLET") or 0 for d in deliveries],
+        [d.get("VEHICLE_TYPE") for d in deliveries],
+        {name: [f[name] for f in flags] for name in ACCESS_FLAGS},
+    )
+    return [summarize_order(result, i, flags[i]) for i in range(len(deliveries))]
+
+
+def format_capacity(summary: Dict[str, Any]) -> List[str]:
+    """Capacity summary as `LABEL: value` lines."""
+    utilization = ", ".join(f"{dim} {ratio:.1%}" for dim, ratio in summary["current_utilization"].items())
+    lines = [
+        f"CURRENT_VEHICLE: {summary['current_vehicle'] or 'unknown'}",
+        f"CURRENT_UTILIZATION: {utilization or 'n/a'}",
+        f"FITS_CURRENT_VEHICLE: {summary['fits_current_vehicle']}",
+        f"SMALLEST_FITTING_VEHICLE: {summary['smallest_fitting_vehicle']}",
+        f"RECOMMENDED_VEHICLE: {summary['recommended_vehicle']}",
+        f"ACCESS_FLAGS: {', '.join(summary.get('access_flags') or []) or 'none'}",
+        f"ACCESS_INCOMPATIBLE: {', '.join(v for v, ok in summary['access_compatible'].items() if not ok) or 'none'}",
+    ]
+    if summary["access_conflict"]:
+        lines.append("ACCESS_CONFLICT: only vehicles unsuited to the site can carry this load")
+    return lines
@@ -1,131 +1,175 @@
 from loguru import logger
 from typing import Any, Dict, List
-from google.cloud import bigquery
 import os
-from workflow.utils.config import PROJECT_ID,DATASET_ID
+from workflow.utils.config import PROJECT_ID,DATASET_ID,ORDER_CONTEXT_TTL_SECONDS
+from workflow.utils.ttl_cache import TTLCache
+from workflow.utils.query_engine import query_arrow, query_rows, serialize_rows, serialize_table
+from workflow.services.dimension_cache import dimensions
+from workflow.services.customer_history import format_customer_history, query_customer_history
 from workflow.mcp.mcp_server import mcp
 
 
+# Order context bundles memoized for the rest of the pipeline run, keyed by DATA_ID
+order_context_cache = TTLCache(ttl_seconds=ORDER_CONTEXT_TTL_SECONDS, max_entries=512)
+
+# Columns of `deliveries` loaded into the order context (the digest, capacity, route and fallback inputs)
+DELIVERY_QUERY_COLUMNS = [
+    "DATA_ID", "MARKET", "SCHEDULED_DELIVERY_DATE", "WINDOW_START", "WINDOW_END", "VEHICLE_TYPE",
+    "CUSTOMER_ORDER_NUMBER", "SPECIAL_ORDER", "FLOC", "QUANTITY", "WEIGHT", "VOLUME_CUBEFT", "PALLET",
+    "CUSTOMER_NOTES", "CUSTOMER_NOTES_LLM_SUMMARY", "HISTORIC_NOTES_LLM_SUMMARY", "CUSTOMER_ID", "ADDRESS_ID",
+]
+
+# Columns each tool returns to the model; raw notes and the stored street view description stay in the bundle
+CUSTOMER_COLUMNS = ["CUSTOMER_ID", "CUSTOMER_NAME", "PRO_XTRA_MEMBER", "MANAGED_ACCOUNT"]
+DELIVERY_COLUMNS = [
+    "DATA_ID", "MARKET", "SCHEDULED_DELIVERY_DATE", "WINDOW_START", "WINDOW_END", "VEHICLE_TYPE",
+    "CUSTOMER_ORDER_NUMBER", "SPECIAL_ORDER", "FLOC", "QUANTITY", "WEIGHT", "VOLUME_CUBEFT", "PALLET",
+    "CUSTOMER_NOTES_LLM_SUMMARY", "HISTORIC_NOTES_LLM_SUMMARY", "DESTINATION_ADDRESS", "COMMERCIAL_ADDRESS_FLAG",
+    "BUSINESS_HOURS", "STREET_VIEW_URL", "WTHR_CATEGORY", "PRECIPITATION",
+]
+ITEM_COLUMNS = ["PRODUCT_ID", "PRODUCT_DESCRIPTION"]
+
+# Aggregated customer history summaries, keyed by DATA_ID
+customer_history_cache = TTLCache(ttl_seconds=ORDER_CONTEXT_TTL_SECONDS, max_entries=512)
 
-# Initialize BigQuery client
-bq_client = bigquery.Client(project=PROJECT_ID)
 
 def query_data(sql: str) -> str:
     """Helper function to execute SQL queries on BigQuery."""
     try:
-        query_job = bq_client.query(sql)
-        results = query_job.result()
-        
-        rows = []
-        for row in results:
-            rows.append(dict(row))
-        
-        if not rows:
-            return "No results found"
-        
-        if len(rows) == 1 and len(rows[0]) == 1:
-            return str(list(rows[0].values())[0])
-        else:
-            result_text = ""
-            for i, row in enumerate(rows):
-                if i == 0:
-                    headers = list(row.keys())
-                    result_text += " | ".join(headers) + "\n"
-                    result_text += "-" * len(" | ".join(headers)) + "\n"
-                
-                values = [str(v) for v in row.values()]
-                result_text += " | ".join(values) + "\n"
-            
-            return result_text.strip()
-            
+        return serialize_table(query_arrow(sql), label="query_data")
+
     except Exception as e:
         logger.error(f"BigQuery SQL Error: {str(e)}")
         return f"Error: {str(e)}"
 
-@mcp.tool()
-def query_data_tool(sql: str) -> str:
-    """Execute SQL queries on the BigQuery delivery database."""
-    return query_data(sql)
 
-@mcp.tool()
-def fetch_customer_info(order_id: int) -> str:
-    """Fetch customer information including personal details and addresses."""
-    logger.info(f"Fetching customer info")
-    
+def _query_order_context(order_id: int) -> Dict[str, Any]:
+    """
+    Fetch the order's fact row (with its stored weather) and product ids, then
+    join customer, address and items locally against the cached dimension tables.
+    """
+    logger.info(f"Fetching order context bundle for order_id: {order_id}")
+
     query = f"""
-    SELECT 
-        c.*
+    SELECT
+        {", ".join(f"d.{name}" for name in DELIVERY_QUERY_COLUMNS)},
+        ARRAY(
+            SELECT dp.PRODUCT_ID
+            FROM `{PROJECT_ID}.{DATASET_ID}.delivery_products` dp
+            WHERE dp.DATA_ID = d.DATA_ID
+            ORDER BY dp.PRODUCT_ID
+        ) AS PRODUCT_IDS,
+        w.WTHR_CATEGORY,
+        w.PRECIPITATION
     FROM `{PROJECT_ID}.{DATASET_ID}.deliveries` d
-    JOIN `{PROJECT_ID}.{DATASET_ID}.customers` c
-    ON d.customer_id = c.customer_id
-    WHERE d.DATA_ID = {order_id}
+    LEFT JOIN `{PROJECT_ID}.{DATASET_ID}.weather` w ON w.WEATHER_ID = d.WEATHER_ID
+    WHERE d.DATA_ID = @order_id
     LIMIT 1
     """
 
-    return query_data(query)
+    rows = query_rows(query, {"order_id": int(order_id)})
 
+    if not rows:
+        return {"order_id": int(order_id), "customer": None, "delivery": None, "items": []}
 
-@mcp.tool()
-def fetch_delivery_info(order_id: int) -> str:
-    """Fetches order information."""
-    logger.info(f"Fetching order info for order_id: {order_id}")
-    
-    query = f"""
-    SELECT 
-        d.* EXCEPT (DLVRY_RISK_DECILE, DLVRY_RISK_PERCENTILE, DLVRY_RISK_BUCKET, WEATHER_ID, UNATTENDED_FLAG),
-        a.*
-    FROM `{PROJECT_ID}.{DATASET_ID}.deliveries` d
-    JOIN `{PROJECT_ID}.{DATASET_ID}.addresses` a
-        ON d.address_id = a.address_id
-    WHERE d.DATA_ID = {order_id}
-    """
-
-    return query_data(query)
+    delivery = rows[0]
+    product_ids = delivery.pop("PRODUCT_IDS") or []
+    address = dimensions.addresses.get(delivery["ADDRESS_ID"]) or {}
+    delivery.update((name, value) for name, value in address.items() if name != "ADDRESS_ID")
+    return {
+        "order_id": int(order_id),
+        "customer": dimensions.customers.get(delivery["CUSTOMER_ID"]),
+        "delivery": delivery,
+        "items": dimensions.products.rows(product_ids),
+    }
 
 
+def get_order_context(order_id: int) -> Dict[str, Any]:
+    """
+    Return the order context bundle for `order_id`.
 
-@mcp.tool()
-def delivery_item_info(order_id: int) -> str:
-    """Fetch delivery items information."""
-    logger.info(f"Fetching items for order_id: {order_id}")
-    
-    query = f"""
-    SELECT 
-        p.*
-    FROM `{PROJECT_ID}.{DATASET_ID}.delivery_products` d
-    JOIN `{PROJECT_ID}.{DATASET_ID}.products` p
-        ON d.PRODUCT_ID = p.PRODUCT_ID
-    WHERE d.DATA_ID = {order_id}
+    The bundle is fetched once and memoized, so every agent and tool in the
+    same pipeline run reads the cached copy instead of issuing its own query.
+    Concurrent callers for the same order wait on a single fetch.
     """
+    return order_context_cache.get_or_compute(int(order_id), lambda: _query_order_context(order_id))
 
-    return query_data(query)
 
-@mcp.tool()
-def fetch_customer_history(order_id: int) -> str:
-    """Fetch all past orders, deliveries, and delivery attempts for a customer."""
-    logger.info(f"Fetching customer history for order_id: {order_id}")
-    
-    query = f"""
-    SELECT d2.*
-    FROM (
-        SELECT customer_id
-        FROM `{PROJECT_ID}.{DATASET_ID}.deliveries`
-        WHERE DATA_ID = {order_id}
-    ) AS t1
-    JOIN `{PROJECT_ID}.{DATASET_ID}.deliveries` d2
-        ON t1.customer_id = d2.customer_id
-        WHERE DATA_ID !={order_id}
+def get_customer_history(order_id: int) -> str:
+    """Aggregated history of the customer of `order_id` (memoized like the order context)."""
+    return customer_history_cache.get_or_compute(
+        int(order_id), lambda: format_customer_history(query_customer_history(order_id))
+    )
 
-    """
 
+def format_order_context(bundle: Dict[str, Any]) -> str:
+    """Render an order context bundle as labeled sections for the agents."""
+    customer = [bundle["customer"]] if bundle["customer"] else []
+    delivery = [bundle["delivery"]] if bundle["delivery"] else []
+    return "\n\n".join([
+        f"## Customer\n{serialize_rows(customer, columns=CUSTOMER_COLUMNS, label='customer')}",
+        f"## Delivery\n{serialize_rows(delivery, columns=DELIVERY_COLUMNS, label='delivery')}",
+        f"## Items\n{serialize_rows(bundle['items'], columns=ITEM_COLUMNS, label='items')}",
+        f"## Customer History\n{get_customer_history(bundle['order_id'])}",
+    ])
 
 
-    return query_data(query)
+@mcp.tool()
+def query_data_tool(sql: str) -> str:
+    """Execute SQL queries (BigQuery dialect) on the delivery database."""
+    return query_data(sql)
 
+@mcp.tool()
+def fetch_order_context(order_id: int) -> str:
+    """Fetch customer, delivery and address, items and customer history for an order in one call."""
+    logger.info(f"Fetching order context for order_id: {order_id}")
+    try:
+        return format_order_context(get_order_context(order_id))
+    except Exception as e:
+        logger.error(f"BigQuery SQL Error: {str(e)}")
+        return f"Error: {str(e)}"
+
+@mcp.tool()
+def fetch_customer_info(order_id: int) -> str:
+    """Fetch customer information including personal details and addresses."""
+    logger.info(f"Fetching customer info")
+    try:
+        customer = get_order_context(order_id)["customer"]
+        return serialize_rows([customer] if customer else [], columns=CUSTOMER_COLUMNS, label='customer')
+    except Exception as e:
+        logger.error(f"BigQuery SQL Error: {str(e)}")
+        return f"Error: {str(e)}"
 
 
+@mcp.tool()
+def fetch_delivery_info(order_id: int) -> str:
+    """Fetches order information."""
+    logger.info(f"Fetching order info for order_id: {order_id}")
+    try:
+        delivery = get_order_context(order_id)["delivery"]
+        return serialize_rows([delivery] if delivery else [], columns=DELIVERY_COLUMNS, label='delivery')
+    except Exception as e:
+        logger.error(f"BigQuery SQL Error: {str(e)}")
+        return f"Error: {str(e)}"
 
- 
 
 
+@mcp.tool()
+def delivery_item_info(order_id: int) -> str:
+    """Fetch delivery items information."""
+    logger.info(f"Fetching items for order_id: {order_id}")
+    try:
+        return serialize_rows(get_order_context(order_id)["items"], columns=ITEM_COLUMNS, label="items")
+    except Exception as e:
+        logger.error(f"BigQuery SQL Error: {str(e)}")
+        return f"Error: {str(e)}"
 
+@mcp.tool()
+def fetch_customer_history(order_id: int) -> str:
+    """Fetch a customer's delivery history aggregated into counts by risk, issue and reschedule, window patterns and the last attempts."""
+    logger.info(f"Fetching customer history for order_id: {order_id}")
+    try:
+        return get_customer_history(order_id)
+    except Exception as e:
+        logger.error(f"BigQuery SQL Error: {str(e)}")
+        return f"Error: {str(e)}"
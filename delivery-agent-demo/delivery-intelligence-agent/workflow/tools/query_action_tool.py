@@ -1,41 +1,36 @@
 from workflow.mcp.mcp_server import mcp
 from loguru import logger
 from typing import Any, Dict, List
-from google.cloud import bigquery
 import os
 from workflow.utils.config import PROJECT_ID,DATASET_ID
+from workflow.utils.query_backends import get_query_backend
+from workflow.utils.query_engine import query_arrow, serialize_table
 
 TABLE_ID="action_update"
 FULL_TABLE_NAME = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
-bq_client = bigquery.Client(project=PROJECT_ID)
+
+# action_update columns returned to the model; SUMMARY (the full case card text) is left out
+ACTION_COLUMNS = ["DATA_ID", "CUSTOMER_ID", "CUSTOMER_NAME", "UPDATED_AT", "RESCHEDULED", "MESSAGE"]
+ACTION_TABLE_COLUMNS = ACTION_COLUMNS + ["SUMMARY"]
+
+
+def result_columns(names: List[str]) -> List[str]:
+    """Result columns to return: the ACTION_COLUMNS, plus computed columns (counts, aliases) of the query."""
+    return [name for name in names if name.upper() in ACTION_COLUMNS or name.upper() not in ACTION_TABLE_COLUMNS]
+
 
 @mcp.tool()
 def query_action_tool(sql: str) -> str:
     """
     Execute SELECT or UPDATE SQL queries on the BigQuery action_update table.
-    Allows full access to all columns including 'rescheduled' and 'updated_at'.
+    Returns DATA_ID, CUSTOMER_ID, CUSTOMER_NAME, UPDATED_AT, RESCHEDULED and MESSAGE (not SUMMARY).
     """
     logger.info(f"Executing SQL query: {sql}")
     try:
-        query_job = bq_client.query(sql)
-        results = query_job.result()
+        table = query_arrow(sql)
 
         if sql.strip().lower().startswith("select"):
-            rows = [dict(row) for row in results]
-            if not rows:
-                return "No results found"
-
-            if len(rows) == 1 and len(rows[0]) == 1:
-                return str(list(rows[0].values())[0])
-            else:
-                result_text = ""
-                for i, row in enumerate(rows):
-                    if i == 0:
-                        headers = list(row.keys())
-                        result_text += " | ".join(headers) + "\n"
-                        result_text += "-" * len(" | ".join(headers)) + "\n"
-                    result_text += " | ".join(str(v) for v in row.values()) + "\n"
-                return result_text.strip()
+            return serialize_table(table, columns=result_columns(table.column_names), label="query_action_tool")
 
         elif sql.strip().lower().startswith("update"):
             return "Update successful."
@@ -52,14 +47,14 @@ def get_action_table_info() -> str:
     """Get schema information for the walmart sales table."""
     logger.info("Getting BigQuery table schema information")
     try:
-        table = bq_client.get_table(FULL_TABLE_NAME)
+        num_rows, columns = get_query_backend().table_info(TABLE_ID)
         
         schema_info = f"Table: {FULL_TABLE_NAME}\n"
-        schema_info += f"Total Rows: {table.num_rows:,}\n"
+        schema_info += f"Total Rows: {num_rows:,}\n"
         schema_info += "Columns:\n"
         
-        for field in table.schema:
-            schema_info += f"  - {field.name}: {field.field_type}\n"
+        for name, field_type in columns:
+            schema_info += f"  - {name}: {field_type}\n"
         
         return schema_info
         
@@ -0,0 +1,61 @@
+from loguru import logger
+
+from workflow.utils.config import PROJECT_ID, DATASET_ID
+from workflow.utils.query_engine import query_rows, serialize_rows
+from workflow.services.dimension_cache import dimensions
+from workflow.services.route_analysis import analyze_delivery_route, analyze_floc_day, format_route_risk
+from workflow.tools.order_information_tool import get_order_context
+from workflow.mcp.mcp_server import mcp
+
+
+@mcp.tool()
+def analyze_delivery_route_tool(order_id: int) -> str:
+    """Traffic delay, drive time and restricted-road flags for the leg from the facility (FLOC) to an order's address."""
+    logger.info(f"Analyzing route for order_id: {order_id}")
+    try:
+        delivery = get_order_context(order_id)["delivery"]
+        if not delivery:
+            return "No results found"
+        return format_route_risk(analyze_delivery_route(delivery))
+    except Exception as e:
+        logger.error(f"Route analysis error: {str(e)}")
+        return f"Error: {str(e)}"
+
+
+@mcp.tool()
+def analyze_floc_routes(floc: int, date: str) -> str:
+    """Drive times and traffic delays from a facility (FLOC) to all of its stops on a date (YYYY-MM-DD), using batched distance-matrix requests."""
+    logger.info(f"Analyzing routes for FLOC {floc} on {date}")
+    try:
+        deliveries = query_rows(f"""
+        SELECT DATA_ID, FLOC, SCHEDULED_DELIVERY_DATE, WINDOW_START, ADDRESS_ID
+        FROM `{PROJECT_ID}.{DATASET_ID}.deliveries`
+        WHERE FLOC = @floc AND CAST(SCHEDULED_DELIVERY_DATE AS STRING) = @date
+        ORDER BY WINDOW_START, DATA_ID
+        """, {"floc": int(floc), "date": date})
+        if not deliveries:
+            return "No results found"
+
+        for delivery in deliveries:
+            address = dimensions.addresses.get(delivery["ADDRESS_ID"]) or {}
+            delivery["STREET_VIEW_URL"] = address.get("STREET_VIEW_URL")
+            delivery["DESTINATION_ADDRESS"] = address.get("DESTINATION_ADDRESS")
+        legs = analyze_floc_day(floc, deliveries)
+
+        flagged = [leg for leg in legs if leg["flags"]]
+        delays = [leg["delay_min"] for leg in legs if leg.get("status") == "OK"]
+        lines = [
+            f"Stops: {len(deliveries)} ({len(legs)} routable)",
+            f"Average traffic delay: {sum(delays) / len(delays):.1f} min" if delays else "Average traffic delay: n/a",
+            f"Stops flagged: {len(flagged)}",
+        ]
+        if flagged:
+            lines.append(serialize_rows(
+                [{**leg, "flags": ", ".join(leg["flags"])} for leg in flagged],
+                columns=["DATA_ID", "departure", "distance_km", "traffic_duration_min", "delay_min", "flags"],
+                label="floc_routes",
+            ))
+        return "\n".join(lines)
+    except Exception as e:
+        logger.error(f"Route analysis error: {str(e)}")
+        return f"Error: {str(e)}"
@@ -1,48 +1,40 @@
 from loguru import logger
-import requests
 from typing import Any, Dict, List
-from workflow.services.street_image_analysis import analyze_streetview_from_url
-import asyncio
+from workflow.services.street_image_analysis import ROAD_ANALYSIS_PROMPT, artifact_directory
+from workflow.services.street_image_analysis_async import analyze_streetview_from_url
+from workflow.utils.config import PREFETCH_WAIT_SECONDS
+from workflow.utils.prefetch_store import prefetch_store, streetview_key
 from workflow.mcp.mcp_server import mcp
 import time
 
 @mcp.tool()
-def street_view_(url: str) -> str:
+async def street_view_(url: str, order_id: str = "") -> str:
     """
-    Analyze street view from URL with proper error handling and timeout management
+    Analyze street view from URL with proper error handling and timeout management.
+    Pass the order_id so the image is stored with that order.
     """
     logger.info(f"Analyzing street view for delivery")
     try:
-        # Custom prompt focusing on road width
-        road_prompt = """
-        Look at this street and tell me:
-        1. How wide is this road? (narrow/medium/wide)
-        2. How many lanes?
-        3. Can delivery trucks navigate easily?
-        4. Any width restrictions or obstacles?
-        5. Parking availability on sides?
+        # Reject a bad order_id before any download or vision call is spent on it
+        artifact_directory(order_id)
+        start_time = time.time()
         
-        Give me practical details for delivery planning.
-        """
+        # A prefetch started when the order id was entered may already hold (or be producing) this result
+        result = await prefetch_store.wait(streetview_key(url), PREFETCH_WAIT_SECONDS)
+        if result is not None:
+            logger.info("Street view analysis served from prefetch")
+        else:
+            # Runs on the server's event loop, so other tool calls are served while this one waits
+            result = await analyze_streetview_from_url(url, ROAD_ANALYSIS_PROMPT, order_id or None)
         
-        # Set a longer timeout for the analysis
-        start_time = time.time()
+        elapsed_time = time.time() - start_time
+        logger.info(f"Street view analysis completed in {elapsed_time:.2f} seconds")
         
-        # Analyze with timeout handling
-        try:
-            result = analyze_streetview_from_url(url, road_prompt)
-            
-            elapsed_time = time.time() - start_time
-            print(f"Street view analysis completed in {elapsed_time:.2f} seconds")
-            
-            if result and result.get('success'):
-                return f"AI analysis: {result['analysis']}, Location: {result['coordinates']}"
-            else:
-                error_msg = result.get('error', 'Unknown error occurred') if result else 'No result returned'
-                return f"Street view analysis failed: {error_msg}"
-                
-        except Exception as analysis_error:
-            return f"Street view analysis error: {str(analysis_error)}"
+        if result and result.get('success'):
+            return f"AI analysis: {result['analysis']}, Location: {result['coordinates']}"
+        else:
+            error_msg = result.get('error', 'Unknown error occurred') if result else 'No result returned'
+            return f"Street view analysis failed: {error_msg}"
             
     except Exception as e:
         # Return a clean error string without disrupting the flow
@@ -0,0 +1,77 @@
+from collections import Counter
+
+from loguru import logger
+
+from workflow.utils.config import PROJECT_ID, DATASET_ID
+from workflow.utils.query_engine import query_rows, serialize_rows
+from workflow.services.dimension_cache import dimensions
+from workflow.services.vehicle_capacity import evaluate_deliveries, format_capacity
+from workflow.tools.order_information_tool import get_order_context
+from workflow.mcp.mcp_server import mcp
+
+
+@mcp.tool()
+def evaluate_vehicle_capacity(order_id: int) -> str:
+    """Compute weight/volume/pallet utilization of the assigned vehicle, the smallest fitting vehicle and site access compatibility for an order."""
+    logger.info(f"Evaluating vehicle capacity for order_id: {order_id}")
+    try:
+        delivery = get_order_context(order_id)["delivery"]
+        if not delivery:
+            return "No results found"
+        return "\n".join(format_capacity(evaluate_deliveries([delivery])[0]))
+    except Exception as e:
+        logger.error(f"Vehicle capacity error: {str(e)}")
+        return f"Error: {str(e)}"
+
+
+@mcp.tool()
+def evaluate_fleet_capacity(date: str) -> str:
+    """
+    Check vehicle capacity for every delivery scheduled on a date (YYYY-MM-DD) and list the orders whose
+    assigned vehicle is overloaded or unsuited to the site, with the vehicle to use instead.
+    """
+    logger.info(f"Evaluating fleet capacity for {date}")
+    try:
+        deliveries = query_rows(f"""
+        SELECT DATA_ID, VEHICLE_TYPE, WEIGHT, VOLUME_CUBEFT, PALLET, ADDRESS_ID,
+               CUSTOMER_NOTES, CUSTOMER_NOTES_LLM_SUMMARY, HISTORIC_NOTES_LLM_SUMMARY
+        FROM `{PROJECT_ID}.{DATASET_ID}.deliveries`
+        WHERE CAST(SCHEDULED_DELIVERY_DATE AS STRING) = @date
+        ORDER BY DATA_ID
+        """, {"date": date})
+        if not deliveries:
+            return "No results found"
+
+        addresses = dimensions.addresses
+        for delivery in deliveries:
+            address = addresses.get(delivery["ADDRESS_ID"]) or {}
+            delivery["STRT_VW_IMG_DSCRPTN"] = address.get("STRT_VW_IMG_DSCRPTN")
+            delivery["COMMERCIAL_ADDRESS_FLAG"] = address.get("COMMERCIAL_ADDRESS_FLAG")
+        summaries = evaluate_deliveries(deliveries)
+
+        changes = [
+            {
+                "DATA_ID": delivery["DATA_ID"],
+                "CURRENT": summary["current_vehicle"],
+                "RECOMMENDED": summary["recommended_vehicle"],
+                "FITS_CURRENT": summary["fits_current_vehicle"],
+                "MAX_UTILIZATION": f"{max(summary['current_utilization'].values(), default=0):.1%}",
+                "ACCESS_FLAGS": ", ".join(summary["access_flags"]),
+            }
+            for delivery, summary in zip(deliveries, summaries)
+            if summary["recommended_vehicle"] != summary["current_vehicle"]
+        ]
+        recommended = Counter(summary["recommended_vehicle"] for summary in summaries)
+        lines = [
+            f"Orders: {len(summaries)}",
+            f"Overloaded for assigned vehicle: {sum(not s['fits_current_vehicle'] for s in summaries)}",
+            f"Access conflicts: {sum(s['access_conflict'] for s in summaries)}",
+            f"Recommended vehicles: {', '.join(f'{name} {n}' for name, n in recommended.most_common())}",
+            f"Orders needing a different vehicle: {len(changes)}",
+        ]
+        if changes:
+            lines.append(serialize_rows(changes, label="fleet_capacity"))
+        return "\n".join(lines)
+    except Exception as e:
+        logger.error(f"Fleet capacity error: {str(e)}")
+        return f"Error: {str(e)}"
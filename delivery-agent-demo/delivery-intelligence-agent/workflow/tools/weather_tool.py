@@ -1,37 +1,145 @@
 from workflow.mcp.mcp_server import mcp
 from loguru import logger
+import asyncio
 import requests
-from typing import Any, Dict, List
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from workflow.utils.config import WEATHER_TIMEOUT, WEATHER_CACHE_TTL_SECONDS, WEATHER_GRID_DEGREES, PREFETCH_WAIT_SECONDS
+from workflow.utils.clients import get_http_session
+from workflow.utils.prefetch_store import prefetch_store, weather_key
+from workflow.utils.ttl_cache import TTLCache
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+DAILY_FIELDS = "temperature_2m_max,temperature_2m_min,precipitation_sum,weathercode"
+# Locations sent in one multi-location Open-Meteo request
+MAX_LOCATIONS_PER_REQUEST = 100
+
+# Daily forecasts keyed by (grid cell, date); orders in the same neighbourhood share an entry
+weather_cache = TTLCache(ttl_seconds=WEATHER_CACHE_TTL_SECONDS, max_entries=50000)
+
+
+def grid_cell(lat, lon) -> Tuple[int, int]:
+    """Snap coordinates to the forecast grid cell they fall in."""
+    return round(float(lat) / WEATHER_GRID_DEGREES), round(float(lon) / WEATHER_GRID_DEGREES)
+
+
+def weather_cache_key(lat, lon, date: str) -> Tuple[int, int, str]:
+    return (*grid_cell(lat, lon), str(date))
+
+
+def _cell_center(cell: Tuple[int, int]) -> Tuple[float, float]:
+    return round(cell[0] * WEATHER_GRID_DEGREES, 4), round(cell[1] * WEATHER_GRID_DEGREES, 4)
+
+
+def _request_forecasts(cells: List[Tuple[int, int]], date: str) -> List[Optional[Dict[str, Any]]]:
+    """One multi-location Open-Meteo request for a single date; returns one daily record per cell."""
+    centers = [_cell_center(cell) for cell in cells]
+    params = {
+        "latitude": ",".join(str(lat) for lat, _ in centers),
+        "longitude": ",".join(str(lon) for _, lon in centers),
+        "daily": DAILY_FIELDS,
+        "start_date": date,
+        "end_date": date,
+        "timezone": "auto",
+    }
+    response = get_http_session().get(OPEN_METEO_URL, params=params, timeout=WEATHER_TIMEOUT)
+    response.raise_for_status()
+
+    data = response.json()
+    locations = data if isinstance(data, list) else [data]
+    days = []
+    for location in locations:
+        daily = location.get("daily", {})
+        if not daily or not daily.get("time"):
+            days.append(None)
+            continue
+        days.append({field: daily[field][0] for field in DAILY_FIELDS.split(",")})
+    return days
+
+
+def fetch_daily_forecasts(points: List[Tuple[Any, Any, str]]) -> Dict[Tuple[int, int, str], Optional[Dict[str, Any]]]:
+    """
+    Daily forecasts for many (lat, lon, date) points.
+
+    Points are snapped to grid cells and served from the cache where possible;
+    the remaining cells are fetched with one multi-location request per date
+    (chunked at MAX_LOCATIONS_PER_REQUEST). Returns a dict keyed by
+    `weather_cache_key(lat, lon, date)`; a value of None means no forecast
+    (not cached, so it is requested again next time).
+    """
+    results = {}
+    missing = defaultdict(set)
+    for lat, lon, date in points:
+        key = weather_cache_key(lat, lon, date)
+        if key in weather_cache:
+            results[key] = weather_cache.get(key)
+        else:
+            missing[key[2]].add(key[:2])
+
+    for date, cells in missing.items():
+        cells = sorted(cells)
+        for start in range(0, len(cells), MAX_LOCATIONS_PER_REQUEST):
+            chunk = cells[start:start + MAX_LOCATIONS_PER_REQUEST]
+            logger.info(f"Fetching weather forecast for {date} at {len(chunk)} locations")
+            for cell, day in zip(chunk, _request_forecasts(chunk, date)):
+                key = (*cell, date)
+                # A missing day is not cached, so a later call asks again
+                if day is not None:
+                    weather_cache.set(key, day)
+                results[key] = day
+
+    return results
+
+
+def format_forecast(date: str, day: Optional[Dict[str, Any]]) -> str:
+    if not day:
+        return "No forecast available for that date."
+    return (
+        f"Forecast for {date}:\n"
+        f"Max Temp: {day['temperature_2m_max']}°C\n"
+        f"Min Temp: {day['temperature_2m_min']}°C\n"
+        f"Precipitation: {day['precipitation_sum']} mm\n"
+        f"Weather Code: {day['weathercode']}"
+    )
+
 
 @mcp.tool()
-def get_weather_forecast(lat: str, lon: str, date: str) -> str:
+async def get_weather_forecast(lat: str, lon: str, date: str) -> str:
     """
     Fetches daily weather forecast for a specific date (YYYY-MM-DD) from Open-Meteo API.
     Only works for up to 16 days ahead (forecast) or historical (with premium support).
     """
     logger.info(f"Fetching weather forecast for {date} at lat={lat}, lon={lon}")
-    
-    url = (
-        f"https://api.open-meteo.com/v1/forecast"
-        f"?latitude={lat}&longitude={lon}"
-        f"&daily=temperature_2m_max,temperature_2m_min,precipitation_sum,weathercode"
-        f"&start_date={date}&end_date={date}&timezone=auto"
-    )
-    
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        daily = data.get("daily", {})
-        if not daily or not daily.get("time"):
-            return "No forecast available for that date."
-
-        idx = 0  # always first element as we requested one day
-        return (
-            f"Forecast for {date}:\n"
-            f"Max Temp: {daily['temperature_2m_max'][idx]}°C\n"
-            f"Min Temp: {daily['temperature_2m_min'][idx]}°C\n"
-            f"Precipitation: {daily['precipitation_sum'][idx]} mm\n"
-            f"Weather Code: {daily['weathercode'][idx]}"
+    try:
+        key = weather_cache_key(lat, lon, date)
+        if key not in weather_cache:
+            # Forecast prefetched when the order id was entered (possibly still in flight)
+            prefetched = await prefetch_store.wait(weather_key(key), PREFETCH_WAIT_SECONDS)
+            if prefetched is not None and prefetched.get("forecast") is not None:
+                weather_cache.set(key, prefetched["forecast"])
+        forecasts = await asyncio.to_thread(fetch_daily_forecasts, [(lat, lon, date)])
+        return format_forecast(date, forecasts[key])
+    except requests.HTTPError as e:
+        return f"Weather API error: {e.response.status_code}"
+    except Exception as e:
+        return f"Weather API error: {str(e)}"
+
+
+@mcp.tool()
+def get_weather_forecast_bulk(locations: List[Dict[str, str]]) -> str:
+    """
+    Fetches daily weather forecasts for many deliveries at once.
+    `locations` is a list of {"lat": ..., "lon": ..., "date": "YYYY-MM-DD"} items.
+    """
+    logger.info(f"Fetching weather forecasts for {len(locations)} locations")
+    try:
+        points = [(loc["lat"], loc["lon"], loc["date"]) for loc in locations]
+        forecasts = fetch_daily_forecasts(points)
+        return "\n\n".join(
+            f"Location {lat},{lon}\n{format_forecast(date, forecasts[weather_cache_key(lat, lon, date)])}"
+            for lat, lon, date in points
         )
-    else:
-        return f"Weather API error: {response.status_code}"
+    except requests.HTTPError as e:
+        return f"Weather API error: {e.response.status_code}"
+    except Exception as e:
+        return f"Weather API error: {str(e)}"
@@ -0,0 +1,33 @@
+"""Helpers for attaching ADK callbacks to agents that may already define some."""
+from typing import Any, Callable, Iterator
+
+from google.adk.agents import BaseAgent
+
+
+def add_callback(agent: BaseAgent, field: str, callback: Callable[..., Any], first: bool = False) -> None:
+    """
+    Add `callback` to `agent.<field>` without replacing existing callbacks.
+
+    ADK runs a callback list in order and stops at the first one that returns a
+    value, so observers that must see every call are added with `first=True`.
+    """
+    existing = getattr(agent, field, None)
+    if existing is None:
+        callbacks = []
+    elif isinstance(existing, list):
+        callbacks = list(existing)
+    else:
+        callbacks = [existing]
+
+    if first:
+        callbacks.insert(0, callback)
+    else:
+        callbacks.append(callback)
+    setattr(agent, field, callbacks)
+
+
+def walk_agents(root: BaseAgent) -> Iterator[BaseAgent]:
+    """Yield `root` and every agent below it."""
+    yield root
+    for sub_agent in root.sub_agents:
+        yield from walk_agents(sub_agent)
@@ -0,0 +1,109 @@
+"""
+Lazily created clients shared by every tool in the process.
+
+Heavy SDKs (BigQuery, OpenAI, httpx) are imported on first use, so starting the
+MCP tool server does not pay for clients that a run never touches.
+"""
+import threading
+from typing import Any, Callable, Dict
+
+from workflow.utils.config import (
+    PROJECT_ID,
+    OPENAI_API_KEY,
+    STREETVIEW_CONNECT_TIMEOUT,
+    STREETVIEW_DOWNLOAD_TIMEOUT,
+    VISION_TIMEOUT,
+    HTTP_POOL_SIZE,
+)
+
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def _get_or_create(name: str, factory: Callable[[], Any]) -> Any:
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+    return client
+
+
+def get_bigquery_client():
+    """Shared BigQuery client for all tools"""
+    def factory():
+        from google.cloud import bigquery
+        return bigquery.Client(project=PROJECT_ID)
+    return _get_or_create("bigquery", factory)
+
+
+def get_http_session():
+    """Shared keep-alive requests session with retries"""
+    def factory():
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+        ))
+        return session
+    return _get_or_create("http_session", factory)
+
+
+def _pool_limits():
+    import httpx
+    return httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE, keepalive_expiry=60)
+
+
+def get_async_http_client():
+    """Shared keep-alive async HTTP client for Street View downloads"""
+    client = _clients.get("async_http")
+    if client is not None and client.is_closed:
+        _clients.pop("async_http", None)
+
+    def factory():
+        import httpx
+        return httpx.AsyncClient(
+            limits=_pool_limits(),
+            timeout=httpx.Timeout(
+                connect=STREETVIEW_CONNECT_TIMEOUT,
+                read=STREETVIEW_DOWNLOAD_TIMEOUT,
+                write=STREETVIEW_CONNECT_TIMEOUT,
+                pool=STREETVIEW_CONNECT_TIMEOUT,
+            ),
+        )
+    return _get_or_create("async_http", factory)
+
+
+def get_async_openai_client():
+    """Shared async OpenAI client with its own keep-alive pool"""
+    def factory():
+        import httpx
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            timeout=httpx.Timeout(
+                connect=STREETVIEW_CONNECT_TIMEOUT,
+                read=VISION_TIMEOUT,
+                write=STREETVIEW_CONNECT_TIMEOUT,
+                pool=STREETVIEW_CONNECT_TIMEOUT,
+            ),
+            http_client=httpx.AsyncClient(limits=_pool_limits()),
+        )
+    return _get_or_create("async_openai", factory)
+
+
+async def close_async_clients():
+    """Close the shared async clients (call on server shutdown)"""
+    http_client = _clients.pop("async_http", None)
+    if http_client is not None:
+        await http_client.aclose()
+    openai_client = _clients.pop("async_openai", None)
+    if openai_client is not None:
+        await openai_client.close()
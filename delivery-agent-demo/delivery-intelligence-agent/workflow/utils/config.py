@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -21,3 +22,131 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = os.getenv("GOOGLE_GENAI_USE_VERTEXAI", "True")
 os.environ["GOOGLE_CLOUD_PROJECT"] =PROJECT_ID
 os.environ["GOOGLE_CLOUD_LOCATION"] =LOCATION
+
+# Order context bundle memoization (seconds a fetched bundle is reused)
+ORDER_CONTEXT_TTL_SECONDS = float(os.getenv("ORDER_CONTEXT_TTL_SECONDS", "900"))
+
+# Street View image / vision analysis cache
+STREETVIEW_CACHE_DIR = os.getenv("STREETVIEW_CACHE_DIR", ".cache/streetview")
+STREETVIEW_CACHE_MAX_MB = float(os.getenv("STREETVIEW_CACHE_MAX_MB", "500"))
+STREETVIEW_CACHE_TTL_HOURS = float(os.getenv("STREETVIEW_CACHE_TTL_HOURS", "168"))
+
+# Street View / vision client timeouts (seconds) and connection pool size
+STREETVIEW_CONNECT_TIMEOUT = float(os.getenv("STREETVIEW_CONNECT_TIMEOUT", "5"))
+STREETVIEW_DOWNLOAD_TIMEOUT = float(os.getenv("STREETVIEW_DOWNLOAD_TIMEOUT", "30"))
+VISION_TIMEOUT = float(os.getenv("VISION_TIMEOUT", "60"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+
+# Street View image artifacts (one directory per order, removed after the TTL) and vision payload size budget
+STREETVIEW_ARTIFACT_DIR = os.getenv("STREETVIEW_ARTIFACT_DIR", ".cache/streetview/orders")
+STREETVIEW_ARTIFACT_TTL_HOURS = float(os.getenv("STREETVIEW_ARTIFACT_TTL_HOURS", "168"))
+STREETVIEW_MAX_IMAGE_BYTES = int(os.getenv("STREETVIEW_MAX_IMAGE_BYTES", str(1024 * 1024)))
+
+# Weather forecast client: request timeout, cache lifetime and grid snapping (degrees, ~5 km)
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "10"))
+WEATHER_CACHE_TTL_SECONDS = float(os.getenv("WEATHER_CACHE_TTL_SECONDS", "3600"))
+WEATHER_GRID_DEGREES = float(os.getenv("WEATHER_GRID_DEGREES", "0.05"))
+
+# Speculative prefetch of the Street View analysis and weather forecast as soon as an order id is
+# entered: on/off, result directory shared with the tool server, result lifetime and how long a
+# tool waits for a prefetch that is still running
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+PREFETCH_DIR = os.getenv("PREFETCH_DIR", ".cache/prefetch")
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "1800"))
+PREFETCH_WAIT_SECONDS = float(os.getenv("PREFETCH_WAIT_SECONDS", "45"))
+
+# Route analysis: Maps API base URL (benchmarks/maps_stub_server.py for offline runs), facility
+# locations as JSON {"FLOC": "lat,lng" or address}, leg cache and the traffic delay worth flagging
+MAPS_API_BASE_URL = os.getenv("MAPS_API_BASE_URL", "https://maps.googleapis.com/maps/api")
+MAPS_TIMEOUT = float(os.getenv("MAPS_TIMEOUT", "10"))
+FLOC_LOCATIONS = json.loads(os.getenv("FLOC_LOCATIONS", "{}"))
+ROUTE_CACHE_TTL_SECONDS = float(os.getenv("ROUTE_CACHE_TTL_SECONDS", "3600"))
+ROUTE_GRID_DEGREES = float(os.getenv("ROUTE_GRID_DEGREES", "0.005"))
+ROUTE_DELAY_THRESHOLD_MINUTES = float(os.getenv("ROUTE_DELAY_THRESHOLD_MINUTES", "15"))
+# Off: RouteRiskAgent makes no Maps calls (the replay benchmark and fixture recording turn it off)
+ROUTE_ANALYSIS_ENABLED = os.getenv("ROUTE_ANALYSIS_ENABLED", "true").lower() == "true"
+
+# MCP tool server connection: "stdio" spawns tools_server.py per toolset, "http" connects
+# to one shared streamable-HTTP server (python workflow/mcp/tools_server.py --transport streamable-http)
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://127.0.0.1:8765/mcp")
+MCP_TIMEOUT_SECONDS = float(os.getenv("MCP_TIMEOUT_SECONDS", "15"))
+# Per-tool overrides of MCP_TIMEOUT_SECONDS, as JSON: {"tool_name": seconds}
+MCP_TOOL_TIMEOUTS = json.loads(os.getenv("MCP_TOOL_TIMEOUTS", '{"street_view_": 100}'))
+# Script and arguments of the stdio tool server, as JSON (e.g. the replay stub server)
+MCP_SERVER_ARGS = json.loads(os.getenv("MCP_SERVER_ARGS", '["workflow/mcp/tools_server.py"]'))
+
+# Write-behind action_update writer: rows per batch and max seconds a row waits before flush
+ACTION_WRITE_BATCH_SIZE = int(os.getenv("ACTION_WRITE_BATCH_SIZE", "50"))
+ACTION_WRITE_FLUSH_SECONDS = float(os.getenv("ACTION_WRITE_FLUSH_SECONDS", "2"))
+# Insert attempts per action_update row before it is moved to the dead-letter file (JSON lines)
+ACTION_WRITE_MAX_ATTEMPTS = int(os.getenv("ACTION_WRITE_MAX_ATTEMPTS", "5"))
+ACTION_DEAD_LETTER_PATH = os.getenv("ACTION_DEAD_LETTER_PATH", ".cache/action_update_dead_letter.jsonl")
+
+# Local index of processed orders: journal shared with the tool server, BigQuery refresh interval
+PROCESSED_INDEX_PATH = os.getenv("PROCESSED_INDEX_PATH", ".cache/processed_orders.log")
+PROCESSED_INDEX_REFRESH_SECONDS = float(os.getenv("PROCESSED_INDEX_REFRESH_SECONDS", "300"))
+# Seconds before the watermark that each refresh re-reads (same-second and late streaming-buffer rows)
+PROCESSED_INDEX_OVERLAP_SECONDS = float(os.getenv("PROCESSED_INDEX_OVERLAP_SECONDS", "600"))
+
+# Query backend for the SQL tools: "bigquery", or "duckdb" to load the normalized_tables
+# CSVs / Parquet exports into an embedded database (DUCKDB_PATH ":memory:" or a file)
+QUERY_BACKEND = os.getenv("QUERY_BACKEND", "bigquery")
+LOCAL_DATA_DIR = os.getenv("LOCAL_DATA_DIR", "../setup_data/normalized_tables")
+DUCKDB_PATH = os.getenv("DUCKDB_PATH", ":memory:")
+# DuckDB backend: action_update rows are appended to JSON lines files here, shared by every process
+LOCAL_WRITE_DIR = os.getenv("LOCAL_WRITE_DIR", ".cache/local_writes")
+
+# Seconds the products / addresses / customers snapshots are used before checking the source for changes
+DIMENSION_CACHE_TTL_SECONDS = float(os.getenv("DIMENSION_CACHE_TTL_SECONDS", "3600"))
+
+# Result serialization for the SQL tools
+QUERY_MAX_ROWS = int(os.getenv("QUERY_MAX_ROWS", "50"))
+QUERY_MAX_TEXT_CHARS = int(os.getenv("QUERY_MAX_TEXT_CHARS", "400"))
+
+# Batch case-card generation
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_CHECKPOINT_PATH = os.getenv("BATCH_CHECKPOINT_PATH", ".cache/batch_checkpoint.jsonl")
+
+# Session storage: "memory" or "sqlite", plus lifecycle limits
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_URL = os.getenv("SESSION_DB_URL", "sqlite+aiosqlite:///.cache/sessions.db")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "200"))
+SESSION_KEEP_STATE_KEYS = [
+    key.strip()
+    for key in os.getenv(
+        "SESSION_KEEP_STATE_KEYS",
+        "order_id,risk_analysis,email_for_customer,case_card_summary,pipeline_stage_timings,pipeline_critical_path,"
+        "pipeline_fallbacks",
+    ).split(",")
+    if key.strip()
+]
+# Stable user id, so persisted action-table sessions are found again after a restart
+SESSION_USER_ID = os.getenv("SESSION_USER_ID", "delivery_ops")
+
+# Aggregated customer history: recent deliveries listed, optional materialized summary table
+HISTORY_RECENT_ATTEMPTS = int(os.getenv("HISTORY_RECENT_ATTEMPTS", "5"))
+HISTORY_SUMMARY_TABLE = os.getenv("HISTORY_SUMMARY_TABLE", "")
+
+# Per-order pipeline deadline (seconds from the start of the run, 0 disables) and per-stage time
+# budgets as JSON {"agent name": seconds}. Stages with a deterministic fallback (street view, weather,
+# route) are cut off when their budget runs out; the other budgets reserve time before the deadline
+PIPELINE_DEADLINE_SECONDS = float(os.getenv("PIPELINE_DEADLINE_SECONDS", "120"))
+PIPELINE_STAGE_BUDGETS = json.loads(os.getenv(
+    "PIPELINE_STAGE_BUDGETS",
+    '{"RouteRiskAgent": 15, "WeatherAgent": 20, "StreetViewAgent": 45, "RiskAnalyzer_agent": 25, '
+    '"EmailAgent": 15, "DeliveryRiskSynthesizer": 15, "ActionAgent": 10}',
+))
+# Hard limit in seconds for budgeted stages without a fallback; their outputs then read
+# "<stage> unavailable" (0 disables)
+PIPELINE_STAGE_TIMEOUT_SECONDS = float(os.getenv("PIPELINE_STAGE_TIMEOUT_SECONDS", "60"))
+
+# Pipeline instrumentation: JSON lines of per-stage, model and tool metrics (empty disables)
+PIPELINE_METRICS_PATH = os.getenv("PIPELINE_METRICS_PATH", "")
+
+# Opt-in on-disk cache of model responses, keyed on model + rendered request
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".cache/llm")
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "200"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "24"))
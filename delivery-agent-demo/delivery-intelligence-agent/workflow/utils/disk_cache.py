@@ -0,0 +1,112 @@
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional
+
+_HEADER = struct.Struct(">d")  # entry creation time (unix seconds)
+
+
+def content_hash(data) -> str:
+    """sha256 hex digest of bytes or str."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class DiskCache:
+    """
+    Content-addressed on-disk cache with a TTL and a size-bounded LRU.
+
+    Each entry is one file named after its key. Reads refresh the file's mtime,
+    so eviction removes the least recently used entries once the directory
+    grows past `max_bytes`. Writes are atomic, which makes the cache safe to
+    share between processes (e.g. the CLI and the MCP tool server). The
+    directory is only scanned for its size on the first write, so creating a
+    cache at import time costs nothing.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _scan(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        (created_at,) = _HEADER.unpack_from(data)
+        if time.time() - created_at > self.ttl_seconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return data[_HEADER.size:]
+
+    def set(self, key: str, value: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(time.time()))
+            f.write(value)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._approx_bytes is None:
+                # Includes the entry just written
+                self._approx_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._approx_bytes += _HEADER.size + len(value)
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones, until under the size bound."""
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        expiry = time.time() - self.ttl_seconds
+        for path, size, mtime in entries:
+            if total <= self.max_bytes and mtime >= expiry:
+                break
+            self._remove(path)
+            total -= size
+        self._approx_bytes = total
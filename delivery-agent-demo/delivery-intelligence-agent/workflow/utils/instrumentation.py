@@ -0,0 +1,249 @@
+"""
+Per-order pipeline instrumentation built on ADK callbacks.
+
+`PipelineInstrumentation.instrument(root_agent)` attaches callbacks to every
+agent in the tree and appends one JSON line per event to a metrics file:
+
+- ``agent``: wall time of each stage
+- ``model``: model latency, time to first token (streamed responses only,
+  null otherwise) and `usage_metadata` token counts
+- ``tool``: tool (MCP) call duration and request/response payload sizes, also
+  for tools the deterministic stages call directly through `timed_tool_call`
+
+The root agent's ``agent`` record also lists the stages that ran out of their
+time budget and used their fallback (``fallbacks``).
+
+`summarize` turns a metrics file into p50/p95 per stage; see
+`benchmarks/pipeline_report.py`.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
+
+from workflow.utils.callbacks import add_callback, walk_agents
+
+
+# Instrumentations attached by `instrument`, notified of tool calls made outside the LLM tool loop
+_active: List["PipelineInstrumentation"] = []
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _payload_bytes(value: Any) -> int:
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+class PipelineInstrumentation:
+    """Records agent, model and tool metrics for every order as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._starts: Dict[tuple, float] = {}
+        self._first_token: Dict[tuple, float] = {}
+        self._root_name: Optional[str] = None
+        self._agent_names: set = set()
+
+    def _emit(self, callback_context, record: Dict[str, Any]) -> None:
+        if record.get("order_id") is None:
+            record["order_id"] = callback_context.state.get("order_id")
+        record.update({
+            "ts": time.time(),
+            "session_id": callback_context.session.id,
+            "invocation_id": callback_context.invocation_id,
+            "stage": callback_context.agent_name,
+        })
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line)
+
+    # Agent callbacks
+    def before_agent(self, callback_context) -> None:
+        self._starts[("agent", callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+        return None
+
+    def after_agent(self, callback_context) -> None:
+        # A model call answered by a before_model callback (e.g. the response cache) never reaches after_model
+        self._starts.pop(("model", callback_context.invocation_id, callback_context.agent_name), None)
+        start = self._starts.pop(("agent", callback_context.invocation_id, callback_context.agent_name), None)
+        if start is None:
+            return None
+        record = {"kind": "agent", "duration": time.perf_counter() - start}
+        if callback_context.agent_name == self._root_name:
+            record["fallbacks"] = callback_context.state.get("pipeline_fallbacks") or []
+            # Stages cut off by their budget never reach their after callbacks
+            for key in [key for key in self._starts if key[1] == callback_context.invocation_id]:
+                self._starts.pop(key, None)
+        self._emit(callback_context, record)
+        return None
+
+    # Model callbacks
+    def before_model(self, callback_context, llm_request) -> None:
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        self._starts[key] = time.perf_counter()
+        self._first_token.pop(key, None)
+        return None
+
+    def after_model(self, callback_context, llm_response) -> None:
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        now = time.perf_counter()
+        if llm_response.partial:
+            self._first_token.setdefault(key, now)
+            return None
+
+        start = self._starts.pop(key, None)
+        first_token = self._first_token.pop(key, None)
+        if start is None:
+            return None
+        usage = llm_response.usage_metadata
+        self._emit(callback_context, {
+            "kind": "model",
+            "duration": now - start,
+            # Without streaming the whole response arrives at once, so there is no first token to time
+            "ttft": first_token - start if first_token is not None else None,
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "output_tokens": getattr(usage, "candidates_token_count", None),
+            "cached_tokens": getattr(usage, "cached_content_token_count", None),
+            "total_tokens": getattr(usage, "total_token_count", None),
+        })
+        return None
+
+    # Tool callbacks
+    def before_tool(self, tool, args, tool_context) -> None:
+        self._starts[("tool", tool_context.invocation_id, tool_context.function_call_id)] = time.perf_counter()
+        return None
+
+    def after_tool(self, tool, args, tool_context, tool_response) -> None:
+        start = self._starts.pop(("tool", tool_context.invocation_id, tool_context.function_call_id), None)
+        if start is not None:
+            self._emit(tool_context, {
+                "kind": "tool",
+                "tool": tool.name,
+                "duration": time.perf_counter() - start,
+                "request_bytes": _payload_bytes(args),
+                "response_bytes": _payload_bytes(tool_response),
+            })
+        return None
+
+    def record_tool_call(self, ctx, tool_name: str, args: tuple, response: Any, duration: float, order_id=None) -> None:
+        """``tool`` record for a tool function an agent of this tree called directly."""
+        if ctx.agent.name not in self._agent_names:
+            return
+        self._emit(ReadonlyContext(ctx), {
+            "kind": "tool",
+            "tool": tool_name,
+            "order_id": order_id,
+            "duration": duration,
+            "request_bytes": _payload_bytes(list(args)),
+            "response_bytes": _payload_bytes(response),
+        })
+
+    def instrument(self, root_agent) -> None:
+        """Attach the callbacks to `root_agent` and all of its sub-agents."""
+        self._root_name = root_agent.name
+        self._agent_names = {agent.name for agent in walk_agents(root_agent)}
+        if self not in _active:
+            _active.append(self)
+        for agent in walk_agents(root_agent):
+            add_callback(agent, "before_agent_callback", self.before_agent, first=True)
+            add_callback(agent, "after_agent_callback", self.after_agent, first=True)
+            if isinstance(agent, LlmAgent):
+                add_callback(agent, "before_model_callback", self.before_model, first=True)
+                add_callback(agent, "after_model_callback", self.after_model, first=True)
+                add_callback(agent, "before_tool_callback", self.before_tool, first=True)
+                add_callback(agent, "after_tool_callback", self.after_tool, first=True)
+
+
+async def timed_tool_call(ctx, fn, *args, order_id=None):
+    """
+    Run the blocking tool function `fn(*args)` in a thread and record it as a
+    ``tool`` record of the calling agent (`ctx` is its InvocationContext), as the
+    tool callbacks do for LLM tool calls.
+    """
+    start = time.perf_counter()
+    result = await asyncio.to_thread(fn, *args)
+    duration = time.perf_counter() - start
+    for instrumentation in _active:
+        instrumentation.record_tool_call(ctx, fn.__name__, args, result, duration, order_id)
+    return result
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> str:
+    """p50/p95 per stage, model and tool across all recorded orders, plus how often each fallback fired."""
+    groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    orders = set()
+    runs = 0
+    fallbacks: Dict[str, int] = defaultdict(int)
+    for record in records:
+        if "fallbacks" in record:
+            runs += 1
+            for stage in record["fallbacks"]:
+                fallbacks[stage] += 1
+        name = record.get("tool") if record["kind"] == "tool" else record.get("stage")
+        groups[(record["kind"], name)].append(record)
+        if record.get("order_id") is not None:
+            orders.add(record["order_id"])
+
+    def stats(values: List[Optional[float]]) -> str:
+        values = [v for v in values if v is not None]
+        return f"p50 {percentile(values, 50):7.2f}  p95 {percentile(values, 95):7.2f}"
+
+    def mean(values: List[Optional[float]]) -> float:
+        values = [v for v in values if v is not None]
+        return sum(values) / len(values) if values else 0.0
+
+    lines = [f"Orders: {len(orders)}"]
+    for kind, title in (("agent", "Stage wall time (s)"), ("model", "Model calls (s)"), ("tool", "Tool calls (s)")):
+        lines.append(f"\n{title}")
+        for (group_kind, name), items in sorted(groups.items(), key=lambda kv: str(kv[0][1])):
+            if group_kind != kind:
+                continue
+            line = f"  {name:<32} n={len(items):<5} {stats([r['duration'] for r in items])}"
+            if kind == "model":
+                ttft = [r.get("ttft") for r in items if r.get("ttft") is not None]
+                line += (
+                    f" | ttft {stats(ttft) if ttft else 'n/a (not streamed)'}"
+                    f" | tokens in {mean([r.get('prompt_tokens') for r in items]):.0f}"
+                    f" out {mean([r.get('output_tokens') for r in items]):.0f}"
+                )
+            elif kind == "tool":
+                line += f" | resp bytes p95 {percentile([r.get('response_bytes') or 0 for r in items], 95):.0f}"
+            lines.append(line)
+
+    if runs:
+        lines.append(f"\nFallbacks ({runs} pipeline runs)")
+        for stage, count in sorted(fallbacks.items()):
+            lines.append(f"  {stage:<32} n={count:<5} {count / runs:.1%} of runs")
+        if not fallbacks:
+            lines.append("  none")
+    return "\n".join(lines)
@@ -0,0 +1,90 @@
+"""
+Opt-in model response cache implemented as ADK model callbacks.
+
+The key is the model name plus a hash of the fully rendered request (system
+instruction, contents, tool declarations and generation config), so a re-run
+with unchanged inputs is answered from disk and any change in the inputs is a
+miss. Responses live in a `DiskCache`, bounded by TTL and size.
+"""
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.models.llm_response import LlmResponse
+from loguru import logger
+
+from workflow.utils.callbacks import add_callback, walk_agents
+from workflow.utils.config import LLM_CACHE_DIR, LLM_CACHE_MAX_MB, LLM_CACHE_TTL_HOURS
+from workflow.utils.disk_cache import DiskCache, content_hash
+
+# Per-call fields that differ between otherwise identical requests
+_VOLATILE_CONFIG_FIELDS = {"http_options", "labels"}
+
+
+def _strip_call_ids(value: Any) -> Any:
+    """Drop the random function call ids ADK assigns, which would defeat the cache key."""
+    if isinstance(value, dict):
+        return {k: _strip_call_ids(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [_strip_call_ids(v) for v in value]
+    return value
+
+
+def request_cache_key(llm_request) -> str:
+    """Model name plus a hash of the rendered request."""
+    config = llm_request.config.model_dump(mode="json", exclude_none=True, exclude=_VOLATILE_CONFIG_FIELDS) if llm_request.config else {}
+    rendered = json.dumps(
+        {
+            "contents": _strip_call_ids([c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents]),
+            "config": config,
+        },
+        sort_keys=True,
+    )
+    return content_hash(f"{llm_request.model}\n{rendered}")
+
+
+class LlmResponseCache:
+    """Serves repeated model requests from disk; counts hits and misses."""
+
+    def __init__(self, directory: str = LLM_CACHE_DIR, max_bytes: int = LLM_CACHE_MAX_MB * 1024 * 1024,
+                 ttl_seconds: float = LLM_CACHE_TTL_HOURS * 3600):
+        self.store = DiskCache(directory, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def before_model(self, callback_context, llm_request) -> Optional[LlmResponse]:
+        key = request_cache_key(llm_request)
+        cached = self.store.get(key)
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._pending[(callback_context.invocation_id, callback_context.agent_name)] = key
+        if cached is None:
+            return None
+        logger.info(f"LLM cache hit for {callback_context.agent_name}")
+        return LlmResponse.model_validate_json(cached)
+
+    def after_model(self, callback_context, llm_response) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        with self._lock:
+            key = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if key is not None and llm_response.content and not llm_response.error_code:
+            self.store.set(key, llm_response.model_dump_json(exclude_none=True).encode("utf-8"))
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def install(self, root_agent) -> None:
+        """Attach the cache to every LlmAgent under `root_agent`."""
+        for agent in walk_agents(root_agent):
+            if isinstance(agent, LlmAgent):
+                add_callback(agent, "before_model_callback", self.before_model)
+                add_callback(agent, "after_model_callback", self.after_model)
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from workflow.utils.config import PREFETCH_DIR, PREFETCH_TTL_SECONDS
+from workflow.utils.disk_cache import DiskCache, content_hash
+
+# Seconds between checks while waiting for a running prefetch
+_POLL_SECONDS = 0.2
+
+
+def streetview_key(url: str) -> str:
+    return f"streetview:{str(url).strip()}"
+
+
+def weather_key(cache_key: Tuple[int, int, str]) -> str:
+    """Prefetch key of a weather forecast, from its `weather_cache_key` (grid cell, date)."""
+    return "weather:" + ":".join(str(part) for part in cache_key)
+
+
+class PrefetchStore:
+    """
+    Results of speculative lookups, shared between the process that starts them
+    (CLI / batch runner) and the MCP tool server that serves them to the agents.
+
+    Values are JSON objects in a DiskCache. While a lookup runs its key has a
+    pending marker file, so a tool asking for it waits for the result instead of
+    issuing the same request a second time. Markers older than the wait timeout
+    are ignored (left behind by an interrupted run).
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float, max_bytes: int = 50 * 1024 * 1024):
+        self.results = DiskCache(os.path.join(directory, "results"), max_bytes, ttl_seconds)
+        self.pending_dir = os.path.join(directory, "pending")
+        os.makedirs(self.pending_dir, exist_ok=True)
+
+    def _marker(self, key: str) -> str:
+        return os.path.join(self.pending_dir, content_hash(key))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        data = self.results.get(content_hash(key))
+        return json.loads(data) if data is not None else None
+
+    def begin(self, key: str) -> None:
+        """Mark `key` as being fetched."""
+        with open(self._marker(key), "w"):
+            pass
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        self.results.set(content_hash(key), json.dumps(value, default=str).encode("utf-8"))
+        self.end(key)
+
+    def end(self, key: str) -> None:
+        """Clear the pending marker (the lookup finished, with or without a result)."""
+        try:
+            os.remove(self._marker(key))
+        except FileNotFoundError:
+            pass
+
+    def is_pending(self, key: str, max_age: float) -> bool:
+        try:
+            return time.time() - os.stat(self._marker(key)).st_mtime < max_age
+        except FileNotFoundError:
+            return False
+
+    async def wait(self, key: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        The stored result; while a prefetch of `key` is running, wait up to `timeout` seconds for it.
+
+        Polls without holding a thread, so any number of tool calls can wait at once.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+            if not self.is_pending(key, timeout):
+                # The prefetch may have finished between the two checks
+                return self.get(key)
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(_POLL_SECONDS)
+
+
+prefetch_store = PrefetchStore(PREFETCH_DIR, PREFETCH_TTL_SECONDS)
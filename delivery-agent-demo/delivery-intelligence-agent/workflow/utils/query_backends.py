@@ -0,0 +1,284 @@
+"""
+Pluggable query backends for the SQL tools.
+
+`bigquery` (default) runs queries on the BigQuery dataset. `duckdb` loads the
+same tables from the `normalized_tables` CSVs (or Parquet exports) into an
+embedded DuckDB database, so local runs and single-order lookups never leave the
+process. Callers keep writing BigQuery SQL; `to_duckdb_sql` rewrites the few
+dialect differences the tools and agents use.
+"""
+import json
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from workflow.utils.config import PROJECT_ID, DATASET_ID, QUERY_BACKEND, LOCAL_DATA_DIR, DUCKDB_PATH, LOCAL_WRITE_DIR
+
+# Column types the CSV sniffer cannot infer (action_update ships header-only), matching big_query_data.py
+LOCAL_COLUMN_TYPES = {
+    "action_update": {"DATA_ID": "BIGINT", "CUSTOMER_ID": "BIGINT", "UPDATED_AT": "TIMESTAMP", "RESCHEDULED": "TIMESTAMP"},
+}
+
+# Tables written at run time: views over the source file plus a shared append-only JSON lines log
+LOCAL_APPEND_TABLES = ("action_update",)
+
+# Seconds to wait for another process that is building the DuckDB database file
+_BUILD_WAIT_SECONDS = 30
+
+# Project and dataset parts may be empty (the shipped .env leaves PROJECT_ID and DATASET_ID blank)
+_TABLE_REF = re.compile(r"`(?:[\w-]*\.)*(\w+)`")
+_DIALECT_RULES = [
+    (re.compile(r"\*\s*EXCEPT\s*\(", re.IGNORECASE), "* EXCLUDE ("),
+    (re.compile(r"\bSAFE_CAST\s*\(", re.IGNORECASE), "TRY_CAST("),
+    (re.compile(r"\bDATETIME\s*\(\s*CURRENT_TIMESTAMP\s*\(\s*\)\s*\)", re.IGNORECASE), "CAST(CURRENT_TIMESTAMP AS TIMESTAMP)"),
+    (re.compile(r"\bCURRENT_DATETIME\s*\(\s*\)", re.IGNORECASE), "CAST(CURRENT_TIMESTAMP AS TIMESTAMP)"),
+    (re.compile(r"\bCURRENT_TIMESTAMP\s*\(\s*\)", re.IGNORECASE), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bFLOAT64\b", re.IGNORECASE), "DOUBLE"),
+]
+
+
+def to_duckdb_sql(sql: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Rewrite BigQuery SQL for DuckDB: table paths, SELECT * EXCEPT, a few functions and @params."""
+    sql = _TABLE_REF.sub(r"\1", sql)
+    if PROJECT_ID and DATASET_ID:
+        sql = re.sub(rf"\b{re.escape(PROJECT_ID)}\.{re.escape(DATASET_ID)}\.(\w+)", r"\1", sql)
+    for pattern, replacement in _DIALECT_RULES:
+        sql = pattern.sub(replacement, sql)
+    for name in params or {}:
+        sql = re.sub(rf"@{re.escape(name)}\b", f"${name}", sql)
+    return sql
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+@lru_cache(maxsize=1)
+def _bqstorage_available() -> bool:
+    try:
+        import google.cloud.bigquery_storage  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class BigQueryBackend:
+    """Queries the BigQuery dataset through the shared client."""
+
+    name = "bigquery"
+    is_local = False
+
+    def _job_config(self, params: Optional[Dict[str, Any]]):
+        from google.cloud import bigquery
+
+        if not params:
+            return None
+        types = {bool: "BOOL", int: "INT64", float: "FLOAT64"}
+        return bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter(name, types.get(type(value), "STRING"), value)
+            for name, value in params.items()
+        ])
+
+    def query_arrow(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        from workflow.utils.clients import get_bigquery_client
+
+        result = get_bigquery_client().query(sql, job_config=self._job_config(params)).result()
+        return result.to_arrow(create_bqstorage_client=_bqstorage_available())
+
+    def insert_rows(self, table: str, rows: List[Dict[str, Any]], row_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        from workflow.utils.clients import get_bigquery_client
+
+        return get_bigquery_client().insert_rows_json(f"{PROJECT_ID}.{DATASET_ID}.{table}", rows, row_ids=row_ids)
+
+    def table_info(self, table: str) -> Tuple[int, List[Tuple[str, str]]]:
+        from workflow.utils.clients import get_bigquery_client
+
+        info = get_bigquery_client().get_table(f"{PROJECT_ID}.{DATASET_ID}.{table}")
+        return info.num_rows, [(field.name, field.field_type) for field in info.schema]
+
+
+class DuckDBBackend:
+    """
+    Embedded DuckDB database loaded from `data_dir`.
+
+    Every `<table>.parquet` or `<table>.csv` in the directory becomes a table
+    on first use (Parquet wins when both exist). Each query runs on its own
+    cursor, so threads can query concurrently.
+
+    The CLI and every stdio tool server open their own database, so rows
+    written to `LOCAL_APPEND_TABLES` are appended to `<write_dir>/<table>.jsonl`
+    and the table is a view over its source file plus that log: every process
+    sees every write, and writes outlive the process. A database file is built
+    by the first process and then opened read-only by all of them (DuckDB allows
+    one read-write process per file).
+    """
+
+    name = "duckdb"
+    is_local = True
+
+    def __init__(self, data_dir: str = LOCAL_DATA_DIR, database: str = DUCKDB_PATH, write_dir: str = LOCAL_WRITE_DIR):
+        self.data_dir = data_dir
+        self.database = database
+        self.write_dir = os.path.abspath(write_dir)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    os.makedirs(self.write_dir, exist_ok=True)
+                    for table in LOCAL_APPEND_TABLES:
+                        open(self._write_log(table), "a").close()
+                    self._conn = self._open()
+        return self._conn
+
+    def _open(self):
+        import duckdb
+
+        if self.database == ":memory:":
+            conn = duckdb.connect(self.database)
+            self._load_tables(conn)
+            return conn
+
+        deadline = time.monotonic() + _BUILD_WAIT_SECONDS
+        while not self._is_built():
+            try:
+                with duckdb.connect(self.database) as conn:
+                    self._load_tables(conn)
+            except duckdb.IOException:
+                # Another process holds the file (building it, or already reading it)
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.5)
+        return duckdb.connect(self.database, read_only=True)
+
+    def _source_files(self) -> Dict[str, str]:
+        files = {}
+        for file_name in sorted(os.listdir(self.data_dir)):
+            table, ext = os.path.splitext(file_name)
+            if ext in (".csv", ".parquet") and (table not in files or ext == ".parquet"):
+                files[table] = os.path.abspath(os.path.join(self.data_dir, file_name))
+        return files
+
+    @staticmethod
+    def _existing(conn) -> Dict[str, str]:
+        return dict(conn.execute("SELECT table_name, table_type FROM information_schema.tables").fetchall())
+
+    def _is_built(self) -> bool:
+        """Whether the database file has every source table (and the append tables as views)."""
+        import duckdb
+
+        if not os.path.exists(self.database):
+            return False
+        try:
+            with duckdb.connect(self.database, read_only=True) as conn:
+                existing = self._existing(conn)
+        except duckdb.IOException:
+            return False
+        return all(
+            table in existing and (table not in LOCAL_APPEND_TABLES or existing[table] == "VIEW")
+            for table in self._source_files()
+        )
+
+    def _write_log(self, table: str) -> str:
+        return os.path.join(self.write_dir, f"{table}.jsonl")
+
+    def _load_tables(self, conn) -> None:
+        existing = self._existing(conn)
+        files = self._source_files()
+
+        for table, path in files.items():
+            # Views keep their definition, so the paths are inlined rather than passed as parameters
+            if path.endswith(".parquet"):
+                source = f"read_parquet({_literal(path)})"
+            else:
+                types = LOCAL_COLUMN_TYPES.get(table)
+                source = f"read_csv({_literal(path)}, types = {types!r})" if types else f"read_csv({_literal(path)})"
+
+            if table in LOCAL_APPEND_TABLES:
+                if existing.get(table) == "VIEW":
+                    continue
+                if table in existing:
+                    # Built before writes went to the shared log
+                    conn.execute(f'DROP TABLE "{table}"')
+                columns = {name: column_type for name, column_type, *_ in conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+                log = f"read_json({_literal(self._write_log(table))}, format = 'newline_delimited', columns = {columns!r})"
+                conn.execute(f'CREATE VIEW "{table}" AS SELECT * FROM {source} UNION ALL BY NAME SELECT * FROM {log}')
+            elif table not in existing:
+                conn.execute(f'CREATE TABLE "{table}" AS SELECT * FROM {source}')
+        logger.info(f"DuckDB backend ready with {len(files)} tables from {self.data_dir}")
+
+    def query_arrow(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        cursor = self._connection().cursor()
+        try:
+            return cursor.execute(to_duckdb_sql(sql, params), params or None).fetch_arrow_table()
+        finally:
+            cursor.close()
+
+    def insert_rows(self, table: str, rows: List[Dict[str, Any]], row_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Insert dict rows; returns per-row errors like BigQuery's insert_rows_json."""
+        if table in LOCAL_APPEND_TABLES:
+            return self._append_rows(table, rows)
+        cursor = self._connection().cursor()
+        errors = []
+        try:
+            for index, row in enumerate(rows):
+                columns = ", ".join(f'"{name}"' for name in row)
+                placeholders = ", ".join("?" for _ in row)
+                try:
+                    cursor.execute(f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders})', list(row.values()))
+                except Exception as e:
+                    errors.append({"index": index, "errors": [str(e)]})
+        finally:
+            cursor.close()
+        return errors
+
+    def _append_rows(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append rows to the table's shared write log (one write, so lines from concurrent processes do not interleave)."""
+        _, columns = self.table_info(table)
+        known = {name for name, _ in columns}
+        lines, errors = [], []
+        for index, row in enumerate(rows):
+            unknown = set(row) - known
+            if unknown:
+                errors.append({"index": index, "errors": [f"unknown columns {sorted(unknown)}"]})
+                continue
+            lines.append(json.dumps(row, default=str) + "\n")
+        if lines:
+            with open(self._write_log(table), "a") as f:
+                f.write("".join(lines))
+        return errors
+
+    def table_info(self, table: str) -> Tuple[int, List[Tuple[str, str]]]:
+        cursor = self._connection().cursor()
+        try:
+            columns = [(row[0], row[1]) for row in cursor.execute(f'DESCRIBE "{table}"').fetchall()]
+            num_rows = cursor.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        finally:
+            cursor.close()
+        return num_rows, columns
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_query_backend():
+    """The process-wide backend selected by QUERY_BACKEND."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if QUERY_BACKEND == "duckdb":
+                    _backend = DuckDBBackend()
+                elif QUERY_BACKEND == "bigquery":
+                    _backend = BigQueryBackend()
+                else:
+                    raise ValueError(f"Unknown QUERY_BACKEND '{QUERY_BACKEND}' (expected 'bigquery' or 'duckdb')")
+    return _backend
@@ -0,0 +1,112 @@
+"""
+Columnar query path and compact result serialization for the SQL tools.
+
+Results are fetched as Arrow tables from the configured query backend (BigQuery,
+through the Storage Read API when it is installed, or local DuckDB) and rendered
+column-wise: only the requested columns are kept, null cells are left out (a
+single record is rendered as `NAME: value` lines, all-null columns are dropped
+from tables), long text is truncated and rows are capped, so a large history
+result does not inflate the prompt.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from workflow.utils.config import QUERY_MAX_ROWS, QUERY_MAX_TEXT_CHARS
+from workflow.utils.query_backends import get_query_backend
+
+NO_RESULTS = "No results found"
+
+
+def query_arrow(sql: str, params: Optional[Dict[str, Any]] = None):
+    """Run a query (BigQuery SQL, `@name` parameters from `params`) and return a pyarrow Table."""
+    return get_query_backend().query_arrow(sql, params)
+
+
+def query_rows(sql: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Run a query and return the rows as dicts."""
+    return query_arrow(sql, params).to_pylist()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt budgeting (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _cell(value: Any, max_text_chars: int) -> str:
+    if value is None:
+        return ""
+    text = str(value).replace("\n", " ")
+    if len(text) > max_text_chars:
+        text = text[:max_text_chars] + "..."
+    return text
+
+
+def _render(columns: Dict[str, List[Any]], total_rows: int, max_text_chars: int, label: str) -> str:
+    if total_rows == 0:
+        return NO_RESULTS
+
+    if total_rows == 1 and len(columns) == 1:
+        return str(next(iter(columns.values()))[0])
+
+    # Null cells carry no information for the model: left out of a single record, all-null columns dropped
+    columns = {name: values for name, values in columns.items() if any(v is not None for v in values)}
+    headers = list(columns)
+    shown = len(next(iter(columns.values()), []))
+
+    if total_rows == 1:
+        text = "\n".join(f"{name}: {_cell(columns[name][0], max_text_chars)}" for name in headers)
+    else:
+        header_line = " | ".join(headers)
+        lines = [header_line, "-" * len(header_line)]
+        cells = [[_cell(v, max_text_chars) for v in columns[name]] for name in headers]
+        lines.extend(" | ".join(row) for row in zip(*cells))
+        if total_rows > shown:
+            lines.append(f"... {total_rows - shown} more rows not shown")
+        text = "\n".join(lines)
+
+    logger.info(
+        f"{label}: {shown}/{total_rows} rows, {len(headers)} columns, "
+        f"{len(text.encode('utf-8'))} bytes, ~{estimate_tokens(text)} tokens"
+    )
+    return text
+
+
+def serialize_table(
+    table,
+    columns: Optional[Sequence[str]] = None,
+    max_rows: int = QUERY_MAX_ROWS,
+    max_text_chars: int = QUERY_MAX_TEXT_CHARS,
+    label: str = "query",
+) -> str:
+    """Render an Arrow table as a compact pipe-delimited table."""
+    if columns is not None:
+        table = table.select([name for name in columns if name in table.column_names])
+    total_rows = table.num_rows
+    table = table.slice(0, max_rows)
+    return _render(
+        {name: table.column(name).to_pylist() for name in table.column_names},
+        total_rows,
+        max_text_chars,
+        label,
+    )
+
+
+def serialize_rows(
+    rows: List[Dict[str, Any]],
+    columns: Optional[Sequence[str]] = None,
+    max_rows: int = QUERY_MAX_ROWS,
+    max_text_chars: int = QUERY_MAX_TEXT_CHARS,
+    label: str = "rows",
+) -> str:
+    """Render already-fetched dict rows with the same rules as `serialize_table`."""
+    if not rows:
+        return NO_RESULTS
+    names = [name for name in (columns or rows[0].keys()) if name in rows[0]]
+    shown = rows[:max_rows]
+    return _render(
+        {name: [row.get(name) for row in shown] for name in names},
+        len(rows),
+        max_text_chars,
+        label,
+    )